@@ -1,9 +1,28 @@
 import argparse
+import gzip
+import json
 import os
+import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import requests
-import re
-from urllib.parse import urlparse
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+JOURNAL_NAME = "scrape_journal.bin"
+JOURNAL_VERSION = 1
+ARCHIVE_NAME = "pages.jsonl.gz"
+
+# ID states in the journal bitmap (2 bits per ID)
+PENDING, DONE, FAILED, NOT_FOUND = 0, 1, 2, 3
+NOT_FOUND_STATUSES = {404, 410}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Journal (and archive) are flushed after this many results or seconds
+CHECKPOINT_EVERY = 100
+CHECKPOINT_SECONDS = 5.0
 
 
 def extract_id(url):
@@ -16,11 +35,142 @@ def extract_id(url):
 
 def get_base_url(url, id_val):
     """Reconstructs the base URL format/template from a URL and its ID."""
-    # Replace the ID in the URL with a placeholder format
-    return url.replace(str(id_val), "{}")
+    # Replace the trailing ID (only that one: hosts and paths may contain the digits too)
+    return re.sub(rf"{id_val}(/?)$", r"{}\1", url.replace("{", "{{").replace("}", "}}"))
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Going negative reserves the next token, so waiters queue up in order
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
+class Journal:
+    """Resume state: one JSON header line, then a 2-bit state per ID.
+
+    The header records the URL template, the ID range, where pages go
+    ("files" or "archive") and how many bytes of the archive are complete.
+    It is rewritten atomically at each checkpoint.
+    """
+
+    def __init__(self, path, url_template, start_id, end_id, mode="files"):
+        self.path = path
+        self.url_template = url_template
+        self.mode = mode
+        self.start_id = start_id
+        self.end_id = end_id
+        self.archive_size = 0
+        self.bits = bytearray((end_id - start_id + 1 + 3) // 4)
+        self.loaded = False
+
+    def get(self, id_val):
+        offset = id_val - self.start_id
+        return (self.bits[offset >> 2] >> ((offset & 3) * 2)) & 3
+
+    def set(self, id_val, state):
+        offset = id_val - self.start_id
+        shift = (offset & 3) * 2
+        self.bits[offset >> 2] = (self.bits[offset >> 2] & ~(3 << shift)) | (state << shift)
+
+    def counts(self):
+        counts = [0, 0, 0, 0]
+        for id_val in range(self.start_id, self.end_id + 1):
+            counts[self.get(id_val)] += 1
+        return dict(zip([PENDING, DONE, FAILED, NOT_FOUND], counts))
+
+    def load(self):
+        """Reads the journal if it exists; states of IDs inside this range carry over."""
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                bits = f.read()
+        except (OSError, ValueError):
+            return
+        if header.get("version") != JOURNAL_VERSION:
+            return
+        if header["url_template"] != self.url_template:
+            raise ValueError(
+                f"{self.path} belongs to {header['url_template']}; use another --output-dir"
+            )
+        # Journals written before the mode was recorded: only archive runs had an archive size
+        mode = header.get("mode") or ("archive" if header.get("archive_size") else "files")
+        if mode != self.mode:
+            # DONE pages of the other mode are not where this run would look for them
+            flag = "with" if mode == "archive" else "without"
+            raise ValueError(f"{self.path} was written by a run {flag} --archive; rerun {flag} it or use another --output-dir")
+        old = Journal(self.path, self.url_template, header["start_id"], header["end_id"])
+        old.bits = bytearray(bits)
+        for id_val in range(max(self.start_id, old.start_id), min(self.end_id, old.end_id) + 1):
+            self.set(id_val, old.get(id_val))
+        self.archive_size = header.get("archive_size", 0)
+        self.loaded = True
+
+    def save(self):
+        header = {
+            "version": JOURNAL_VERSION,
+            "url_template": self.url_template,
+            "start_id": self.start_id,
+            "end_id": self.end_id,
+            "mode": self.mode,
+            "archive_size": self.archive_size,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write(self.bits)
+        os.replace(tmp_path, self.path)
 
 
-def scrape_range(start_url, end_url, output_dir, delay=1.0):
+def read_archive(path):
+    """Yields {"id", "url", "html"} records from a pages.jsonl.gz archive."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class Progress:
+    def __init__(self, total):
+        self.total = total
+        self.counts = {DONE: 0, FAILED: 0, NOT_FOUND: 0}
+        self.started = time.monotonic()
+        self.printed = 0
+
+    def add(self, state):
+        self.counts[state] += 1
+
+    def show(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.printed < 0.5:
+            return
+        self.printed = now
+        finished = sum(self.counts.values())
+        rate = finished / max(now - self.started, 1e-9)
+        eta = (self.total - finished) / rate if rate else 0
+        print(
+            f"\r  {finished}/{self.total}  {rate:.1f} pages/s  ETA {int(eta // 60)}m{int(eta % 60):02d}s  "
+            f"(ok {self.counts[DONE]}, failed {self.counts[FAILED]}, 404 {self.counts[NOT_FOUND]})",
+            end="",
+            flush=True,
+        )
+
+
+def scrape_range(start_url, end_url, output_dir, delay=1.0, workers=1, rate=None, archive=False, retries=2):
     start_id = extract_id(start_url)
     end_id = extract_id(end_url)
 
@@ -34,54 +184,147 @@ def scrape_range(start_url, end_url, output_dir, delay=1.0):
 
     # Infer URL pattern
     url_template = get_base_url(start_url, start_id)
+    # Without --rate, --delay keeps its meaning: one request per `delay` seconds
+    rate = rate or (1.0 / delay if delay > 0 else None)
 
     print(f"Scraping from ID {start_id} to {end_id}")
     print(f"URL Template: {url_template.format('{id}')}")
-    print(f"Output Directory: {output_dir}")
+    print(f"Output: {os.path.join(output_dir, ARCHIVE_NAME) if archive else output_dir}")
+    print(f"Workers: {workers}, rate limit: {f'{rate:g} requests/s' if rate else 'none'}")
 
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
 
-    session = requests.Session()
-    # Add a user agent to be polite/avoid immediate blocking
-    session.headers.update(
-        {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+    journal = Journal(
+        os.path.join(output_dir, JOURNAL_NAME), url_template, start_id, end_id, "archive" if archive else "files"
     )
+    try:
+        journal.load()
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    if not journal.loaded and not archive:
+        # First run with a journal: pages from earlier runs count as done (one listdir, no stats)
+        names = set(os.listdir(output_dir))
+        for id_val in range(start_id, end_id + 1):
+            if f"{id_val}.html" in names:
+                journal.set(id_val, DONE)
 
-    success_count = 0
-    error_count = 0
+    archive_file = None
+    if archive:
+        archive_path = os.path.join(output_dir, ARCHIVE_NAME)
+        if not journal.loaded and os.path.exists(archive_path) and os.path.getsize(archive_path):
+            print(f"Error: {archive_path} exists but {JOURNAL_NAME} is missing; move the archive away first.")
+            return
+        archive_file = open(archive_path, "ab")
+        # Drop anything written after the last checkpoint (e.g. an interrupted run)
+        archive_file.truncate(journal.archive_size)
+        archive_file.seek(journal.archive_size)
 
-    for current_id in range(start_id, end_id + 1):
-        target_url = url_template.format(current_id)
-        output_file = os.path.join(output_dir, f"{current_id}.html")
+    todo = [id_val for id_val in range(start_id, end_id + 1) if journal.get(id_val) in (PENDING, FAILED)]
+    skipped = end_id - start_id + 1 - len(todo)
+    if skipped:
+        print(f"Skipping {skipped} IDs already done or not found (journal)")
 
-        if os.path.exists(output_file):
-            print(f"Skipping {current_id} (already exists)")
-            continue
+    bucket = TokenBucket(rate, burst=workers) if rate else None
+    local = threading.local()
 
-        try:
-            print(f"Fetching {target_url} ...", end="", flush=True)
-            response = session.get(target_url, timeout=10)
-
-            if response.status_code == 200:
-                with open(output_file, "w", encoding="utf-8") as f:
-                    f.write(response.text)
-                print(" OK")
-                success_count += 1
+    def fetch(id_val):
+        """Returns (id, state, html or None, message)."""
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            # Add a user agent to be polite/avoid immediate blocking
+            local.session.headers.update({"User-Agent": USER_AGENT})
+        target_url = url_template.format(id_val)
+        message = None
+        for attempt in range(retries + 1):
+            if bucket:
+                bucket.acquire()
+            try:
+                response = local.session.get(target_url, timeout=10)
+            except requests.RequestException as e:
+                message = f"Error: {e}"
             else:
-                print(f" Failed (Status: {response.status_code})")
-                error_count += 1
+                if response.status_code == 200:
+                    if not archive:
+                        output_file = os.path.join(output_dir, f"{id_val}.html")
+                        with open(output_file + ".tmp", "w", encoding="utf-8") as f:
+                            f.write(response.text)
+                        os.replace(output_file + ".tmp", output_file)
+                    return id_val, DONE, response.text, None
+                if response.status_code in NOT_FOUND_STATUSES:
+                    return id_val, NOT_FOUND, None, None
+                message = f"Failed (Status: {response.status_code})"
+                if response.status_code not in RETRY_STATUSES:
+                    break
+            if attempt < retries:
+                time.sleep(2**attempt)
+        return id_val, FAILED, None, message
 
-        except Exception as e:
-            print(f" Error: {e}")
-            error_count += 1
+    progress = Progress(len(todo))
+    batch = []  # (id, state, html) finished since the last checkpoint
+    last_checkpoint = time.monotonic()
 
-        time.sleep(delay)
+    def checkpoint():
+        pages = [(id_val, html) for id_val, state, html in batch if state == DONE and archive]
+        if pages:
+            # One gzip member per checkpoint; gzip readers treat the file as one stream
+            lines = "".join(
+                json.dumps({"id": id_val, "url": url_template.format(id_val), "html": html}, ensure_ascii=False) + "\n"
+                for id_val, html in pages
+            )
+            archive_file.write(gzip.compress(lines.encode("utf-8")))
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+            journal.archive_size = archive_file.tell()
+        for id_val, state, _ in batch:
+            journal.set(id_val, state)
+        journal.save()
+        batch.clear()
 
+    pending = iter(todo)
+    running = set()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        # Only a couple of IDs per worker are queued, so Ctrl+C stops promptly
+        for id_val in pending:
+            running.add(executor.submit(fetch, id_val))
+            if len(running) >= workers * 2:
+                break
+        while running:
+            finished, running = wait(running, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in finished:
+                id_val, state, html, message = future.result()
+                if message:
+                    print(f"\r  {url_template.format(id_val)}: {message}")
+                progress.add(state)
+                batch.append((id_val, state, html))
+                next_id = next(pending, None)
+                if next_id is not None:
+                    running.add(executor.submit(fetch, next_id))
+            if len(batch) >= CHECKPOINT_EVERY or time.monotonic() - last_checkpoint > CHECKPOINT_SECONDS:
+                checkpoint()
+                last_checkpoint = time.monotonic()
+            progress.show()
+    except KeyboardInterrupt:
+        print("\nInterrupted, saving progress (rerun the same command to resume)...")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        checkpoint()
+        if archive_file:
+            archive_file.close()
+
+    progress.show(force=True)
+    print()
+    counts = journal.counts()
     print("-" * 30)
-    print(f"Completed. Success: {success_count}, Failed: {error_count}")
+    print(
+        f"Completed. Success: {progress.counts[DONE]}, Failed: {progress.counts[FAILED]}, "
+        f"Not found: {progress.counts[NOT_FOUND]}"
+    )
+    print(
+        f"Range total: {counts[DONE]} done, {counts[FAILED]} failed (retried next run), "
+        f"{counts[NOT_FOUND]} not found, {counts[PENDING]} pending"
+    )
 
 
 if __name__ == "__main__":
@@ -105,7 +348,38 @@ if __name__ == "__main__":
         default=1.0,
         help="Delay between requests in seconds (default: 1.0)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Concurrent requests (default: 1)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Requests per second across all workers (default: 1 / delay)",
+    )
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help=f"Store pages in {ARCHIVE_NAME} inside the output directory instead of one HTML file per ID",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Retries per ID on connection errors, 429 and 5xx (default: 2)",
+    )
 
     args = parser.parse_args()
 
-    scrape_range(args.start_url, args.end_url, args.output_dir, args.delay)
+    scrape_range(
+        args.start_url,
+        args.end_url,
+        args.output_dir,
+        args.delay,
+        args.workers,
+        args.rate,
+        args.archive,
+        args.retries,
+    )
@@ -8,7 +8,7 @@ import * as Speech from 'expo-speech';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import { LinearGradient } from 'expo-linear-gradient';
 import { MotiView } from 'moti';
-import { db } from '../db/client';
+import { db, loadExplanation } from '../db/client';
 import { questions } from '../db/schema';
 import { eq, inArray, asc, desc, not } from 'drizzle-orm';
 import Constants from 'expo-constants';
@@ -187,10 +187,17 @@ export default function AudioPlayer() {
                 break;
 
             case 'explanation':
-                const cleanExp = currentQuestion.explanation?.replace(/[*【】]/g, '') || "解説はありません";
-                setDisplayedText(cleanExp);
-                speak(`解説。${cleanExp}`, cycleId, () => {
-                    performNext(cycleId);
+                // Explanations may be served from side shards (loaded on demand)
+                (currentQuestion.explanation
+                    ? Promise.resolve(currentQuestion.explanation)
+                    : loadExplanation(currentQuestion.id)
+                ).then((explanation: string | null) => {
+                    if (cycleIdRef.current !== cycleId) return;
+                    const cleanExp = explanation?.replace(/[*【】]/g, '') || "解説はありません";
+                    setDisplayedText(cleanExp);
+                    speak(`解説。${cleanExp}`, cycleId, () => {
+                        performNext(cycleId);
+                    });
                 });
                 break;
         }
@@ -5,7 +5,7 @@ import { SafeAreaView } from 'react-native-safe-area-context';
 import { ChevronLeft, CheckCircle, XCircle, Type, Info, Star } from 'lucide-react-native';
 import clsx from 'clsx';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import { db, saveDb } from '../../db/client';
+import { db, saveDb, loadExplanation } from '../../db/client';
 import { questions, userProgress } from '../../db/schema';
 import { eq, and, gt, asc, isNull, sql } from 'drizzle-orm';
 import Constants from 'expo-constants';
@@ -197,6 +197,14 @@ export default function QuizPlayer() {
                         group: q.group || (q as any).group_id || 'unknown',
                         categoryLabel: q.categoryLabel || (q as any).category_label
                     });
+
+                    // Explanation left out of the question shards: fetch it by ID
+                    if (!rawExplanation) {
+                        loadExplanation(q.id).then(text => {
+                            if (!text) return;
+                            setQuestion(prev => prev && prev.id === q.id ? { ...prev, explanation: text } : prev);
+                        });
+                    }
                 } else {
                     setErrorInfo("No result found for ID: " + id);
                 }
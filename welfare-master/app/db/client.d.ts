@@ -1,3 +1,4 @@
 export declare let db: any;
 export declare const saveDb: () => Promise<void>;
 export declare const initializeDb: () => Promise<void>;
+export declare const loadExplanation: (id: string) => Promise<string | null>;
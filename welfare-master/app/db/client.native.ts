@@ -45,6 +45,9 @@ export const saveDb = async () => {
     // No-op for native sqlite
 };
 
+// Native bundles ship explanations inline (web loads them from side shards)
+export const loadExplanation = async (id: string): Promise<string | null> => null;
+
 export const initializeDb = async () => {
     const currentDb = getDb();
     if (!currentDb || !expoDb) {
@@ -2,6 +2,7 @@ import { Platform } from 'react-native';
 import { drizzle } from 'drizzle-orm/sql-js';
 import * as schema from './schema';
 import Constants from 'expo-constants';
+import { eq } from 'drizzle-orm';
 
 // polyfill
 if (Platform.OS === 'web') {
@@ -18,6 +19,171 @@ export const saveDb = async () => {
     console.log("Web: Save skipped");
 };
 
+let assetManifest: any = null;
+
+// Explanation side shards (data_pipeline/build_asset_pool.py) are sorted by
+// question ID; the manifest lists the first/last ID of every shard.
+const explanationShards = new Map<string, Promise<Map<string, string>>>();
+
+export const loadExplanation = async (id: string): Promise<string | null> => {
+    const shard = assetManifest?.groups?.explanations?.find(
+        (s: any) => s.first <= id && id <= s.last
+    );
+    if (!shard) return null;
+    if (!explanationShards.has(shard.file)) {
+        explanationShards.set(shard.file, (async () => {
+            const res = await fetch(`/${shard.file}`);
+            if (!res.ok) throw new Error(`Failed to fetch ${shard.file}`);
+            const texts = new Map<string, string>();
+            for (const item of await res.json()) texts.set(item.id, item.explanation);
+            return texts;
+        })());
+    }
+    try {
+        const text = (await explanationShards.get(shard.file)!).get(id) ?? null;
+        if (text && db) {
+            // Keep it for search and later sessions of this page
+            await db.update(schema.questions).set({ explanation: text }).where(eq(schema.questions.id, id));
+        }
+        return text;
+    } catch (e) {
+        explanationShards.delete(shard.file);
+        console.warn(`Web: Failed to load explanation for ${id}`, e);
+        return null;
+    }
+};
+
+// manifest.json (data_pipeline/asset_manifest.py) lists the content-hashed
+// shards of every asset group, so the shard list costs a single request.
+const loadManifest = async () => {
+    try {
+        const res = await fetch('/manifest.json', { cache: 'no-cache' });
+        if (!res.ok) return null;
+        const manifest = await res.json();
+        return manifest && manifest.groups ? manifest : null;
+    } catch (e) {
+        console.warn("Web: manifest.json not available, using legacy asset names.");
+        return null;
+    }
+};
+
+// Hashed files never change, so they are fetched without cache busting and
+// can stay in the HTTP cache. Without a manifest, fall back to legacy names.
+const assetUrls = (manifest: any, group: string, legacyUrls: string[]) => {
+    const shards = manifest?.groups?.[group];
+    if (shards && shards.length > 0) {
+        return shards.map((shard: any) => `/${shard.file}`);
+    }
+    return legacyUrls.map((url) => `${url}?t=${Date.now()}`);
+};
+
+// SPA rewrites (vercel.json) can answer a missing file with index.html
+const isSqliteFile = (bytes: Uint8Array) =>
+    String.fromCharCode(...Array.from(bytes.subarray(0, 15))) === 'SQLite format 3';
+
+// Release chain (data_pipeline/asset_releases.py): the client remembers the
+// release of the database it downloaded in full. While that file is still in
+// the HTTP cache and its release is in the chain, the patches since then are
+// applied to it instead of downloading the whole database again.
+const releaseKey = (variant: string) => `@asset_release_${variant}`;
+
+const readBaseRelease = (variant: string) => {
+    try {
+        return JSON.parse(localStorage.getItem(releaseKey(variant)) || 'null');
+    } catch (e) {
+        return null;
+    }
+};
+
+const applyPatch = (sqliteDb: any, patch: any) => {
+    sqliteDb.run("BEGIN TRANSACTION");
+    for (const table of ['questions', 'memorization_cards']) {
+        const part = patch[table];
+        if (!part) continue;
+        for (const id of part.delete) {
+            sqliteDb.run(`DELETE FROM ${table} WHERE id = ?`, [id]);
+        }
+        const placeholders = part.columns.map(() => '?').join(', ');
+        const stmt = sqliteDb.prepare(
+            `INSERT OR REPLACE INTO ${table} (${part.columns.join(', ')}) VALUES (${placeholders})`
+        );
+        for (const row of part.upsert) stmt.run(row);
+        stmt.free();
+    }
+    sqliteDb.run("COMMIT");
+};
+
+const loadPatchedDb = async (SQL: any, variant: string, manifest: any) => {
+    const chain = manifest?.releases?.[variant];
+    if (!chain || typeof localStorage === 'undefined') return null;
+    const base = readBaseRelease(variant);
+    const start = base ? chain.findIndex((entry: any) => entry.release === base.release) : -1;
+    if (start < 0 || start === chain.length - 1) return null;
+    const steps = chain.slice(start + 1);
+    if (steps.some((entry: any) => !entry.patch)) return null;
+
+    try {
+        const res = await fetch(`/${base.db}`, { cache: 'only-if-cached', mode: 'same-origin' });
+        if (!res.ok) return null;
+        const bytes = new Uint8Array(await res.arrayBuffer());
+        if (!isSqliteFile(bytes)) return null;
+
+        const patches = await Promise.all(steps.map(async (entry: any) => {
+            const patchRes = await fetch(`/${entry.patch.file}`);
+            if (!patchRes.ok) throw new Error(`Failed to fetch ${entry.patch.file}`);
+            return patchRes.json();
+        }));
+        // Each patch must start from the release before it (a patch cut
+        // against a different base would be applied to the wrong rows)
+        let expected = base.release;
+        patches.forEach((patch: any, i: number) => {
+            if (patch.from !== expected || patch.to !== steps[i].release) {
+                throw new Error(`Patch ${steps[i].patch.file} goes ${patch.from} -> ${patch.to}, expected ${expected} -> ${steps[i].release}`);
+            }
+            expected = patch.to;
+        });
+        const sqliteDb = new SQL.Database(bytes);
+        for (const patch of patches) applyPatch(sqliteDb, patch);
+        const patchBytes = steps.reduce((sum: number, entry: any) => sum + entry.patch.bytes, 0);
+        console.log(`Web: Patched cached database ${base.release} -> ${chain[chain.length - 1].release} (${patches.length} patches, ${patchBytes} bytes).`);
+        return sqliteDb;
+    } catch (e) {
+        console.warn("Web: Patching the cached database failed, downloading it in full.", e);
+        return null;
+    }
+};
+
+const loadPrebuiltDb = async (SQL: any, variant: string | undefined, manifest: any) => {
+    if (!variant) return null;
+    const patchedDb = await loadPatchedDb(SQL, variant, manifest);
+    if (patchedDb) return patchedDb;
+    try {
+        console.log(`Web: Fetching db_${variant}.sqlite...`);
+        const [url] = assetUrls(manifest, `db_${variant}`, [`/db_${variant}.sqlite`]);
+        const res = await fetch(url);
+        if (!res.ok) {
+            console.warn(`Web: Prebuilt db_${variant}.sqlite not available, falling back to JSON assets.`);
+            return null;
+        }
+        const bytes = new Uint8Array(await res.arrayBuffer());
+        if (!isSqliteFile(bytes)) {
+            console.warn(`Web: db_${variant}.sqlite is not a SQLite file, falling back to JSON assets.`);
+            return null;
+        }
+        const sqliteDb = new SQL.Database(bytes);
+        console.log(`Web: Opened prebuilt database (${bytes.byteLength} bytes).`);
+
+        const head = manifest?.releases?.[variant]?.slice(-1)[0];
+        if (head && typeof localStorage !== 'undefined') {
+            localStorage.setItem(releaseKey(variant), JSON.stringify({ release: head.release, db: url.slice(1) }));
+        }
+        return sqliteDb;
+    } catch (e) {
+        console.warn("Web: Prebuilt database load failed, falling back to JSON assets.", e);
+        return null;
+    }
+};
+
 export const initializeDb = async () => {
     if (Platform.OS !== 'web') return;
     if (db) return;
@@ -29,6 +195,18 @@ export const initializeDb = async () => {
             locateFile: (file: string) => `/${file}`
         });
 
+        const variant = Constants.expoConfig?.extra?.variant;
+        const manifest = await loadManifest();
+        assetManifest = manifest;
+
+        // Prebuilt database (data_pipeline/build_sqlite_assets.py):
+        // a single binary download instead of inserting every row on cold start.
+        const prebuiltDb = await loadPrebuiltDb(SQL, variant, manifest);
+        if (prebuiltDb) {
+            db = drizzle(prebuiltDb, { schema });
+            return;
+        }
+
         const sqliteDb = new SQL.Database();
 
 
@@ -154,13 +332,84 @@ export const initializeDb = async () => {
                 console.log(`Web: Successfully inserted ${successCount}/${data.length} questions.`);
             };
 
+            // Shared question pool (data_pipeline/build_asset_pool.py): each
+            // pool shard is fetched once, however many views reference it.
+            const poolShards = new Map<number, Promise<Map<string, any>>>();
+            const fetchPoolShard = (index: number) => {
+                if (!poolShards.has(index)) {
+                    poolShards.set(index, (async () => {
+                        const res = await fetch(`/${manifest.groups.pool[index].file}`);
+                        if (!res.ok) throw new Error(`Failed to fetch pool shard ${index}`);
+                        const bodies = new Map<string, any>();
+                        for (const item of await res.json()) {
+                            // Bodies pooled under a content ID (no ID, or a shared
+                            // one) carry it in _pool_key; the rest are keyed by ID.
+                            bodies.set(item._pool_key ?? String(item.id), item);
+                        }
+                        return bodies;
+                    })());
+                }
+                return poolShards.get(index)!;
+            };
+
+            // A view is a list of pool IDs plus per-position field overrides.
+            const fetchView = async (group: string) => {
+                const res = await fetch(`/${manifest.groups[`view_${group}`][0].file}`);
+                if (!res.ok) return null;
+                const view = await res.json();
+                const shards = await Promise.all(view.shards.map(fetchPoolShard));
+                const bodies = new Map<string, any>();
+                for (const shard of shards) shard.forEach((v, k) => bodies.set(k, v));
+                return view.ids.map((key: string, position: number) => {
+                    const record = { ...bodies.get(key) };
+                    delete record._pool_key;
+                    const override = view.overrides[position];
+                    if (override) {
+                        for (const field of override.unset || []) delete record[field];
+                        Object.assign(record, override.set || {});
+                    }
+                    return record;
+                });
+            };
+
+            // The group's pooled view if the manifest has one (and no plain
+            // shards), else null; null on failure too, so callers fall back.
+            const fetchPooledGroup = async (group: string) => {
+                if (manifest?.groups?.[group] || !manifest?.groups?.[`view_${group}`]) return null;
+                try {
+                    return await fetchView(group);
+                } catch (e) {
+                    console.warn(`Web: Failed to load pooled view ${group}`, e);
+                    return null;
+                }
+            };
+
+            // Fetches every shard of a group (byte-budgeted shards from the
+            // manifest, its pooled view, or the legacy single file).
+            const fetchGroup = async (group: string, legacyUrl: string) => {
+                const viewData = await fetchPooledGroup(group);
+                if (viewData) return viewData;
+                const records: any[] = [];
+                let ok = false;
+                for (const url of assetUrls(manifest, group, [legacyUrl])) {
+                    const res = await fetch(url);
+                    if (!res.ok) {
+                        console.warn(`Web: Failed to fetch ${url}`);
+                        continue;
+                    }
+                    const data = await res.json();
+                    for (const item of data) records.push(item);
+                    ok = true;
+                }
+                return ok ? records : null;
+            };
+
             // 1. Load Common Questions (Compact)
             console.log("Web: Fetching web_common.json...");
-            const resCommon = await fetch('/web_common.json?t=' + Date.now());
-            if (resCommon.ok) {
-                const data = await resCommon.json();
-                console.log(`Web: Loaded ${data.length} common questions.`);
-                insertQuestions(data);
+            const commonData = await fetchGroup('common', '/web_common.json');
+            if (commonData) {
+                console.log(`Web: Loaded ${commonData.length} common questions.`);
+                insertQuestions(commonData);
             } else {
                 console.warn("Web: Failed to fetch web_common.json");
             }
@@ -168,19 +417,17 @@ export const initializeDb = async () => {
             // 1.5 Load Daily Mission Pool
             console.log("Web: Fetching web_daily.json...");
             try {
-                const resDaily = await fetch('/web_daily.json?t=' + Date.now());
-                if (resDaily.ok) {
-                    const data = await resDaily.json();
-                    console.log(`Web: Loaded ${data.length} daily pool items.`);
-                    insertQuestions(data);
+                const dailyData = await fetchGroup('daily', '/web_daily.json');
+                if (dailyData) {
+                    console.log(`Web: Loaded ${dailyData.length} daily pool items.`);
+                    insertQuestions(dailyData);
                 }
             } catch (e) { console.warn("Web: Daily load failed", e); }
 
             // 2. Load Cards
             console.log("Web: Fetching web_cards.json...");
-            const resCards = await fetch('/web_cards.json?t=' + Date.now());
-            if (resCards.ok) {
-                const cardData = await resCards.json();
+            const cardData = await fetchGroup('cards', '/web_cards.json');
+            if (cardData) {
                 console.log(`Web: Loaded ${cardData.length} cards.`);
 
                 sqliteDb.run("BEGIN TRANSACTION");
@@ -202,13 +449,11 @@ export const initializeDb = async () => {
             }
 
             // 3. Variant Specific Data
-            const variant = Constants.expoConfig?.extra?.variant;
             if (variant === 'social') {
                 try {
                     console.log("Web: Fetching web_past_social.json...");
-                    const res = await fetch('/web_past_social.json?t=' + Date.now());
-                    if (res.ok) {
-                        const data = await res.json();
+                    const data = await fetchGroup('past_social', '/web_past_social.json');
+                    if (data) {
                         console.log(`Web: Loaded ${data.length} social past questions.`);
                         insertQuestions(data);
                     } else {
@@ -217,9 +462,8 @@ export const initializeDb = async () => {
 
                     // Social Special
                     console.log("Web: Fetching web_spec_social.json...");
-                    const resSpec = await fetch('/web_spec_social_v3.json?t=' + Date.now());
-                    if (resSpec.ok) {
-                        const dataSpec = await resSpec.json();
+                    const dataSpec = await fetchGroup('spec_social_v3', '/web_spec_social_v3.json');
+                    if (dataSpec) {
                         console.log(`Web: Loaded ${dataSpec.length} social special questions.`);
                         insertQuestions(dataSpec);
                     }
@@ -230,10 +474,23 @@ export const initializeDb = async () => {
                 try {
                     // Mental Special (Split Loading)
                     console.log("Web: Fetching mental special chunks...");
+                    // Without a usable view, the chunk loop below loads every shard
+                    const pooledSpec = await fetchPooledGroup('spec_mental');
+                    if (pooledSpec) {
+                        console.log(`Web: Loaded ${pooledSpec.length} mental special questions from the pool.`);
+                        insertQuestions(pooledSpec);
+                    }
+                    // The manifest lists every shard; without it, probe until a 404.
+                    const chunkUrls: string[] | null = manifest?.groups?.spec_mental
+                        ? assetUrls(manifest, 'spec_mental', [])
+                        : null;
                     let chunkIndex = 0;
-                    while (true) {
+                    while (!pooledSpec) {
                         try {
-                            const chunkUrl = `/web_spec_mental_${chunkIndex}.json?t=` + Date.now();
+                            if (chunkUrls && chunkIndex >= chunkUrls.length) break;
+                            const chunkUrl = chunkUrls
+                                ? chunkUrls[chunkIndex]
+                                : `/web_spec_mental_${chunkIndex}.json?t=` + Date.now();
                             const res = await fetch(chunkUrl);
                             if (!res.ok) break; // Stop when 404
 
@@ -242,7 +499,7 @@ export const initializeDb = async () => {
                             insertQuestions(data);
                             chunkIndex++;
 
-                            if (chunkIndex > 20) break; // Safety limit
+                            if (!chunkUrls && chunkIndex > 20) break; // Safety limit
                         } catch (e) {
                             console.warn(`Web: Error loading mental chunk ${chunkIndex}`, e);
                             break;
@@ -252,9 +509,8 @@ export const initializeDb = async () => {
 
                     // Mental Past
                     console.log("Web: Fetching web_past_mental.json...");
-                    const resPast = await fetch('/web_past_mental.json?t=' + Date.now());
-                    if (resPast.ok) {
-                        const dataPast = await resPast.json();
+                    const dataPast = await fetchGroup('past_mental', '/web_past_mental.json');
+                    if (dataPast) {
                         console.log(`Web: Loaded ${dataPast.length} mental past questions.`);
                         insertQuestions(dataPast);
                     }
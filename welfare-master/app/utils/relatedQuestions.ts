@@ -0,0 +1,40 @@
+// Related-question lookup over the precomputed neighbour table
+// (data_pipeline/build_related_questions.py): related_<variant>.json on the
+// web (see manifest.json) and assets/separated_db/related_<variant>.json on native.
+
+export interface RelatedTable {
+    version: number;
+    k: number;
+    ids: string[];
+    neighbors: number[];
+    scores: number[];
+}
+
+export interface RelatedQuestion {
+    id: string;
+    score: number; // cosine similarity * 100
+}
+
+const ordinalCache = new WeakMap<RelatedTable, Map<string, number>>();
+
+const ordinalOf = (table: RelatedTable, id: string): number | undefined => {
+    let ordinals = ordinalCache.get(table);
+    if (!ordinals) {
+        ordinals = new Map(table.ids.map((qid, i) => [qid, i] as [string, number]));
+        ordinalCache.set(table, ordinals);
+    }
+    return ordinals.get(id);
+};
+
+// Most similar questions first; empty when the question is not in the table
+export const relatedQuestions = (table: RelatedTable, id: string, limit = table.k): RelatedQuestion[] => {
+    const ordinal = ordinalOf(table, id);
+    if (ordinal === undefined) return [];
+    const result: RelatedQuestion[] = [];
+    for (let j = 0; j < Math.min(limit, table.k); j++) {
+        const neighbor = table.neighbors[ordinal * table.k + j];
+        if (neighbor < 0) break;
+        result.push({ id: table.ids[neighbor], score: table.scores[ordinal * table.k + j] });
+    }
+    return result;
+};
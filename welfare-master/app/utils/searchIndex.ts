@@ -0,0 +1,106 @@
+// Phrase search over the prebuilt character bigram index
+// (data_pipeline/search_index.py): search_<variant>.json on the web (see
+// manifest.json) and assets/separated_db/search_<variant>.json on native.
+
+export interface SearchIndex {
+    version: number;
+    gram: number;
+    ids: string[];
+    grams: Record<string, string>;
+}
+
+const B64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/';
+const B64_LOOKUP: Record<string, number> = {};
+for (let i = 0; i < B64.length; i++) B64_LOOKUP[B64[i]] = i;
+
+// Same normalization as question_ids.normalize_text (NFKC, no whitespace, lowercase)
+export const normalizeSearchText = (text: string): string =>
+    text.normalize('NFKC').replace(/\s+/g, '').toLowerCase();
+
+const base64Bytes = (encoded: string): number[] => {
+    const bytes: number[] = [];
+    let buffer = 0;
+    let bits = 0;
+    for (const ch of encoded) {
+        if (ch === '=') break;
+        buffer = (buffer << 6) | B64_LOOKUP[ch];
+        bits += 6;
+        if (bits >= 8) {
+            bits -= 8;
+            bytes.push((buffer >> bits) & 0xff);
+        }
+    }
+    return bytes;
+};
+
+// Base64 LEB128 varint deltas -> sorted question ordinals
+export const decodePostings = (encoded: string): number[] => {
+    const ordinals: number[] = [];
+    let value = 0;
+    let shift = 0;
+    let previous = 0;
+    for (const byte of base64Bytes(encoded)) {
+        value += (byte & 0x7f) * 2 ** shift;
+        if (byte & 0x80) {
+            shift += 7;
+            continue;
+        }
+        previous += value;
+        ordinals.push(previous);
+        value = 0;
+        shift = 0;
+    }
+    return ordinals;
+};
+
+// By code point, like search_index.py (slicing UTF-16 units splits non-BMP kanji)
+const queryGrams = (query: string, size: number): string[] => {
+    const chars = Array.from(query);
+    const grams = new Set<string>();
+    for (let i = 0; i + size <= chars.length; i++) grams.add(chars.slice(i, i + size).join(''));
+    return [...grams];
+};
+
+// Candidate question IDs for `query`: every question containing the phrase is
+// included; confirm with a substring match on the question text and options.
+export const searchCandidates = (index: SearchIndex, rawQuery: string): string[] => {
+    const query = normalizeSearchText(rawQuery);
+    if (!query) return [];
+
+    let candidates: number[] | null = null;
+    if (Array.from(query).length < index.gram) {
+        const union = new Set<number>();
+        for (const [gram, encoded] of Object.entries(index.grams)) {
+            if (gram.includes(query)) decodePostings(encoded).forEach((o) => union.add(o));
+        }
+        candidates = [...union].sort((a, b) => a - b);
+    } else {
+        // Rarest grams first keeps the running intersection small
+        const grams = queryGrams(query, index.gram).sort(
+            (a, b) => (index.grams[a]?.length ?? 0) - (index.grams[b]?.length ?? 0)
+        );
+        for (const gram of grams) {
+            const encoded = index.grams[gram];
+            if (encoded === undefined) return [];
+            const ordinals = decodePostings(encoded);
+            if (candidates === null) {
+                candidates = ordinals;
+            } else {
+                const keep = new Set(ordinals);
+                candidates = candidates.filter((o) => keep.has(o));
+            }
+            if (candidates.length === 0) return [];
+        }
+    }
+    return (candidates ?? []).map((o) => index.ids[o]);
+};
+
+export const matchesQuery = (
+    question: { question_text?: string; options?: string[] | string },
+    rawQuery: string
+): boolean => {
+    const query = normalizeSearchText(rawQuery);
+    const options = Array.isArray(question.options) ? question.options : [question.options ?? ''];
+    const text = [question.question_text ?? '', ...options].map(normalizeSearchText).join('\n');
+    return text.includes(query);
+};
@@ -1,7 +1,9 @@
-import json
 import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_pipeline"))
+from corpus_index import CorpusIndex
+
 try:
     path = "app/assets/master_data.json"
     print(f"Checking {path}...")
@@ -9,18 +11,11 @@ try:
         print("File not found")
         sys.exit(1)
 
-    with open(path, "r", encoding="utf-8") as f:
-        print("File opened. Loading JSON...")
-        data = json.load(f)
-        print("JSON loaded.")
-
-    print(f"Total: {len(data)}")
+    # Simple check (indexed; the corpus is only read when it changed)
+    index = CorpusIndex.open(path, fields={"group": ("group_id", "group")})
+    groups = index.group_by("group")
 
-    # Simple check
-    groups = {}
-    for item in data:
-        g = item.get("group_id") or item.get("group")
-        groups[g] = groups.get(g, 0) + 1
+    print(f"Total: {index.total}")
 
     print("Groups found:")
     print(groups)
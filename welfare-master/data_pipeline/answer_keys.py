@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import re
+
+from json_stream import iter_json_array
+
+# Consolidated answer keys for the past exams.
+#
+# Every answer_key_*.json file (question number -> "3" / "1,2") is registered
+# below with its qualification, exam number (回) and provenance, and loaded
+# into one dict keyed by (qualification, exam, question), so joining answers
+# onto a batch of questions is one pass with a dict lookup per question.
+# When several sources cover a question the official one wins; sources that
+# disagree are conflicts.
+#
+#   store = AnswerKeyStore.default()
+#   answers, report = store.join(questions)   # answers[i]: ["1", "2"] or None
+#
+#   python answer_keys.py conflicts
+#   python answer_keys.py report ../app/assets/past_social_complete.json
+#   python answer_keys.py export [--output answer_keys.json]
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPORT_FILE = os.path.join(BASE_DIR, "answer_keys.json")
+
+# qualification -> sort order of reports and exports
+QUALIFICATIONS = {"social": 1, "mental": 2, "care": 3}
+# Lower wins when sources cover the same question
+SOURCE_PRIORITY = {"official": 0, "scraped": 1}
+
+# file -> (qualification, exam number, source)
+ANSWER_KEY_FILES = {
+    "answer_key_social_r3.json": ("social", 34, "scraped"),
+    "answer_key_social_r4.json": ("social", 35, "scraped"),
+    "answer_key_social_r4_official.json": ("social", 35, "official"),
+    "answer_key_social_r5.json": ("social", 36, "scraped"),
+    "answer_key_social_r5_official.json": ("social", 36, "official"),
+    "answer_key_r6.json": ("social", 37, "scraped"),
+    "answer_key_r6_official.json": ("social", 37, "official"),
+    "answer_key_mental_r6.json": ("mental", 27, "scraped"),
+}
+
+_ID_PATTERNS = [
+    (re.compile(r"^ss(\d+)_(\d+)$"), "social"),
+    (re.compile(r"^mental_(\d+)_(\d+)$"), "mental"),
+]
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def key_order(key):
+    qualification, exam, number = key
+    return QUALIFICATIONS[qualification], exam, number
+
+
+def parse_answer(value):
+    """'1,2' / 3 / ['1', '2'] -> ['1', '2']."""
+    if isinstance(value, (list, tuple)):
+        parts = value
+    else:
+        parts = str(value).split(",")
+    return [str(p).strip() for p in parts if str(p).strip()]
+
+
+def _as_int(value):
+    if isinstance(value, int):
+        return value
+    match = _DIGITS_RE.search(str(value or ""))
+    return int(match.group()) if match else None
+
+
+def question_key(record, qualification=None, exam=None):
+    """(qualification, exam, question) key of a question record, or None."""
+    number = _as_int(record.get("question_number") or record.get("number"))
+    record_exam = _as_int(record.get("exam_number"))
+    for pattern, id_qualification in _ID_PATTERNS:
+        match = pattern.match(str(record.get("id") or ""))
+        if match:
+            qualification = qualification or id_qualification
+            record_exam = record_exam or int(match.group(1))
+            number = number or int(match.group(2))
+            break
+    if qualification is None:
+        group = str(record.get("group") or record.get("group_id") or "")
+        qualification = next((name for name in QUALIFICATIONS if name in group), None)
+    exam = exam or record_exam
+    if qualification not in QUALIFICATIONS or not exam or not number:
+        return None
+    return qualification, int(exam), int(number)
+
+
+class JoinReport:
+    """Keys a join could not resolve cleanly, as (qualification, exam, question) tuples."""
+
+    def __init__(self, total, unkeyed, missing, conflicts):
+        self.total = total
+        self.unkeyed = unkeyed  # record positions without a usable key
+        self.missing = missing
+        self.conflicts = conflicts  # key -> {source: answer}
+
+    def summary(self):
+        return (
+            f"{self.total - len(self.unkeyed) - len(self.missing)}/{self.total} answered, "
+            f"{len(self.missing)} missing, {len(self.conflicts)} conflicting, {len(self.unkeyed)} without a key"
+        )
+
+
+class AnswerKeyStore:
+    def __init__(self):
+        self._rows = []  # (key, answer, source, origin)
+        self._entries = None  # key -> (answer, source, origin), built on first use
+
+    @classmethod
+    def default(cls, data_dir=BASE_DIR, files=ANSWER_KEY_FILES):
+        store = cls()
+        for name, (qualification, exam, source) in files.items():
+            path = os.path.join(data_dir, name)
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                store.add(qualification, exam, json.load(f), source, name)
+        return store
+
+    def add(self, qualification, exam, answers, source, origin=None):
+        """Adds question number -> answer pairs for one exam."""
+        if source not in SOURCE_PRIORITY:
+            raise ValueError(f"Unknown answer source: {source}")
+        if qualification not in QUALIFICATIONS:
+            raise ValueError(f"Unknown qualification: {qualification}")
+        for number, answer in answers.items():
+            parsed = parse_answer(answer)
+            if parsed:
+                self._rows.append(((qualification, int(exam), int(number)), parsed, source, origin or source))
+        self._entries = None
+
+    def has_exam(self, qualification, exam, source=None):
+        return any(
+            key[:2] == (qualification, int(exam)) and (source is None or row_source == source)
+            for key, _, row_source, _ in self._rows
+        )
+
+    def _index(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._conflicts = {}
+        # Stable sort: for equal priority the first added row wins
+        for key, answer, source, origin in sorted(self._rows, key=lambda row: SOURCE_PRIORITY[row[2]]):
+            kept = self._entries.get(key)
+            if kept is None:
+                self._entries[key] = (answer, source, origin)
+            elif answer != kept[0]:
+                self._conflicts.setdefault(key, {kept[2]: kept[0]})[origin] = answer
+
+    def __len__(self):
+        self._index()
+        return len(self._entries)
+
+    def conflicts(self):
+        """(qualification, exam, question) -> {origin: answer} for every disagreement."""
+        self._index()
+        return {key: self._conflicts[key] for key in sorted(self._conflicts, key=key_order)}
+
+    def lookup(self, key):
+        """(answer, source, origin) for a (qualification, exam, question) key, or None."""
+        self._index()
+        return self._entries.get(key)
+
+    def join(self, records, qualification=None, exam=None):
+        """(answers, JoinReport): answers[i] is the resolved answer list for records[i], or None."""
+        self._index()
+        answers = []
+        unkeyed = []
+        missing = set()
+        conflicts = set()
+        for i, record in enumerate(records):
+            key = question_key(record, qualification, exam)
+            entry = self._entries.get(key) if key is not None else None
+            answers.append(entry[0] if entry else None)
+            if key is None:
+                unkeyed.append(i)
+            elif entry is None:
+                missing.add(key)
+            elif key in self._conflicts:
+                conflicts.add(key)
+
+        report = JoinReport(
+            total=len(records),
+            unkeyed=unkeyed,
+            missing=sorted(missing, key=key_order),
+            conflicts={key: self._conflicts[key] for key in sorted(conflicts, key=key_order)},
+        )
+        return answers, report
+
+    def source_of(self, qualification, exam, number):
+        entry = self.lookup((qualification, int(exam), int(number)))
+        return entry[1] if entry else None
+
+    def export(self, path=EXPORT_FILE):
+        self._index()
+        entries = []
+        for key in sorted(self._entries, key=key_order):
+            qualification, exam, number = key
+            answer, source, origin = self._entries[key]
+            entries.append(
+                {
+                    "qualification": qualification,
+                    "exam": exam,
+                    "question": number,
+                    "answer": answer,
+                    "source": source,
+                    "origin": origin,
+                }
+            )
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "keys": entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+
+def print_report(report, label=""):
+    print(f"{label}{report.summary()}")
+    for qualification, exam, number in report.missing:
+        print(f"  missing: {qualification} 第{exam}回 問{number}")
+    for (qualification, exam, number), sources in report.conflicts.items():
+        detail = ", ".join(f"{origin}={','.join(answer)}" for origin, answer in sources.items())
+        print(f"  conflict: {qualification} 第{exam}回 問{number}: {detail}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidated past-exam answer keys.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("conflicts", help="List questions whose answer sources disagree")
+    report_parser = sub.add_parser("report", help="Join the keys onto question files and compare")
+    report_parser.add_argument("files", nargs="+")
+    export_parser = sub.add_parser("export", help="Write the resolved keys as one JSON file")
+    export_parser.add_argument("--output", default=EXPORT_FILE)
+    args = parser.parse_args()
+
+    store = AnswerKeyStore.default()
+    if args.command == "conflicts":
+        conflicts = store.conflicts()
+        for (qualification, exam, number), sources in conflicts.items():
+            detail = ", ".join(f"{origin}={','.join(answer)}" for origin, answer in sources.items())
+            print(f"{qualification} 第{exam}回 問{number}: {detail}")
+        print(f"{len(conflicts)} conflicting of {len(store)} keys.")
+    elif args.command == "report":
+        for path in args.files:
+            records = [r for r in iter_json_array(path) if isinstance(r, dict)]
+            answers, report = store.join(records)
+            differs = sum(
+                1
+                for record, answer in zip(records, answers)
+                if answer is not None and parse_answer(record.get("correct_answer") or []) != answer
+            )
+            print_report(report, f"{path}: ")
+            print(f"  {differs} stored answers differ from the key")
+    else:
+        print(f"Exported {store.export(args.output)} keys to {args.output}")
@@ -0,0 +1,244 @@
+import datetime
+import hashlib
+import json
+import os
+
+from asset_sharding import DEFAULT_SHARD_BUDGET, print_shard_stats, shard_records
+from json_stream import COMPACT_SEPARATORS, iter_json_array
+
+# Content-hashed publishing for app/public.
+#
+# Every published shard is written as <base>.<hash>.<ext> (e.g.
+# web_common.3f9a1c2b7d.json) and listed in manifest.json with its byte size,
+# record count and hash. Hashed files never change, so clients can cache them
+# indefinitely and only fetch manifest.json to learn what changed.
+#
+# The legacy un-hashed names (web_common.json, ...) are still written so the
+# existing scripts and already-deployed clients keep working.
+#
+# Lookup tables built per qualification (search_, related_, card_links_<q>)
+# go through publish_table on the web side and write_native_tables for
+# app/assets/separated_db.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PUBLIC_DIR = os.path.join(BASE_DIR, "../app/public")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+HASH_LENGTH = 10
+VIEW_PREFIX = "view_"
+NATIVE_DIR = os.path.join(BASE_DIR, "../app/assets/separated_db")
+
+# Same load order as app/db/client.native.ts seedDatabase (later files win on duplicate IDs)
+NATIVE_BUNDLES = {
+    "social": ["master_social.json", "master_common.json", "master_daily.json"],
+    "mental": ["master_mental.json", "master_common.json", "master_daily.json"],
+    "care": ["master_care.json", "master_common.json", "master_daily.json"],
+}
+
+
+def content_hash(payload):
+    return hashlib.sha256(payload).hexdigest()
+
+
+def dump_records(records):
+    return json.dumps(records, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode("utf-8")
+
+
+def hashed_name(base, digest, ext):
+    return f"{base}.{digest[:HASH_LENGTH]}.{ext}"
+
+
+def is_hashed_name(name):
+    parts = name.rsplit(".", 2)
+    if len(parts) != 3:
+        return False
+    digest = parts[1]
+    return len(digest) == HASH_LENGTH and all(c in "0123456789abcdef" for c in digest)
+
+
+def write_bytes(path, payload):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def write_native_tables(name, build_payload, qualifications=None, native_dir=NATIVE_DIR):
+    """Writes separated_db/<name>_<q>.json for every qualification whose spec bundle exists.
+
+    build_payload(qualification, records) returns the file's bytes; records
+    are the qualification's bundles in load order. Returns {qualification: path}.
+    """
+    written = {}
+    for qualification, bundles in NATIVE_BUNDLES.items():
+        if qualifications is not None and qualification not in qualifications:
+            continue
+        paths = [os.path.join(native_dir, bundle) for bundle in bundles]
+        if not os.path.exists(paths[0]):
+            continue
+        records = [r for path in paths if os.path.exists(path) for r in iter_json_array(path)]
+        payload = build_payload(qualification, records)
+        out_path = os.path.join(native_dir, f"{name}_{qualification}.json")
+        write_bytes(out_path, payload)
+        print(f"Saved {out_path} ({len(payload) / 1024:.0f} KB)")
+        written[qualification] = out_path
+    return written
+
+
+class AssetManifest:
+    """manifest.json in app/public: group name -> list of published shards."""
+
+    def __init__(self, public_dir=PUBLIC_DIR):
+        self.public_dir = public_dir
+        self.path = os.path.join(public_dir, MANIFEST_NAME)
+        self.groups = {}
+        # qualification -> release chain (asset_releases.py)
+        self.releases = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.groups = data.get("groups", {})
+            self.releases = data.get("releases", {})
+
+    def publish_payload(self, base, ext, payload, count, legacy_name=None):
+        """Writes one shard under its content-hash name and returns its manifest entry."""
+        digest = content_hash(payload)
+        name = hashed_name(base, digest, ext)
+        path = os.path.join(self.public_dir, name)
+        if not os.path.exists(path):
+            write_bytes(path, payload)
+        if legacy_name:
+            write_bytes(os.path.join(self.public_dir, legacy_name), payload)
+        return {
+            "file": name,
+            "bytes": len(payload),
+            "count": count,
+            "hash": digest,
+        }
+
+    def publish_group(self, group, shards, legacy_names=None, shard_stats=None):
+        """Publishes a group of JSON record shards, replacing any previous entry for the group."""
+        os.makedirs(self.public_dir, exist_ok=True)
+        entries = []
+        for i, records in enumerate(shards):
+            base = f"web_{group}_{i}" if len(shards) > 1 else f"web_{group}"
+            legacy_name = legacy_names[i] if legacy_names else None
+            entry = self.publish_payload(
+                base, "json", dump_records(records), len(records), legacy_name
+            )
+            if shard_stats:
+                stats = shard_stats[i]
+                entry["gzip_bytes"] = stats["gzip_bytes"]
+                entry["categories"] = stats["categories"]
+                entry["years"] = stats["years"]
+            entries.append(entry)
+            print(f"Saved {entry['file']} ({entry['count']} items, {entry['bytes'] / 1024 / 1024:.2f} MB)")
+        self.groups[group] = entries
+        # A freshly published group supersedes its pooled view (build_asset_pool.py)
+        self.groups.pop(VIEW_PREFIX + group, None)
+        return entries
+
+    def publish_records(
+        self,
+        group,
+        records,
+        legacy_name=None,
+        legacy_shard_pattern=None,
+        budget=DEFAULT_SHARD_BUDGET,
+    ):
+        """Shards records under the compressed-byte budget and publishes them as one group.
+
+        legacy_name writes the whole group to a single un-hashed file;
+        legacy_shard_pattern (e.g. "web_spec_mental_{}.json") writes one
+        un-hashed file per shard instead. Both follow the shard order
+        ((category, year), see asset_sharding), not the input order.
+        """
+        sharded = shard_records(records, budget)
+        shards = [shard for shard, _ in sharded]
+        shard_stats = [stats for _, stats in sharded]
+        print_shard_stats(group, shard_stats)
+
+        legacy_names = None
+        if legacy_shard_pattern:
+            legacy_names = [legacy_shard_pattern.format(i) for i in range(len(shards))]
+        entries = self.publish_group(group, shards, legacy_names, shard_stats)
+        if legacy_shard_pattern:
+            self.remove_legacy_shards(legacy_shard_pattern, len(shards))
+
+        if legacy_name:
+            os.makedirs(self.public_dir, exist_ok=True)
+            ordered = [record for shard in shards for record in shard]
+            write_bytes(os.path.join(self.public_dir, legacy_name), dump_records(ordered))
+        return entries
+
+    def remove_legacy_shards(self, legacy_shard_pattern, count):
+        """Deletes un-hashed shards numbered `count` or higher (left over when a group shrinks).
+
+        Old clients probe web_spec_mental_0.json, _1, ... until a 404, and
+        build_sqlite_assets globs them, so a stale shard would be loaded as data.
+        (emit_assets.py drops the .gz / .br siblings of removed files.)
+        """
+        prefix, suffix = legacy_shard_pattern.split("{}", 1)
+        removed = 0
+        for name in os.listdir(self.public_dir):
+            if name.startswith(prefix) and name.endswith(suffix):
+                index = name[len(prefix) : len(name) - len(suffix)]
+                if index.isdigit() and int(index) >= count:
+                    os.remove(os.path.join(self.public_dir, name))
+                    removed += 1
+        if removed:
+            print(f"Removed {removed} legacy shards beyond {legacy_shard_pattern.format(count - 1)}.")
+        return removed
+
+    def publish_table(self, group, payload, count):
+        """Publishes a per-qualification lookup table (e.g. search_social) as a single-shard group.
+
+        <group>.json is kept as the legacy name.
+        """
+        os.makedirs(self.public_dir, exist_ok=True)
+        entry = self.publish_payload(group, "json", payload, count, f"{group}.json")
+        self.groups[group] = [entry]
+        print(f"Saved {entry['file']} ({entry['bytes'] / 1024:.0f} KB)")
+        return entry
+
+    def publish_file(self, group, source_path, count, legacy_name=None):
+        """Publishes an existing binary file (e.g. a prebuilt .sqlite) as a single-shard group."""
+        os.makedirs(self.public_dir, exist_ok=True)
+        base, ext = os.path.basename(source_path).rsplit(".", 1)
+        with open(source_path, "rb") as f:
+            payload = f.read()
+        entry = self.publish_payload(base, ext, payload, count, legacy_name)
+        self.groups[group] = [entry]
+        print(f"Saved {entry['file']} ({entry['bytes'] / 1024 / 1024:.2f} MB)")
+        return entry
+
+    def files(self):
+        files = {entry["file"] for entries in self.groups.values() for entry in entries}
+        for chain in self.releases.values():
+            files.update(entry["patch"]["file"] for entry in chain if "patch" in entry)
+        return files
+
+    def prune(self):
+        """Removes hashed files that are no longer referenced by the manifest."""
+        referenced = self.files()
+        removed = 0
+        for name in os.listdir(self.public_dir):
+            if name not in referenced and is_hashed_name(name):
+                os.remove(os.path.join(self.public_dir, name))
+                removed += 1
+        if removed:
+            print(f"Pruned {removed} stale hashed assets.")
+        return removed
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "groups": dict(sorted(self.groups.items())),
+        }
+        if self.releases:
+            data["releases"] = dict(sorted(self.releases.items()))
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        write_bytes(self.path, payload)
+        self.prune()
+        print(f"Saved {self.path} ({len(self.groups)} groups)")
@@ -0,0 +1,192 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+
+from asset_manifest import HASH_LENGTH, PUBLIC_DIR, AssetManifest, dump_records
+from question_journal import write_json_atomic
+
+# Delta updates between corpus releases of the prebuilt databases.
+#
+# Every build of db_<qualification>.sqlite is a release, identified by a hash
+# of its rows. The rows of the last release are remembered by ID and content
+# hash in releases/<qualification>.json, so the next build can emit a patch
+# with only the rows that were added, changed or removed:
+#
+#   {"from": "<release>", "to": "<release>",
+#    "questions": {"columns": [...], "upsert": [[...], ...], "delete": ["id", ...]},
+#    "memorization_cards": {...}}
+#
+# manifest.json keeps the last MAX_CHAIN releases per qualification under
+# "releases". A returning web client that still has an older database in its
+# HTTP cache applies the patches after its release instead of downloading the
+# whole database again.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RELEASES_DIR = os.path.join(BASE_DIR, "releases")
+MAX_CHAIN = 10
+
+# Content columns of each table (user state columns are never patched)
+TABLE_COLUMNS = {
+    "questions": [
+        "id",
+        "question_text",
+        "explanation",
+        "options",
+        "correct_answer",
+        "group_id",
+        "year",
+        "category_label",
+        "is_free",
+    ],
+    "memorization_cards": ["id", "term", "definition", "group_id", "category_label"],
+}
+
+
+def read_tables(db_path):
+    """table -> {id: row} for the content columns of a built database."""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {}
+        for table, columns in TABLE_COLUMNS.items():
+            cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table}")
+            tables[table] = {row[0]: list(row) for row in cursor}
+        return tables
+    finally:
+        conn.close()
+
+
+def row_hash(row):
+    payload = json.dumps(row, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=8).hexdigest()
+
+
+def table_index(tables):
+    return {table: {rid: row_hash(row) for rid, row in rows.items()} for table, rows in tables.items()}
+
+
+def release_id(index):
+    payload = json.dumps(index, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+
+
+def diff_tables(previous_index, tables):
+    """Builds the patch body and its (added, changed, removed) counts."""
+    patch = {}
+    added = changed = removed = 0
+    for table, columns in TABLE_COLUMNS.items():
+        old = previous_index.get(table, {})
+        rows = tables[table]
+        upsert = []
+        for rid in sorted(rows):
+            digest = old.get(rid)
+            if digest is None:
+                added += 1
+            elif digest != row_hash(rows[rid]):
+                changed += 1
+            else:
+                continue
+            upsert.append(rows[rid])
+        delete = sorted(rid for rid in old if rid not in rows)
+        removed += len(delete)
+        patch[table] = {"columns": columns, "upsert": upsert, "delete": delete}
+    return patch, (added, changed, removed)
+
+
+def load_state(qualification, releases_dir=RELEASES_DIR):
+    path = os.path.join(releases_dir, f"{qualification}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cut_release(manifest, qualification, db_path, releases_dir=RELEASES_DIR):
+    """Records the database just published as db_<qualification> as a release.
+
+    Emits a patch from the previous release when there is one and appends the
+    release to the manifest chain. Returns the release entry.
+    """
+    tables = read_tables(db_path)
+    index = table_index(tables)
+    rid = release_id(index)
+    db_file = manifest.groups[f"db_{qualification}"][0]["file"]
+    chain = manifest.releases.get(qualification, [])
+
+    if chain and chain[-1]["release"] == rid:
+        # Same rows; the rebuilt file may still differ byte-wise
+        chain[-1]["db"] = db_file
+        print(f"  Release {rid} unchanged for {qualification}.")
+        return chain[-1]
+
+    previous = load_state(qualification, releases_dir)
+    if previous and previous["release"] == rid:
+        previous = None  # manifest was reset; restart the chain here
+    elif previous and (not chain or chain[-1]["release"] != previous["release"]):
+        # releases/ is stale or was reset: a patch from its state would not
+        # apply to the release clients have from this chain
+        head = chain[-1]["release"] if chain else "none"
+        print(
+            f"  Warning: releases/{qualification}.json is at {previous['release']} "
+            f"but the manifest chain head is {head}; no patch for this release."
+        )
+        previous = None
+
+    entry = {
+        "release": rid,
+        "parent": previous["release"] if previous else None,
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "db": db_file,
+        "count": len(tables["questions"]),
+    }
+    if previous:
+        patch, (added, changed, removed) = diff_tables(previous["index"], tables)
+        patch = {"from": previous["release"], "to": rid, **patch}
+        patch_entry = manifest.publish_payload(
+            f"patch_{qualification}_{previous['release']}_{rid}",
+            "json",
+            dump_records(patch),
+            added + changed + removed,
+        )
+        patch_entry.update({"added": added, "changed": changed, "removed": removed})
+        entry["patch"] = patch_entry
+        print(
+            f"  Release {rid} ({qualification}): +{added} ~{changed} -{removed}, "
+            f"patch {patch_entry['bytes'] / 1024:.1f} KB "
+            f"vs db {os.path.getsize(db_path) / 1024 / 1024:.2f} MB"
+        )
+    else:
+        print(f"  Release {rid} ({qualification}): first release, no patch.")
+
+    manifest.releases[qualification] = (chain + [entry])[-MAX_CHAIN:]
+
+    os.makedirs(releases_dir, exist_ok=True)
+    write_json_atomic(
+        {"release": rid, "index": index},
+        os.path.join(releases_dir, f"{qualification}.json"),
+        indent=None,
+    )
+    return entry
+
+
+def print_chain(manifest):
+    for qualification, chain in sorted(manifest.releases.items()):
+        print(f"{qualification}:")
+        for entry in chain:
+            patch = entry.get("patch")
+            delta = (
+                f"+{patch['added']} ~{patch['changed']} -{patch['removed']} "
+                f"({patch['bytes'] / 1024:.1f} KB)"
+                if patch
+                else "full"
+            )
+            print(f"  {entry['release']}  {entry['generated_at'][:19]}  {entry['count']:>6}  {delta}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the release chain in manifest.json.")
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    args = parser.parse_args()
+    print_chain(AssetManifest(args.public_dir))
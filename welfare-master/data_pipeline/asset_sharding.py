@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import zlib
+
+from json_stream import COMPACT_SEPARATORS
+
+# Byte-budgeted sharding for web asset groups.
+#
+# Records are ordered by (category_label, year) and packed into shards whose
+# gzip-compressed size stays under a budget, so shards come out roughly the
+# same size and a category screen only needs the shards listing its category.
+#
+# Tune the budget with:
+#   python asset_sharding.py ../app/public/web_common.json --budget 262144
+
+DEFAULT_SHARD_BUDGET = int(os.environ.get("ASSET_SHARD_BUDGET", 256 * 1024))
+COMPRESS_LEVEL = 6
+
+
+def category_of(record):
+    return record.get("category_label") or record.get("categoryLabel") or ""
+
+
+def year_of(record):
+    return str(record.get("year") or "")
+
+
+def partition_key(record):
+    return (category_of(record), year_of(record))
+
+
+class ShardBuilder:
+    """Accumulates records and tracks the shard's raw and compressed size as it grows."""
+
+    def __init__(self):
+        self.records = []
+        self.payloads = []
+        self.gzip_estimate = 0
+        self.categories = set()
+        self.years = set()
+        self._compressor = zlib.compressobj(COMPRESS_LEVEL)
+
+    def add(self, record, payload):
+        # Sync-flush after each record gives a running (slightly pessimistic)
+        # compressed size without recompressing the whole shard.
+        self.gzip_estimate += len(self._compressor.compress(payload))
+        self.gzip_estimate += len(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.records.append(record)
+        self.payloads.append(payload)
+        self.categories.add(category_of(record))
+        self.years.add(year_of(record))
+
+    def stats(self):
+        # Same bytes dump_records(records) produces; measured exactly once per shard
+        raw = b"[" + b",".join(self.payloads) + b"]"
+        return {
+            "count": len(self.records),
+            "raw_bytes": len(raw),
+            "gzip_bytes": len(zlib.compress(raw, COMPRESS_LEVEL)),
+            "categories": sorted(self.categories),
+            "years": sorted(self.years),
+        }
+
+
+def shard_records(records, budget=DEFAULT_SHARD_BUDGET, key=partition_key):
+    """Splits records into shards under `budget` compressed bytes.
+
+    Records are packed in `key` order. Returns a list of (records, stats)
+    tuples. A single record larger than the budget still gets a shard of its own.
+    """
+    ordered = sorted(records, key=key)
+
+    shards = []
+    current = ShardBuilder()
+    for record in ordered:
+        payload = json.dumps(record, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode("utf-8")
+        # Estimate the next record at ~3x compression before committing it
+        if current.records and current.gzip_estimate + len(payload) // 3 > budget:
+            shards.append(current)
+            current = ShardBuilder()
+        current.add(record, payload)
+    if current.records:
+        shards.append(current)
+
+    return [(shard.records, shard.stats()) for shard in shards]
+
+
+def print_shard_stats(group, shard_stats):
+    print(f"  Shards for '{group}':")
+    print(f"    {'#':>3}{'records':>9}{'raw KB':>10}{'gzip KB':>10}  categories")
+    for i, stats in enumerate(shard_stats):
+        cats = ", ".join(c or "(none)" for c in stats["categories"])
+        if len(cats) > 60:
+            cats = cats[:57] + "..."
+        print(
+            f"    {i:>3}{stats['count']:>9}{stats['raw_bytes'] / 1024:>10.1f}"
+            f"{stats['gzip_bytes'] / 1024:>10.1f}  {cats}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Show how a JSON asset would be sharded under a compressed-byte budget."
+    )
+    parser.add_argument("path", help="JSON array file (e.g. ../app/public/web_common.json)")
+    parser.add_argument(
+        "--budget",
+        type=int,
+        default=DEFAULT_SHARD_BUDGET,
+        help=f"Compressed bytes per shard (default: {DEFAULT_SHARD_BUDGET})",
+    )
+    args = parser.parse_args()
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    sharded = shard_records(data, args.budget)
+    print_shard_stats(os.path.basename(args.path), [stats for _, stats in sharded])
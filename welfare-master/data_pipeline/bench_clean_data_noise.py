@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import random
+import re
+import tempfile
+import time
+
+from clean_data_noise_v2 import CleaningEngine, clean_file
+from json_stream import COMPACT_SEPARATORS
+
+# Noise cleaner cost on synthetic records, plus the rule cases it must get right:
+#   legacy : the old per-rule re.sub passes (cid, page number, junk)
+#   engine : CleaningEngine (one noise pass, page-number pass on trailing digits only)
+#
+# Combination options ("1, 2") end in digits too; the page-number rule has to
+# leave them alone however the whitespace / noise around the comma looks.
+#
+#   python bench_clean_data_noise.py --records 20000 200000
+
+# (field, input, expected)
+CASES = [
+    ("options", "本文 48", "本文"),
+    ("options", "本文　12 ", "本文"),
+    ("options", "本文 4(cid:1)8", "本文"),
+    ("options", "本文 (cid:5) 7", "本文"),
+    ("options", "1, 2", "1, 2"),
+    ("options", "1,  2", "1,  2"),
+    ("options", "1,(cid:3) 2", "1, 2"),
+    ("options", "1、 2", "1、 2"),
+    ("options", "1 2", "1 2"),
+    ("options", "本文 12 34", "本文 12 34"),
+    ("question_text", "記述(cid12719)として適切なもの 3", "記述として適切なもの"),
+    ("explanation", "正答は 3", "正答は 3"),
+    ("explanation", "正答は(cid:42) 3", "正答は 3"),
+]
+
+
+def legacy_clean(text):
+    text = re.sub(r"\(cid:\d+\)", "", text)
+    text = re.sub(r"[\s　]+[0-9]+[\s　]*$", "", text)
+    text = text.replace("(cid12719)", "")
+    return text.strip()
+
+
+def make_texts(n_records, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for i in range(n_records):
+        text = f"問題{i}：社会福祉士の業務に関する記述として、" + "適切なものを一つ選びなさい。" * rng.randint(1, 4)
+        if rng.random() < 0.05:
+            text += "(cid:%d)" % rng.randint(1, 20000)
+        if rng.random() < 0.05:
+            text += " %d" % rng.randint(1, 300)
+        texts.append(text)
+    return texts
+
+
+def check_cases():
+    engine = CleaningEngine()
+    for field, text, expected in CASES:
+        cleaned = engine.clean_text(field, text)
+        assert cleaned == expected, (field, text, cleaned, expected)
+
+
+def check_layout():
+    """Rewritten files keep their layout: indented, default separators or minified."""
+    records = [{"id": "1", "options": ["本文 48", "1, 2"]}]
+    with tempfile.TemporaryDirectory() as tmp:
+        for options in ({"indent": 2}, {}, {"separators": COMPACT_SEPARATORS}):
+            path = os.path.join(tmp, "corpus.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(records, f, ensure_ascii=False, **options)
+            stats = clean_file((path, {}, False))
+            assert stats["written"], stats
+            with open(path, "r", encoding="utf-8") as f:
+                written = f.read()
+            expected = [{"id": "1", "options": ["本文", "1, 2"]}]
+            assert written == json.dumps(expected, ensure_ascii=False, **options), (options, written)
+
+
+def run(texts):
+    start = time.perf_counter()
+    legacy = [legacy_clean(t) for t in texts]
+    legacy_s = time.perf_counter() - start
+
+    engine = CleaningEngine()
+    start = time.perf_counter()
+    cleaned = [engine.clean_text("question_text", t) for t in texts]
+    engine_s = time.perf_counter() - start
+    # The generated texts have no combination options, so both must agree
+    return legacy_s, engine_s, legacy == cleaned
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and check the noise cleaning rules.")
+    parser.add_argument("--records", type=int, nargs="+", default=[20_000, 200_000])
+    args = parser.parse_args()
+
+    check_cases()
+    check_layout()
+    print(f"{len(CASES)} rule cases and file layouts OK")
+    print(f"{'records':>10}{'legacy (s)':>12}{'engine (s)':>12}{'speedup':>9}  same")
+    for n in args.records:
+        legacy_s, engine_s, same = run(make_texts(n))
+        print(f"{n:>10,}{legacy_s:>12.2f}{engine_s:>12.2f}{legacy_s / engine_s:>8.1f}x  {same}")
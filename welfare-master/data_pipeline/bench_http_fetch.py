@@ -0,0 +1,246 @@
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from http_cache import ResponseCache
+from http_fetch import download_all, fetch_all
+
+# http_fetch against a local stand-in for sssc.or.jp / kakomonn.com:
+#   sequential : urllib, one URL at a time, new connection each (the old scrapers)
+#   fetch_all  : http_fetch batch (pooled keep-alive, bounded concurrency)
+#
+# The stand-in adds --latency per request, answers every --flaky-th request
+# with 503 (exercising retries), serves /pdf/<n> as a streamed binary body and
+# tracks the peak number of in-flight requests. It sends ETags and answers
+# matching If-None-Match with 304, for the HTTP cache runs (cold, revalidated,
+# max_age, offline, changed upstream). Bodies, downloads, retries, the
+# per-host limit and the cache are checked, not only timed.
+#
+#   python bench_http_fetch.py --pages 200 --latency 0.05 --concurrency 16
+
+PDF_SIZE = 2 * 1024 * 1024
+
+
+def page_body(n, version=0):
+    revised = f"<dd>改訂 {version}</dd>" if version else ""
+    return f"<html><body><dl><dt>問題 {n}</dt><dd>選択肢</dd>{revised}</dl></body></html>".encode("utf-8")
+
+
+def pdf_body(n):
+    block = hashlib.sha256(str(n).encode()).digest()
+    return (block * (PDF_SIZE // len(block) + 1))[:PDF_SIZE]
+
+
+class StandIn:
+    def __init__(self, latency, flaky_every):
+        self.latency = latency
+        self.flaky_every = flaky_every
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.not_modified = 0
+        self.version = 0
+
+    def handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    count = stand_in.requests
+                    stand_in.connections.add(self.client_address)
+                    stand_in.in_flight += 1
+                    stand_in.peak_in_flight = max(stand_in.peak_in_flight, stand_in.in_flight)
+                try:
+                    time.sleep(stand_in.latency)
+                    if stand_in.flaky_every and count % stand_in.flaky_every == 0:
+                        self.send_response(503)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    kind, _, n = self.path.strip("/").partition("/")
+                    etag = f'"{kind}-{n}-v{stand_in.version}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        with stand_in.lock:
+                            stand_in.not_modified += 1
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.end_headers()
+                        return
+                    body = pdf_body(int(n)) if kind == "pdf" else page_body(int(n), stand_in.version)
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/pdf" if kind == "pdf" else "text/html; charset=utf-8")
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with stand_in.lock:
+                        stand_in.in_flight -= 1
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def serve(stand_in):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in.handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def sequential(urls):
+    bodies = []
+    for url in urls:
+        for attempt in range(4):
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    bodies.append(response.read())
+                    break
+            except OSError:
+                time.sleep(0.05)
+    return bodies
+
+
+def check_cache(stand_in, urls, base, pdfs, options):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(os.path.join(tmp, "http_cache"))
+        cached = {**options, "cache": cache}
+
+        started = time.perf_counter()
+        cold = fetch_all(urls, **cached)
+        cold_time = time.perf_counter() - started
+        assert all(r.ok and r.cached is None for r in cold)
+        assert cache.stats()["entries"] == len(urls)
+
+        # Revalidation: every URL answered 304 and served from the cache
+        stand_in.not_modified = 0
+        started = time.perf_counter()
+        warm = fetch_all(urls, **cached)
+        warm_time = time.perf_counter() - started
+        assert [r.body for r in warm] == [r.body for r in cold]
+        assert all(r.cached == "revalidated" and r.headers.get("ETag") for r in warm)
+        assert stand_in.not_modified == len(urls), stand_in.not_modified
+        print(f"{len(urls)} pages cached: cold {cold_time:.2f} s, revalidated (304) {warm_time:.2f} s")
+
+        # max_age and offline: no request reaches the server
+        before = stand_in.requests
+        started = time.perf_counter()
+        fresh = fetch_all(urls, max_age=3600, **cached)
+        fresh_time = time.perf_counter() - started
+        offline = fetch_all(urls + [f"{base}/page/{len(urls)}"], cache_mode="offline", **cached)
+        assert stand_in.requests == before, stand_in.requests - before
+        assert all(r.cached == "hit" for r in fresh) and [r.body for r in fresh] == [r.body for r in cold]
+        assert [r.body for r in offline[:-1]] == [r.body for r in cold]
+        assert not offline[-1].ok and "offline" in offline[-1].error
+        print(f"{len(urls)} pages within max_age / offline: {fresh_time:.2f} s, 0 requests")
+
+        # Changed upstream: the new ETag misses, the new body replaces the cached one
+        stand_in.version = 1
+        changed = fetch_all(urls[:10], **cached)
+        assert all(r.cached is None for r in changed)
+        assert [r.body for r in changed] == [page_body(n, 1) for n in range(10)]
+        assert cache.read_body(urls[0]) == page_body(0, 1)
+        stand_in.version = 0
+
+        # PDFs: revalidated downloads are copied out of the cache, not re-sent
+        items = [(f"{base}/pdf/{n}", os.path.join(tmp, "pdfs", f"{n}.pdf")) for n in range(pdfs)]
+        assert all(r.cached is None for r in download_all(items, **cached))
+        os.remove(items[0][1])
+        stand_in.not_modified = 0
+        started = time.perf_counter()
+        again = download_all(items, **cached)
+        again_time = time.perf_counter() - started
+        assert all(r.ok and r.cached == "revalidated" for r in again) and stand_in.not_modified == pdfs
+        for n, (_, path) in enumerate(items):
+            with open(path, "rb") as f:
+                assert f.read() == pdf_body(n)
+        print(f"{pdfs} PDFs revalidated (304): {again_time:.2f} s")
+
+        assert cache.purge(host=urlsplit(base).netloc) == len(urls) + pdfs
+        assert cache.stats()["entries"] == 0
+
+
+def run(pages, pdfs, latency, flaky_every, concurrency):
+    options = {"concurrency": concurrency, "per_host": concurrency, "host_interval": 0, "backoff": 0.05}
+
+    stand_in = StandIn(latency, flaky_every)
+    server, base = serve(stand_in)
+    urls = [f"{base}/page/{n}" for n in range(pages)]
+    try:
+        started = time.perf_counter()
+        expected = sequential(urls)
+        seq_time = time.perf_counter() - started
+        seq_connections = len(stand_in.connections)
+
+        stand_in.connections.clear()
+        stand_in.peak_in_flight = 0
+        started = time.perf_counter()
+        results = fetch_all(urls, **options)
+        batch_time = time.perf_counter() - started
+        assert all(r.ok for r in results), [r for r in results if not r.ok][:3]
+        assert [r.body for r in results] == expected == [page_body(n) for n in range(pages)]
+        assert "問題 0" in results[0].text()
+        assert stand_in.peak_in_flight <= concurrency, stand_in.peak_in_flight
+        retried = sum(1 for r in results if r.attempts > 1)
+        print(
+            f"{pages} pages @ {latency * 1000:.0f} ms: sequential {seq_time:.2f} s ({seq_connections} connections), "
+            f"fetch_all {batch_time:.2f} s ({len(stand_in.connections)} connections, "
+            f"peak {stand_in.peak_in_flight} in flight, {retried} retried) -> {seq_time / batch_time:.1f}x"
+        )
+
+        # Politeness: request starts to one host at least host_interval apart
+        interval = 0.02
+        stand_in.peak_in_flight = 0
+        started = time.perf_counter()
+        polite = fetch_all(urls[:50], concurrency=concurrency, per_host=2, host_interval=interval, backoff=0.05)
+        polite_time = time.perf_counter() - started
+        assert all(r.ok for r in polite) and stand_in.peak_in_flight <= 2
+        requests = sum(r.attempts for r in polite)
+        assert polite_time >= (requests - 1) * interval * 0.9, polite_time
+        print(f"50 pages, per_host=2, host_interval={interval}s: {polite_time:.2f} s, peak {stand_in.peak_in_flight} in flight")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            items = [(f"{base}/pdf/{n}", os.path.join(tmp, "no37", f"{n}.pdf")) for n in range(pdfs)]
+            started = time.perf_counter()
+            downloads = download_all(items, **options)
+            download_time = time.perf_counter() - started
+            assert all(r.ok for r in downloads)
+            for n, (_, path) in enumerate(items):
+                with open(path, "rb") as f:
+                    assert f.read() == pdf_body(n)
+            assert not [name for name in os.listdir(os.path.join(tmp, "no37")) if name.endswith(".part")]
+            print(f"{pdfs} x {PDF_SIZE // 1024} KB downloads: {download_time:.2f} s")
+
+        check_cache(stand_in, urls, base, pdfs, options)
+
+        # Unreachable host: fails after retries instead of raising
+        failed = fetch_all(["http://127.0.0.1:9/unreachable"], retries=1, backoff=0.01)
+        assert not failed[0].ok and failed[0].error and failed[0].attempts == 2
+        print("OK")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and check http_fetch against a local stand-in server.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stand-in waits per request")
+    parser.add_argument("--flaky-every", type=int, default=25, help="Every n-th request gets a 503 (0: never)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    run(args.pages, args.pdfs, args.latency, args.flaky_every, args.concurrency)
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from json_stream import JsonArrayWriter, iter_json_array
+
+# Peak memory of a filter/map stage (keep common_* questions, normalize the
+# category label, write the result) on a synthetic corpus:
+#   load   : json.load the whole master, filter, json.dump (the old scripts)
+#   stream : iter_json_array -> JsonArrayWriter
+#
+# Each mode runs in its own process so peak RSS is measured independently.
+
+GROUPS = ["common", "common_social", "spec_social", "spec_mental", "past_social"]
+CATEGORIES = ["高齢者福祉", "児童・家庭福祉", "貧困に対する支援", "保健医療と福祉", "医学概論"]
+
+
+def make_corpus(path, n_records, seed=0):
+    rng = random.Random(seed)
+    with JsonArrayWriter(path) as out:
+        for i in range(n_records):
+            out.write(
+                {
+                    "id": str(i),
+                    "question_text": f"問題{i}：" + "社会福祉士の業務に関する記述として適切なもの" * 3,
+                    "options": [f"選択肢{j}：" + "説明文" * 8 for j in range(5)],
+                    "correct_answer": [str(rng.randint(1, 5))],
+                    "explanation": "解説：" + "制度の趣旨と根拠法令について" * 10,
+                    "group": rng.choice(GROUPS),
+                    "category_label": rng.choice(CATEGORIES),
+                    "year": None,
+                    "is_free": False,
+                }
+            )
+    return out.count
+
+
+def keep(q):
+    return str(q.get("group", "")).startswith("common")
+
+
+def normalize(q):
+    q["category_label"] = (q.get("category_label") or "").strip()
+    return q
+
+
+def run_load(src, dst):
+    with open(src, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    result = [normalize(q) for q in data if keep(q)]
+    with open(dst, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    return len(result)
+
+
+def run_stream(src, dst):
+    with JsonArrayWriter(dst) as out:
+        for q in iter_json_array(src):
+            if keep(q):
+                out.write(normalize(q))
+    return out.count
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def child(mode, src, dst):
+    start = time.perf_counter()
+    count = (run_load if mode == "load" else run_stream)(src, dst)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "count": count, "seconds": elapsed, "peak_mb": peak_rss_mb()}))
+
+
+def main(n_records, keep_corpus):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_json_stream_")
+    src = os.path.join(tmp_dir, "corpus.json")
+    print(f"Generating {n_records:,} synthetic records...")
+    make_corpus(src, n_records)
+    print(f"Corpus: {os.path.getsize(src) / 1024 / 1024:.1f} MB")
+
+    print(f"{'mode':<8}{'kept':>10}{'time (s)':>10}{'peak RSS (MB)':>16}")
+    for mode in ["load", "stream"]:
+        dst = os.path.join(tmp_dir, f"out_{mode}.json")
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, src, dst],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        peak = f"{r['peak_mb']:.0f}" if r["peak_mb"] is not None else "n/a"
+        print(f"{mode:<8}{r['count']:>10,}{r['seconds']:>10.1f}{peak:>16}")
+
+    same = open(os.path.join(tmp_dir, "out_load.json"), "rb").read() == open(
+        os.path.join(tmp_dir, "out_stream.json"), "rb"
+    ).read()
+    print(f"Outputs identical: {same}")
+
+    if not keep_corpus:
+        for name in os.listdir(tmp_dir):
+            os.remove(os.path.join(tmp_dir, name))
+        os.rmdir(tmp_dir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:5])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Peak-memory benchmark for json_stream.")
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--keep-corpus", action="store_true")
+    args = parser.parse_args()
+    main(args.records, args.keep_corpus)
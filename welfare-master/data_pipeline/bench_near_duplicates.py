@@ -0,0 +1,87 @@
+import argparse
+import itertools
+import random
+import time
+
+from near_duplicates import DEFAULT_THRESHOLD, NearDuplicateIndex, jaccard, record_text, shingles
+
+# Near-duplicate detection on synthetic generator-style records:
+#   brute force : exact shingle Jaccard over all pairs (only run for small n)
+#   lsh         : NearDuplicateIndex (MinHash + LSH banding + verification)
+#
+# Every 5th record is a light edit (punctuation / one word) of an earlier one.
+#
+#   python bench_near_duplicates.py --records 2000 15000 50000
+
+STEMS = ["社会福祉", "介護保険", "精神保健", "児童虐待", "生活保護", "地域包括", "権利擁護", "成年後見", "障害者", "医療連携"]
+VERBS = ["に関する記述として", "についての説明のうち", "の仕組みに関して", "の考え方として"]
+ENDINGS = ["正しいものを1つ選びなさい。", "適切なものを2つ選びなさい。", "誤っているものを1つ選びなさい。"]
+
+
+def make_records(n_records, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_records):
+        if i and i % 5 == 0:
+            base = rng.choice(records)
+            text = base["question_text"]
+            edit = rng.randrange(3)
+            if edit == 0:
+                text = text.replace("。", "．")
+            elif edit == 1:
+                text = text.replace("として", "で", 1)
+            else:
+                text = text + "、"
+            records.append({"question_text": text, "options": list(base["options"])})
+            continue
+        words = rng.sample(STEMS, 4)
+        text = f"{words[0]}と{words[1]}（事例{i}）" + rng.choice(VERBS) + rng.choice(ENDINGS)
+        options = [f"{rng.choice(STEMS)}は{rng.choice(STEMS)}の対象となる{rng.randrange(10**6)}。" for _ in range(5)]
+        records.append({"question_text": text, "options": options})
+    return records
+
+
+def brute_force_pairs(records, threshold):
+    sets = [shingles(record_text(r)) for r in records]
+    return {
+        (i, j)
+        for i, j in itertools.combinations(range(len(sets)), 2)
+        if jaccard(sets[i], sets[j]) >= threshold
+    }
+
+
+def run(records, threshold, with_brute_force):
+    start = time.perf_counter()
+    index = NearDuplicateIndex(threshold)
+    for i, record in enumerate(records):
+        index.add(i, record)
+    clusters = index.clusters()
+    lsh_s = time.perf_counter() - start
+
+    recall = None
+    brute_s = None
+    if with_brute_force:
+        start = time.perf_counter()
+        pairs = brute_force_pairs(records, threshold)
+        brute_s = time.perf_counter() - start
+        cluster_of = {key: n for n, members in enumerate(clusters) for key in members}
+        found = sum(1 for i, j in pairs if i in cluster_of and cluster_of.get(i) == cluster_of.get(j))
+        recall = found / len(pairs) if pairs else 1.0
+    return lsh_s, brute_s, recall, index.candidate_pairs, len(clusters)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark near-duplicate detection.")
+    parser.add_argument("--records", type=int, nargs="+", default=[2_000, 15_000, 50_000])
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--brute-force-max", type=int, default=5_000)
+    args = parser.parse_args()
+
+    print(f"{'records':>10}{'lsh (s)':>10}{'brute (s)':>11}{'recall':>8}{'candidates':>12}{'clusters':>10}")
+    for n in args.records:
+        lsh_s, brute_s, recall, candidates, clusters = run(
+            make_records(n), args.threshold, n <= args.brute_force_max
+        )
+        brute = f"{brute_s:>11.2f}" if brute_s is not None else f"{'-':>11}"
+        rec = f"{recall:>8.3f}" if recall is not None else f"{'-':>8}"
+        print(f"{n:>10,}{lsh_s:>10.2f}{brute}{rec}{candidates:>12,}{clusters:>10,}")
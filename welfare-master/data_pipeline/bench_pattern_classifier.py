@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+import time
+
+from prepare_web_assets import SOCIAL_SPEC_KEYWORDS, SW_FOLDER_MAPPING, social_spec_classifier
+
+# Social-spec routing cost on synthetic master records:
+#   legacy     : json.dumps(q) + substring loop over folder codes, then a
+#                linear keyword walk over category_label (the old step 6)
+#   classifier : PatternClassifier (one Aho-Corasick pass over the metadata)
+#
+#   python bench_pattern_classifier.py --records 15000 500000
+
+CATEGORIES = [
+    "SW専1　福祉サービスの組織と経営",
+    "SW専3　児童・家庭福祉",
+    "SW専6　ソーシャルワークの理論と方法(社会専門)",
+    "高齢者に対する支援と介護保険制度",
+    "低所得者に対する支援と生活保護制度",
+    "保健医療サービス",
+    "人体の構造と機能及び疾病",
+    "精神保健福祉の原理",
+    "現代の精神保健の課題と支援",
+    "地域福祉と包括的支援体制",
+    "",
+]
+SOURCES = ["社会福祉士専門/SW専2　高齢者福祉/part1.pdf", "精神保健福祉士/PSW専5.pdf", "共通科目/医学概論.pdf", None]
+
+
+def make_records(n_records, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n_records):
+        record = {
+            "id": str(i),
+            "question_text": f"問題{i}：" + "社会福祉士の業務に関する記述として適切なもの" * 3,
+            "options": [f"選択肢{j}：" + "説明文" * 8 for j in range(5)],
+            "correct_answer": [str(rng.randint(1, 5))],
+            "explanation": "解説：" + "制度の趣旨と根拠法令について" * 10,
+            "group": "spec_social",
+            "category_label": rng.choice(CATEGORIES),
+            "year": None,
+        }
+        source = rng.choice(SOURCES)
+        if source:
+            record["source"] = source
+        records.append(record)
+    return records
+
+
+def legacy_classify(q):
+    q_str = json.dumps(q, ensure_ascii=False)
+    for sw_key, label in SW_FOLDER_MAPPING.items():
+        if sw_key in q_str:
+            return label
+    raw_cat = q.get("category_label", "") or ""
+    for key, unified_label in SOCIAL_SPEC_KEYWORDS:
+        if key in raw_cat:
+            return unified_label
+    return None
+
+
+def run(records):
+    start = time.perf_counter()
+    legacy = [legacy_classify(q) for q in records]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    classifier = social_spec_classifier()
+    compiled = [(classifier.classify(q) or (None, None))[0] for q in records]
+    classifier_s = time.perf_counter() - start
+
+    return legacy_s, classifier_s, legacy == compiled, sum(1 for label in compiled if label)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark social-spec routing.")
+    parser.add_argument("--records", type=int, nargs="+", default=[15_000, 500_000])
+    args = parser.parse_args()
+
+    print(f"{'records':>10}{'legacy (s)':>12}{'automaton (s)':>15}{'speedup':>9}{'matched':>10}  same")
+    for n in args.records:
+        legacy_s, classifier_s, same, matched = run(make_records(n))
+        print(
+            f"{n:>10,}{legacy_s:>12.2f}{classifier_s:>15.2f}"
+            f"{legacy_s / classifier_s:>8.1f}x{matched:>10,}  {same}"
+        )
@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from question_journal import QuestionJournal, write_json_atomic
+
+# Per-chunk save cost of the LLM generators on a synthetic master:
+#   rewrite : write_json_atomic(master + new chunk) after every chunk (the old scripts)
+#   journal : QuestionJournal.append(chunk), one compact() at the end
+#
+# Before timing, checks that a fresh run seeded from another file keeps the
+# seed after compact(), and that a torn last journal line is skipped.
+#
+#   python bench_question_journal.py --records 5000 50000 --chunks 20
+
+
+def make_records(start, n):
+    return [
+        {
+            "id": str(start + i),
+            "question_text": f"問題{start + i}：精神保健福祉士の業務に関する記述として適切なもの",
+            "options": ["選択肢1", "選択肢2", "選択肢3", "選択肢4", "選択肢5"],
+            "correct_answer": "1",
+        }
+        for i in range(n)
+    ]
+
+
+def check_seeded_run():
+    """Seed + journal -> compact keeps every seeded record (generate_mental_large.py)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = QuestionJournal(os.path.join(tmp, "generated.json"))
+        seed = make_records(0, 10)
+        assert journal.seed(seed)
+        assert not journal.seed(make_records(100, 1)), "seed must not overwrite an existing master"
+        journal.append(make_records(10, 5))
+        journal.compact()
+        ids = [r["id"] for r in journal.load_master()]
+        assert ids == [str(i) for i in range(15)], ids
+        assert journal.pending_count() == 0
+
+
+def check_torn_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = QuestionJournal(os.path.join(tmp, "master.json"))
+        journal.append(make_records(0, 2))
+        with open(journal.journal_path, "ab") as f:
+            f.write(b'{"id": "torn", "question')
+        journal.append(make_records(2, 1))
+        assert [r["id"] for r in journal.load_all()] == ["0", "1", "2"]
+
+
+def run(n_records, n_chunks, chunk_size=15):
+    with tempfile.TemporaryDirectory() as tmp:
+        base = make_records(0, n_records)
+        chunks = [make_records(n_records + i * chunk_size, chunk_size) for i in range(n_chunks)]
+
+        rewrite_path = os.path.join(tmp, "rewrite.json")
+        data = list(base)
+        start = time.perf_counter()
+        for chunk in chunks:
+            data.extend(chunk)
+            write_json_atomic(data, rewrite_path)
+        rewrite_s = time.perf_counter() - start
+
+        journal = QuestionJournal(os.path.join(tmp, "journal.json"))
+        journal.seed(base)
+        start = time.perf_counter()
+        for chunk in chunks:
+            journal.append(chunk)
+        append_s = time.perf_counter() - start
+        start = time.perf_counter()
+        journal.compact()
+        compact_s = time.perf_counter() - start
+
+        with open(rewrite_path, "r", encoding="utf-8") as f:
+            same = json.load(f) == journal.load_master()
+    return rewrite_s, append_s, compact_s, same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark and check the generator journal.")
+    parser.add_argument("--records", type=int, nargs="+", default=[5_000, 50_000])
+    parser.add_argument("--chunks", type=int, default=20)
+    args = parser.parse_args()
+
+    check_seeded_run()
+    check_torn_line()
+    print("Seeded run and torn journal line OK")
+    print(f"{'records':>10}{'rewrite (s)':>13}{'append (s)':>12}{'compact (s)':>13}  same")
+    for n in args.records:
+        rewrite_s, append_s, compact_s, same = run(n, args.chunks)
+        print(f"{n:>10,}{rewrite_s:>13.2f}{append_s:>12.3f}{compact_s:>13.2f}  {same}")
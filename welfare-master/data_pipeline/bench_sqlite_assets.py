@@ -0,0 +1,95 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import build_sqlite_assets as builder
+
+# Compares the two cold-start routes on the current corpus:
+#   JSON route     : read every web_*.json, parse, CREATE TABLE, insert row by
+#                    row in batches of 100 (what client.web.ts does today)
+#   Prebuilt route : read db_<qualification>.sqlite and open it in memory
+#                    (what sql.js does with `new SQL.Database(bytes)`)
+
+BATCH_SIZE = 100  # client.web.ts BATCH_SIZE
+
+
+def json_route(question_paths, card_paths):
+    start = time.perf_counter()
+    total_bytes = 0
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(builder.SCHEMA_SQL)
+
+    for path in question_paths:
+        total_bytes += os.path.getsize(path)
+        data = builder.load_json(path)
+        for i in range(0, len(data), BATCH_SIZE):
+            conn.execute("BEGIN")
+            for q in data[i : i + BATCH_SIZE]:
+                conn.execute(builder.INSERT_QUESTION_SQL, builder.question_row(q))
+            conn.execute("COMMIT")
+
+    for path in card_paths:
+        total_bytes += os.path.getsize(path)
+        conn.execute("BEGIN")
+        for c in builder.load_json(path):
+            conn.execute(builder.INSERT_CARD_SQL, builder.card_row(c))
+        conn.execute("COMMIT")
+
+    count = conn.execute("SELECT count(*) FROM questions").fetchone()[0]
+    conn.close()
+    return time.perf_counter() - start, total_bytes, count
+
+
+def prebuilt_route(db_path):
+    start = time.perf_counter()
+    with open(db_path, "rb") as f:
+        payload = f.read()
+
+    conn = sqlite3.connect(":memory:")
+    conn.deserialize(payload)
+    count = conn.execute("SELECT count(*) FROM questions").fetchone()[0]
+    conn.close()
+    return time.perf_counter() - start, len(payload), count
+
+
+def best_of(runs, fn, *args):
+    results = [fn(*args) for _ in range(runs)]
+    return min(results, key=lambda r: r[0])
+
+
+def main(qualifications, runs):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'qualification':<14}{'route':<10}{'files':>6}{'bytes':>14}{'rows':>8}{'time (ms)':>12}")
+        print("-" * 64)
+        for qualification in qualifications:
+            question_paths, card_paths = builder.asset_plan(qualification)
+            db_path = os.path.join(tmp_dir, f"db_{qualification}.sqlite")
+            builder.build_database(db_path, question_paths, card_paths)
+
+            j_time, j_bytes, j_rows = best_of(runs, json_route, question_paths, card_paths)
+            p_time, p_bytes, p_rows = best_of(runs, prebuilt_route, db_path)
+
+            n_files = len(question_paths) + len(card_paths)
+            print(f"{qualification:<14}{'json':<10}{n_files:>6}{j_bytes:>14,}{j_rows:>8}{j_time * 1000:>12.1f}")
+            print(f"{'':<14}{'prebuilt':<10}{1:>6}{p_bytes:>14,}{p_rows:>8}{p_time * 1000:>12.1f}")
+            print(f"{'':<14}speedup x{j_time / p_time:.1f}")
+            print("-" * 64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark JSON-to-INSERT loading against prebuilt SQLite files."
+    )
+    parser.add_argument(
+        "--qualification",
+        choices=sorted(builder.QUALIFICATION_ASSETS),
+        action="append",
+        help="Qualification to benchmark (repeatable, default: all)",
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Best-of N runs (default: 3)")
+    args = parser.parse_args()
+
+    main(args.qualification or sorted(builder.QUALIFICATION_ASSETS), args.runs)
@@ -0,0 +1,304 @@
+import argparse
+import json
+import os
+
+from asset_manifest import PUBLIC_DIR, VIEW_PREFIX, AssetManifest, dump_records
+from asset_sharding import DEFAULT_SHARD_BUDGET, print_shard_stats, shard_records
+from question_ids import content_id, content_key
+
+# Reference-based packaging of the web asset groups.
+#
+# The same question is published in several groups (every web_common record
+# is also in web_daily, common questions ship with every qualification, ...).
+# This stage stores each question body once in a shared, byte-budgeted pool
+# and turns every group into a compact view: a list of question IDs, the pool
+# shards it needs, and per-position overrides for the few fields that differ
+# from the pooled body (e.g. `source_tag`). A record whose ID is already used
+# by a different question is pooled under its content ID (POOL_KEY).
+#
+# Explanations are only needed after an answer is submitted, so they are moved
+# out of the pool into small side shards keyed by question ID (sorted, with the
+# first/last ID of each shard in the manifest). The client loads them on demand.
+# An ID whose records disagree on the explanation keeps it inline.
+#
+# Run after prepare_web_assets.py / update_native_assets.py. The per-group
+# legacy files (web_common.json, ...) are untouched; `export` rebuilds them
+# from the pool for deployments that only ship pool + views.
+
+POOL_GROUP = "pool"
+EXPLANATION_GROUP = "explanations"
+# Smaller than the pool budget: a shard is fetched to show one explanation
+EXPLANATION_SHARD_BUDGET = 32 * 1024
+# Set on the few pooled bodies whose ID is shared with a different question,
+# and on bodies without an ID (the web client can't derive a content ID)
+POOL_KEY = "_pool_key"
+# Question record groups published by prepare_web_assets.py and
+# update_native_assets.py. Everything else in the manifest (cards, db_*,
+# search_*, related_*, card_links_*, ...) is not question records and is
+# left alone; a new question group has to be added here to be pooled.
+QUESTION_GROUPS = {
+    "common",
+    "daily",
+    "past_mental",
+    "past_social",
+    "spec_mental",
+    "spec_social",
+    "spec_social_v3",
+}
+_MISSING = object()
+
+
+def record_key(record):
+    if POOL_KEY in record:
+        return record[POOL_KEY]
+    rid = record.get("id")
+    return str(rid) if rid is not None else content_id(record)
+
+
+def is_source_group(group):
+    return group in QUESTION_GROUPS
+
+
+class QuestionPool:
+    """Question bodies stored once by ID, plus named views referencing them."""
+
+    def __init__(self):
+        self.records = {}
+        self.views = {}
+
+    def _pooled(self, record):
+        key = record_key(record)
+        base = self.records.get(key)
+        if base is not None and content_key(base) != content_key(record):
+            # Same ID, different question: pool it under its content ID instead
+            key = content_id(record)
+            base = self.records.get(key)
+            if base is None:
+                base = self.records[key] = dict(record, **{POOL_KEY: key})
+        elif base is None:
+            if record.get("id") is None:
+                base = self.records[key] = dict(record, **{POOL_KEY: key})
+            else:
+                base = self.records[key] = record
+        return key, base
+
+    def add_view(self, name, records):
+        ids = []
+        overrides = {}
+        for position, record in enumerate(records):
+            key, base = self._pooled(record)
+            ids.append(key)
+            if base is record:
+                continue
+            changed = {k: v for k, v in record.items() if base.get(k, _MISSING) != v}
+            removed = [k for k in base if k not in record and k != POOL_KEY]
+            if changed or removed:
+                override = {}
+                if changed:
+                    override["set"] = changed
+                if removed:
+                    override["unset"] = removed
+                overrides[str(position)] = override
+        self.views[name] = {"ids": ids, "overrides": overrides}
+        return self.views[name]
+
+
+def expand_view(pool_records, view):
+    """Rebuilds a group's records from the pool (exact inverse of add_view)."""
+    records = []
+    overrides = view.get("overrides", {})
+    for position, key in enumerate(view["ids"]):
+        record = dict(pool_records[key])
+        record.pop(POOL_KEY, None)
+        override = overrides.get(str(position))
+        if override:
+            for field in override.get("unset", []):
+                record.pop(field, None)
+            record.update(override.get("set", {}))
+        records.append(record)
+    return records
+
+
+def explanation_index(groups_records):
+    """ID -> explanation, for IDs whose records all carry the same non-empty text."""
+    explanations = {}
+    inline = set()
+    for records in groups_records:
+        for record in records:
+            rid = record.get("id")
+            if rid is None:
+                continue
+            rid = str(rid)
+            text = record.get("explanation")
+            if not isinstance(text, str) or not text:
+                inline.add(rid)
+            elif explanations.setdefault(rid, text) != text:
+                inline.add(rid)
+    return {rid: text for rid, text in explanations.items() if rid not in inline}
+
+
+def detach_explanation(record, explanations):
+    rid = record.get("id")
+    if rid is not None and str(rid) in explanations:
+        return {k: v for k, v in record.items() if k != "explanation"}
+    return record
+
+
+def attach_explanation(record, explanations):
+    rid = record.get("id")
+    if "explanation" not in record and rid is not None and str(rid) in explanations:
+        record["explanation"] = explanations[str(rid)]
+    return record
+
+
+def load_group(manifest, group):
+    records = []
+    for entry in manifest.groups[group]:
+        with open(os.path.join(manifest.public_dir, entry["file"]), "r", encoding="utf-8") as f:
+            records.extend(json.load(f))
+    return records
+
+
+def load_pool(manifest):
+    pool_records = {}
+    for record in load_group(manifest, POOL_GROUP):
+        pool_records[record_key(record)] = record
+    return pool_records
+
+
+def load_explanations(manifest):
+    return {
+        record["id"]: record["explanation"]
+        for record in (load_group(manifest, EXPLANATION_GROUP) if EXPLANATION_GROUP in manifest.groups else [])
+    }
+
+
+def load_view(manifest, group):
+    with open(os.path.join(manifest.public_dir, manifest.groups[group][0]["file"]), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_sources(manifest):
+    """Records of every group: freshly published groups, else the existing pooled view."""
+    sources = {}
+    for group in manifest.groups:
+        if is_source_group(group):
+            sources[group] = load_group(manifest, group)
+
+    stale_views = [
+        g[len(VIEW_PREFIX):] for g in manifest.groups
+        if g.startswith(VIEW_PREFIX) and g[len(VIEW_PREFIX):] not in sources
+    ]
+    if stale_views:
+        pool_records = load_pool(manifest)
+        explanations = load_explanations(manifest)
+        for group in stale_views:
+            records = expand_view(pool_records, load_view(manifest, VIEW_PREFIX + group))
+            sources[group] = [attach_explanation(r, explanations) for r in records]
+    return sources
+
+
+def build(public_dir=PUBLIC_DIR, budget=DEFAULT_SHARD_BUDGET):
+    manifest = AssetManifest(public_dir)
+    source_records = load_sources(manifest)
+    groups = sorted(source_records)
+    if not groups:
+        print("No per-group assets in the manifest; run prepare_web_assets.py first.")
+        return
+
+    explanations = explanation_index(source_records[g] for g in groups)
+    pool = QuestionPool()
+    source_bytes = 0
+    for group in groups:
+        source_bytes += len(dump_records(source_records[group]))
+        pool.add_view(group, [detach_explanation(r, explanations) for r in source_records[group]])
+
+    # Explanation side shards, in ID order so the client can find one by range
+    sharded = shard_records(
+        [{"id": rid, "explanation": text} for rid, text in explanations.items()],
+        EXPLANATION_SHARD_BUDGET,
+        key=lambda r: r["id"],
+    )
+    entries = manifest.publish_group(EXPLANATION_GROUP, [shard for shard, _ in sharded])
+    for entry, (shard, _) in zip(entries, sharded):
+        entry["first"] = shard[0]["id"]
+        entry["last"] = shard[-1]["id"]
+
+    # Pool shards (byte-budgeted, grouped by category/year like every group)
+    sharded = shard_records(list(pool.records.values()), budget)
+    print_shard_stats(POOL_GROUP, [stats for _, stats in sharded])
+    manifest.publish_group(
+        POOL_GROUP,
+        [shard for shard, _ in sharded],
+        shard_stats=[stats for _, stats in sharded],
+    )
+    shard_of = {}
+    for index, (shard, _) in enumerate(sharded):
+        for record in shard:
+            shard_of[record_key(record)] = index
+
+    # Views replace the per-group shards in the manifest
+    pool_records = pool.records
+    for group in groups:
+        view = pool.views[group]
+        view["shards"] = sorted({shard_of[key] for key in view["ids"]})
+        records = [attach_explanation(r, explanations) for r in expand_view(pool_records, view)]
+        if records != source_records[group]:
+            raise RuntimeError(f"View '{group}' does not round-trip through the pool")
+
+        entry = manifest.publish_payload(
+            f"web_{VIEW_PREFIX}{group}", "json", dump_records(view), len(view["ids"])
+        )
+        manifest.groups.pop(group, None)
+        manifest.groups[VIEW_PREFIX + group] = [entry]
+        print(f"Saved {entry['file']} ({entry['count']} ids, {len(view['overrides'])} overrides)")
+
+    pool_bytes = sum(entry["bytes"] for entry in manifest.groups[POOL_GROUP])
+    view_bytes = sum(manifest.groups[VIEW_PREFIX + g][0]["bytes"] for g in groups)
+    explanation_bytes = sum(entry["bytes"] for entry in manifest.groups[EXPLANATION_GROUP])
+    total = pool_bytes + view_bytes
+    print(f"Per-group assets: {source_bytes / 1024 / 1024:.2f} MB")
+    print(
+        f"Pool + views:     {total / 1024 / 1024:.2f} MB "
+        f"(pool {pool_bytes / 1024 / 1024:.2f} MB, views {view_bytes / 1024:.1f} KB, "
+        f"{100 * total / source_bytes:.0f}% of per-group)"
+    )
+    print(
+        f"Explanations:     {explanation_bytes / 1024 / 1024:.2f} MB on demand "
+        f"({len(explanations)} questions, {len(entries)} shards)"
+    )
+    manifest.save()
+
+
+def export(public_dir=PUBLIC_DIR, output_dir=None):
+    """Compatibility export: writes web_<group>.json for every view."""
+    manifest = AssetManifest(public_dir)
+    output_dir = output_dir or public_dir
+    os.makedirs(output_dir, exist_ok=True)
+    pool_records = load_pool(manifest)
+    explanations = load_explanations(manifest)
+    for group in sorted(manifest.groups):
+        if not group.startswith(VIEW_PREFIX):
+            continue
+        records = expand_view(pool_records, load_view(manifest, group))
+        records = [attach_explanation(r, explanations) for r in records]
+        path = os.path.join(output_dir, f"web_{group[len(VIEW_PREFIX):]}.json")
+        with open(path, "wb") as f:
+            f.write(dump_records(records))
+        print(f"Exported {path} ({len(records)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Package web asset groups as a shared question pool plus ID views."
+    )
+    parser.add_argument("command", nargs="?", default="build", choices=["build", "export"])
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--output-dir", help="export: where to write web_<group>.json")
+    parser.add_argument("--budget", type=int, default=DEFAULT_SHARD_BUDGET)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build(args.public_dir, args.budget)
+    else:
+        export(args.public_dir, args.output_dir)
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import re
+import time
+
+from asset_manifest import NATIVE_DIR, AssetManifest, write_native_tables
+from build_sqlite_assets import PUBLIC_DIR, QUALIFICATION_ASSETS, asset_plan, load_json
+from json_stream import iter_json_array
+from pattern_classifier import AhoCorasick
+from question_ids import normalize_text
+from search_index import unique_questions
+
+# Flashcard term -> practice question cross-reference, one table per qualification.
+#
+# Every card term (plus its parts around a parenthetical reading, e.g.
+# "ADL（日常生活動作）" -> "adl", "日常生活動作") is compiled into one
+# Aho-Corasick automaton, and each question field (text, options,
+# explanation) is scanned once after normalize_text, so the cost is linear
+# in the corpus no matter how many cards there are.
+#
+#   {"version": 1, "ids": ["q1", ...], "cards": {"wam_1": [[0, 7], [3]], ...}}
+#
+# Each card maps to two sorted lists of question ordinals: questions whose
+# text or options contain the term, then questions that only mention it in
+# the explanation. Published as card_links_<q> (web, manifest.json) and
+# written as separated_db/card_links_<q>.json (native).
+#
+#   python build_card_links.py [--qualification social]
+
+FORMAT_VERSION = 1
+# Shorter terms (and aliases) match everywhere and link nothing useful
+MIN_TERM_LENGTH = 2
+NATIVE_CARDS = os.path.join(NATIVE_DIR, "..", "flashcards.json")
+
+_READING_RE = re.compile(r"[（(]([^）)]*)[）)]")
+
+
+def term_aliases(term):
+    """Normalized spellings of a card term that count as a mention."""
+    aliases = {normalize_text(term)}
+    base = _READING_RE.sub("", term)
+    aliases.add(normalize_text(base))
+    for inner in _READING_RE.findall(term):
+        aliases.add(normalize_text(inner))
+    return {a for a in aliases if len(a) >= MIN_TERM_LENGTH}
+
+
+def card_matcher(cards):
+    """(automaton, pattern index -> card IDs)."""
+    patterns = {}
+    for card in cards:
+        if not isinstance(card, dict) or card.get("id") is None:
+            continue
+        for alias in term_aliases(card.get("term") or ""):
+            patterns.setdefault(alias, []).append(str(card["id"]))
+    names = list(patterns)
+    return AhoCorasick(names), [patterns[name] for name in names]
+
+
+def question_fields(record):
+    """(in_question, explanation) normalized texts."""
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [options]
+    question = record.get("question_text") or record.get("questionText") or ""
+    in_question = "\n".join(normalize_text(t) for t in [question] + list(options))
+    return in_question, normalize_text(record.get("explanation") or "")
+
+
+def build_links(cards, records):
+    started = time.perf_counter()
+    automaton, pattern_cards = card_matcher(cards)
+    by_id = unique_questions(records)
+
+    direct = {}
+    explained = {}
+    for ordinal, record in enumerate(by_id.values()):
+        in_question, explanation = question_fields(record)
+        hits = set()
+        for index in automaton.matched(in_question):
+            for card_id in pattern_cards[index]:
+                if card_id not in hits:
+                    hits.add(card_id)
+                    direct.setdefault(card_id, []).append(ordinal)
+        for index in automaton.matched(explanation):
+            for card_id in pattern_cards[index]:
+                if card_id not in hits:
+                    hits.add(card_id)
+                    explained.setdefault(card_id, []).append(ordinal)
+
+    links = {
+        card_id: [direct.get(card_id, []), explained.get(card_id, [])]
+        for card_id in sorted(set(direct) | set(explained))
+    }
+    n_cards = sum(1 for c in cards if isinstance(c, dict) and c.get("id") is not None)
+    print(
+        f"  {len(links)}/{n_cards} cards linked to {len(by_id)} questions "
+        f"({sum(len(a) + len(b) for a, b in links.values())} links, {time.perf_counter() - started:.1f} s)"
+    )
+    return {"version": FORMAT_VERSION, "ids": list(by_id), "cards": links}
+
+
+def dump_links(table):
+    return json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_web(qualifications, public_dir=PUBLIC_DIR, output_dir=PUBLIC_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = AssetManifest(output_dir)
+    for qualification in qualifications:
+        print(f"Building card_links_{qualification}...")
+        question_paths, card_paths = asset_plan(qualification, public_dir)
+        cards = [c for p in card_paths for c in load_json(p)]
+        table = build_links(cards, (q for p in question_paths for q in load_json(p)))
+        manifest.publish_table(f"card_links_{qualification}", dump_links(table), len(table["cards"]))
+    manifest.save()
+
+
+def build_native(qualifications, native_dir=NATIVE_DIR, cards_path=NATIVE_CARDS):
+    if not os.path.exists(cards_path):
+        print(f"{cards_path} not found, skipping native card links.")
+        return
+    cards = list(iter_json_array(cards_path))
+
+    def build_payload(qualification, records):
+        print(f"Building native card_links_{qualification}...")
+        return dump_links(build_links(cards, records))
+
+    write_native_tables("card_links", build_payload, qualifications, native_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Link flashcard terms to the questions that mention them.")
+    parser.add_argument("target", nargs="?", default="all", choices=["all", "web", "native"])
+    parser.add_argument(
+        "--qualification",
+        choices=sorted(QUALIFICATION_ASSETS),
+        action="append",
+        help="Qualification to build (repeatable, default: all)",
+    )
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--output-dir", default=PUBLIC_DIR)
+    parser.add_argument("--native-dir", default=NATIVE_DIR)
+    args = parser.parse_args()
+
+    qualifications = args.qualification or sorted(QUALIFICATION_ASSETS)
+    if args.target in ("all", "web"):
+        build_web(qualifications, args.public_dir, args.output_dir)
+    if args.target in ("all", "native"):
+        build_native(qualifications, args.native_dir)
@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import scipy.sparse as sp
+
+from asset_manifest import NATIVE_DIR, AssetManifest, write_native_tables
+from build_sqlite_assets import PUBLIC_DIR, QUALIFICATION_ASSETS, asset_plan, load_json
+from question_ids import normalize_text
+from search_index import unique_questions
+
+# Precomputed "related questions" per qualification.
+#
+# Every question (text + options + explanation) is vectorized as TF-IDF over
+# character 2-3-grams (sublinear tf, smoothed idf, L2-normalized rows) in a
+# SciPy CSR matrix. Cosine neighbours are computed in row blocks
+# (X[block] @ X.T, top-k by argpartition), spread over a process pool, so
+# memory stays at one dense block per worker.
+#
+# The table is published as related_<q> (web, manifest.json) and written as
+# separated_db/related_<q>.json (native):
+#
+#   {"version": 1, "k": 8, "ids": [...], "neighbors": [o, ...], "scores": [s, ...]}
+#
+# neighbors / scores are flat, k entries per question ordinal (-1 / 0 pad);
+# scores are cosine * 100. Near-identical copies (>= DUPLICATE_SCORE) are
+# skipped: they are the same question, not a related one.
+#
+#   python build_related_questions.py [--qualification social] [--jobs 4]
+
+FORMAT_VERSION = 1
+NGRAM_RANGE = (2, 3)
+DEFAULT_K = 8
+MIN_SCORE = 0.15
+DUPLICATE_SCORE = 0.95
+# Grams in more than this share of questions carry no signal
+MAX_DF_RATIO = 0.5
+BLOCK_SIZE = 512
+
+_matrix = None
+
+
+def question_document(record):
+    question = record.get("question_text") or record.get("questionText") or ""
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [options]
+    parts = [question] + list(options) + [record.get("explanation") or ""]
+    return "\n".join(normalize_text(p) for p in parts)
+
+
+def char_ngrams(text, ngram_range=NGRAM_RANGE):
+    counts = {}
+    low, high = ngram_range
+    for size in range(low, high + 1):
+        for i in range(len(text) - size + 1):
+            gram = text[i : i + size]
+            if "\n" not in gram:
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def tfidf_matrix(documents):
+    """L2-normalized TF-IDF CSR matrix (documents x grams)."""
+    doc_counts = [char_ngrams(doc) for doc in documents]
+    df = {}
+    for counts in doc_counts:
+        for gram in counts:
+            df[gram] = df.get(gram, 0) + 1
+
+    n_docs = len(documents)
+    max_df = MAX_DF_RATIO * n_docs
+    # Grams seen once can never link two questions
+    vocabulary = {}
+    idf = []
+    for gram, n in df.items():
+        if 1 < n <= max_df:
+            vocabulary[gram] = len(idf)
+            idf.append(math.log((1 + n_docs) / (1 + n)) + 1)
+
+    indptr = [0]
+    indices = []
+    data = []
+    for counts in doc_counts:
+        for gram, tf in counts.items():
+            column = vocabulary.get(gram)
+            if column is not None:
+                indices.append(column)
+                data.append((1 + math.log(tf)) * idf[column])
+        indptr.append(len(indices))
+
+    matrix = sp.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(n_docs, len(vocabulary)),
+    )
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1
+    return sp.diags(1 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def _init_worker(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+def _block_neighbors(args):
+    start, stop, k = args
+    matrix = _matrix
+    scores = (matrix[start:stop] @ matrix.T).toarray()
+    rows = np.arange(stop - start)
+    scores[rows, rows + start] = 0
+    scores[scores >= DUPLICATE_SCORE] = 0
+    scores[scores < MIN_SCORE] = 0
+
+    k_eff = min(k, scores.shape[1] - 1)
+    top = np.argpartition(-scores, k_eff, axis=1)[:, :k_eff] if k_eff > 0 else np.zeros((len(rows), 0), dtype=int)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    neighbors = np.full((len(rows), k), -1, dtype=np.int64)
+    percent = np.zeros((len(rows), k), dtype=np.int64)
+    neighbors[:, :k_eff] = np.where(top_scores > 0, top, -1)
+    percent[:, :k_eff] = np.rint(top_scores * 100)
+    return start, neighbors, percent
+
+
+def nearest_neighbors(matrix, k=DEFAULT_K, jobs=1, block_size=BLOCK_SIZE):
+    """(neighbors, scores) arrays of shape (n, k), best first."""
+    n = matrix.shape[0]
+    neighbors = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.int64)
+    blocks = [(start, min(start + block_size, n), k) for start in range(0, n, block_size)]
+    if jobs > 1:
+        with Pool(jobs, initializer=_init_worker, initargs=(matrix,)) as pool:
+            results = pool.imap_unordered(_block_neighbors, blocks)
+            for start, block_neighbors, block_scores in results:
+                neighbors[start : start + len(block_neighbors)] = block_neighbors
+                scores[start : start + len(block_scores)] = block_scores
+    else:
+        _init_worker(matrix)
+        for block in blocks:
+            start, block_neighbors, block_scores = _block_neighbors(block)
+            neighbors[start : start + len(block_neighbors)] = block_neighbors
+            scores[start : start + len(block_scores)] = block_scores
+    return neighbors, scores
+
+
+def build_table(records, k=DEFAULT_K, jobs=1):
+    by_id = unique_questions(records)
+    started = time.perf_counter()
+    matrix = tfidf_matrix([question_document(r) for r in by_id.values()])
+    vectorized = time.perf_counter()
+    neighbors, scores = nearest_neighbors(matrix, k, jobs)
+    print(
+        f"  {len(by_id)} questions, {matrix.shape[1]} grams: vectorize {vectorized - started:.1f} s, "
+        f"neighbours {time.perf_counter() - vectorized:.1f} s ({jobs} jobs)"
+    )
+    return {
+        "version": FORMAT_VERSION,
+        "k": k,
+        "ids": list(by_id),
+        "neighbors": neighbors.ravel().tolist(),
+        "scores": scores.ravel().tolist(),
+    }
+
+
+def dump_table(table):
+    return json.dumps(table, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def build_web(qualifications, k, jobs, public_dir=PUBLIC_DIR, output_dir=PUBLIC_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = AssetManifest(output_dir)
+    for qualification in qualifications:
+        print(f"Building related_{qualification}...")
+        question_paths, _ = asset_plan(qualification, public_dir)
+        table = build_table((q for p in question_paths for q in load_json(p)), k, jobs)
+        manifest.publish_table(f"related_{qualification}", dump_table(table), len(table["ids"]))
+    manifest.save()
+
+
+def build_native(qualifications, k, jobs, native_dir=NATIVE_DIR):
+    def build_payload(qualification, records):
+        print(f"Building native related_{qualification}...")
+        return dump_table(build_table(records, k, jobs))
+
+    write_native_tables("related", build_payload, qualifications, native_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute related-question neighbour tables.")
+    parser.add_argument("target", nargs="?", default="all", choices=["all", "web", "native"])
+    parser.add_argument(
+        "--qualification",
+        choices=sorted(QUALIFICATION_ASSETS),
+        action="append",
+        help="Qualification to build (repeatable, default: all)",
+    )
+    parser.add_argument("-k", type=int, default=DEFAULT_K, help="Neighbours per question")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--output-dir", default=PUBLIC_DIR)
+    parser.add_argument("--native-dir", default=NATIVE_DIR)
+    args = parser.parse_args()
+
+    qualifications = args.qualification or sorted(QUALIFICATION_ASSETS)
+    if args.target in ("all", "web"):
+        build_web(qualifications, args.k, args.jobs, args.public_dir, args.output_dir)
+    if args.target in ("all", "native"):
+        build_native(qualifications, args.k, args.jobs, args.native_dir)
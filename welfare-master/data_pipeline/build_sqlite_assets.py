@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import sqlite3
+
+from asset_manifest import AssetManifest
+from asset_releases import RELEASES_DIR, cut_release
+from search_index import publish_search_index
+
+# Builds ready-to-open SQLite databases (one per qualification) from the web
+# JSON assets, so the app can download a single binary file instead of
+# inserting tens of thousands of rows into sql.js on every cold start.
+#
+# Run after prepare_web_assets.py / update_native_assets.py.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PUBLIC_DIR = os.path.join(BASE_DIR, "../app/public")
+
+# Same load order as app/db/client.web.ts (later files win on duplicate IDs)
+SHARED_QUESTION_ASSETS = ["web_common.json", "web_daily.json"]
+CARD_ASSETS = ["web_cards.json"]
+
+QUALIFICATION_ASSETS = {
+    "social": ["web_past_social.json", "web_spec_social_v3.json"],
+    "mental": ["web_spec_mental_*.json", "web_past_mental.json"],
+    "care": ["web_spec_care.json"],
+}
+
+# Mirrors app/db/schema.ts
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS questions (
+    id TEXT PRIMARY KEY NOT NULL,
+    question_text TEXT NOT NULL,
+    explanation TEXT NOT NULL,
+    options TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    year TEXT,
+    category_label TEXT,
+    is_free INTEGER DEFAULT 0 NOT NULL,
+    is_mastered INTEGER DEFAULT 0,
+    correct_streak INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS user_progress (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT REFERENCES questions(id),
+    is_correct INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memorization_cards (
+    id TEXT PRIMARY KEY NOT NULL,
+    term TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    category_label TEXT,
+    is_mastered INTEGER DEFAULT 0,
+    proficiency INTEGER DEFAULT 0,
+    last_reviewed INTEGER
+);
+CREATE TABLE IF NOT EXISTS card_study_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    card_id TEXT REFERENCES memorization_cards(id),
+    result TEXT NOT NULL,
+    timestamp INTEGER NOT NULL
+);
+"""
+
+INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_questions_group_id ON questions(group_id);
+CREATE INDEX IF NOT EXISTS idx_questions_category_label ON questions(category_label);
+CREATE INDEX IF NOT EXISTS idx_questions_year ON questions(year);
+CREATE INDEX IF NOT EXISTS idx_cards_group_id ON memorization_cards(group_id);
+CREATE INDEX IF NOT EXISTS idx_cards_category_label ON memorization_cards(category_label);
+"""
+
+INSERT_QUESTION_SQL = """INSERT OR REPLACE INTO questions
+    (id, question_text, explanation, options, correct_answer, group_id, year, category_label, is_free, is_mastered, correct_streak)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 0)"""
+
+INSERT_CARD_SQL = """INSERT OR REPLACE INTO memorization_cards
+    (id, term, definition, group_id, category_label, is_mastered, proficiency, last_reviewed)
+    VALUES (?, ?, ?, ?, ?, 0, 0, NULL)"""
+
+
+def to_json_text(value):
+    # Compact form, same as JSON.stringify on the client
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def question_row(q):
+    """Converts a raw question record into a questions table row (same rules as client.web.ts)."""
+    opts = q.get("options") or []
+    if not isinstance(opts, str):
+        opts = to_json_text(opts)
+
+    corr = q.get("correct_answer")
+    if corr is None or corr == "":
+        corr = q.get("correctAnswer") or ""
+    if isinstance(corr, list):
+        corr = to_json_text(corr)
+    elif isinstance(corr, str):
+        # "1,2" -> ["1","2"], "1" -> ["1"]
+        corr = to_json_text([s.strip() for s in corr.split(",")])
+    else:
+        corr = to_json_text([])
+
+    return (
+        str(q.get("id")),
+        q.get("question_text") or q.get("questionText") or "",
+        q.get("explanation") or "",
+        opts,
+        corr,
+        q.get("group_id") or q.get("group") or "unknown",
+        q.get("year") or "",
+        q.get("category_label") or q.get("categoryLabel") or "",
+        1 if (q.get("is_free") or q.get("isFree")) else 0,
+    )
+
+
+def card_row(c):
+    return (
+        str(c.get("id")),
+        c.get("term") or "",
+        c.get("definition") or "",
+        c.get("group_id") or c.get("group") or "common",
+        c.get("category_label") or c.get("categoryLabel") or "",
+    )
+
+
+def resolve_assets(patterns, public_dir=PUBLIC_DIR):
+    """Expands asset names like 'web_spec_mental_*.json' in numeric shard order."""
+    paths = []
+    for pattern in patterns:
+        if "*" not in pattern:
+            path = os.path.join(public_dir, pattern)
+            if os.path.exists(path):
+                paths.append(path)
+            else:
+                print(f"  Warning: {pattern} not found, skipping.")
+            continue
+
+        prefix, suffix = pattern.split("*", 1)
+        shards = []
+        for name in os.listdir(public_dir):
+            if name.startswith(prefix) and name.endswith(suffix):
+                key = name[len(prefix) : len(name) - len(suffix)]
+                if key.isdigit():
+                    shards.append((int(key), name))
+        paths.extend(os.path.join(public_dir, name) for _, name in sorted(shards))
+    return paths
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def asset_plan(qualification, public_dir=PUBLIC_DIR):
+    question_paths = resolve_assets(
+        SHARED_QUESTION_ASSETS + QUALIFICATION_ASSETS[qualification], public_dir
+    )
+    card_paths = resolve_assets(CARD_ASSETS, public_dir)
+    return question_paths, card_paths
+
+
+def build_database(output_path, question_paths, card_paths):
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # sql.js reads the whole file into memory, so a rollback journal
+        # (not WAL) keeps the shipped artifact a single self-contained file.
+        conn.execute("PRAGMA journal_mode = DELETE")
+        conn.execute("PRAGMA page_size = 4096")
+        conn.executescript(SCHEMA_SQL)
+
+        question_count = 0
+        with conn:
+            for path in question_paths:
+                rows = [question_row(q) for q in load_json(path) if q.get("id") is not None]
+                conn.executemany(INSERT_QUESTION_SQL, rows)
+                question_count += len(rows)
+                print(f"  + {os.path.basename(path)} ({len(rows)})")
+
+        card_count = 0
+        with conn:
+            for path in card_paths:
+                rows = [card_row(c) for c in load_json(path) if c.get("id") is not None]
+                conn.executemany(INSERT_CARD_SQL, rows)
+                card_count += len(rows)
+                print(f"  + {os.path.basename(path)} ({len(rows)} cards)")
+
+        # Build indexes after the bulk load, then compact the file
+        conn.executescript(INDEX_SQL)
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, output_path)
+    return question_count, card_count
+
+
+def build_all(qualifications, public_dir=PUBLIC_DIR, output_dir=PUBLIC_DIR, releases_dir=RELEASES_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = AssetManifest(output_dir)
+    results = {}
+    for qualification in qualifications:
+        print(f"Building db_{qualification}.sqlite...")
+        question_paths, card_paths = asset_plan(qualification, public_dir)
+        output_path = os.path.join(output_dir, f"db_{qualification}.sqlite")
+        q_count, c_count = build_database(output_path, question_paths, card_paths)
+        size_mb = os.path.getsize(output_path) / 1024 / 1024
+        print(f"Saved {output_path} ({q_count} question rows, {c_count} cards, {size_mb:.2f} MB)")
+        # Content-hashed copy for long-lived client caching
+        manifest.publish_file(f"db_{qualification}", output_path, q_count)
+        # Patch from the previous release for clients that still have it cached
+        cut_release(manifest, qualification, output_path, releases_dir)
+        # Phrase search over the same questions
+        publish_search_index(manifest, qualification, (q for p in question_paths for q in load_json(p)))
+        results[qualification] = output_path
+    manifest.save()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build prebuilt SQLite databases from the web JSON assets."
+    )
+    parser.add_argument(
+        "--qualification",
+        choices=sorted(QUALIFICATION_ASSETS),
+        action="append",
+        help="Qualification to build (repeatable, default: all)",
+    )
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--output-dir", default=PUBLIC_DIR)
+    parser.add_argument("--releases-dir", default=RELEASES_DIR)
+    args = parser.parse_args()
+
+    build_all(
+        args.qualification or sorted(QUALIFICATION_ASSETS),
+        public_dir=args.public_dir,
+        output_dir=args.output_dir,
+        releases_dir=args.releases_dir,
+    )
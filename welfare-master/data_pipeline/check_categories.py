@@ -1,16 +1,16 @@
-import json
 import os
 from collections import Counter
 
+from corpus_index import CorpusIndex
+
+CATEGORY_KEYS = {"category_label": ("categoryLabel", "category_label")}
+
 # Checking web_spec_social_v3.json as it represents the latest spec questions
 path = "../app/public/web_spec_social_v3.json"
 
 if os.path.exists(path):
     print(f"Checking {path}...")
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    cats = Counter([d.get("categoryLabel") or d.get("category_label") for d in data])
+    cats = Counter(CorpusIndex.open(path, fields=CATEGORY_KEYS).group_by("category_label"))
 
     print("\n--- Categories ---")
     for c, count in cats.most_common():
@@ -20,8 +20,6 @@ if os.path.exists(path):
 path2 = "../app/public/web_past_social.json"
 if os.path.exists(path2):
     print(f"\nChecking {path2}...")
-    with open(path2, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    cats = Counter([d.get("categoryLabel") or d.get("category_label") for d in data])
+    cats = Counter(CorpusIndex.open(path2, fields=CATEGORY_KEYS).group_by("category_label"))
     for c, count in cats.most_common():
         print(f"{c}: {count}")
@@ -1,39 +1,33 @@
-import json
 import os
 
+from corpus_index import CorpusIndex
+
 path = "master_database_v2_final.json"
 
-if os.path.exists(path):
-    print(f"Loading {path}...")
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
+def is_daily_target(group):
     # App Logic Simulation
     # return g === 'common' || g.startsWith('common') || g.startsWith('past');
+    g = str(group or "")
+    return g == "common" or g.startswith("common") or g.startswith("past")
 
-    targets = []
-    excluded = []
 
-    for q in data:
-        g = str(q.get("group") or "")
-        if g == "common" or g.startswith("common") or g.startswith("past"):
-            targets.append(q)
-        else:
-            excluded.append(q)
+if os.path.exists(path):
+    print(f"Checking {path}...")
+    index = CorpusIndex.open(path, fields={"group": ("group",)})
 
-    print(f"\nTotal Questions in DB: {len(data)}")
-    print(f"Daily Mission Targets: {len(targets)}")
+    target_groups = index.group_by("group", group=is_daily_target)
+    excluded_groups = index.group_by("group", group=lambda g: not is_daily_target(g))
 
-    # Break down of targets
-    from collections import Counter
+    print(f"\nTotal Questions in DB: {index.total}")
+    print(f"Daily Mission Targets: {sum(target_groups.values())}")
 
-    target_groups = Counter([t.get("group") for t in targets])
+    # Break down of targets
     print("\nTarget Breakdown:")
     for g, c in target_groups.items():
         print(f"  - {g}: {c}")
 
     # Break down of excluded
-    excluded_groups = Counter([e.get("group") for e in excluded])
     print("\nExcluded Breakdown:")
     for g, c in excluded_groups.items():
         print(f"  - {g}: {c}")
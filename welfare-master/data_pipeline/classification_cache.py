@@ -0,0 +1,62 @@
+import json
+import os
+
+# Persistent classification cache: record fingerprint -> routing result.
+#
+# A PatternClassifier result depends only on the record fields it reads and
+# on its rule table, so results are stored under classifier.fingerprint(record)
+# together with the rule table's version stamp. A run only classifies records
+# whose routing fields changed; editing any rule invalidates the whole cache.
+# Each entry keeps the rule that fired, which makes routing changes auditable:
+#
+#   cache = ClassificationCache(path, classifier.rules_version())
+#   label, priority, pattern = cache.classify(classifier, record) or (None, None, None)
+#   cache.save()
+
+CACHE_VERSION = 1
+
+
+class ClassificationCache:
+    """JSON-backed map of record fingerprint -> [label, priority, pattern] (or None)."""
+
+    def __init__(self, path, rules_version):
+        self.path = path
+        self.rules_version = rules_version
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == CACHE_VERSION and data.get("rules_version") == rules_version:
+                self.entries = data.get("entries", {})
+            elif data:
+                print(f"Classification rules changed, reclassifying everything ({path}).")
+
+    def classify(self, classifier, record):
+        key = classifier.fingerprint(record)
+        if key in self.entries:
+            self.hits += 1
+            match = self.entries[key]
+        else:
+            self.misses += 1
+            match = classifier.classify_rule(record)
+            self.entries[key] = list(match) if match else None
+        return tuple(match) if match else None
+
+    def save(self):
+        # Entries for records missing from this run are kept: the dedup index
+        # skips unchanged sources, and a rule edit resets the cache anyway
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "rules_version": self.rules_version, "entries": self.entries},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.path)
+        print(f"Classification cache: {self.hits} hits, {self.misses} classified ({self.path}).")
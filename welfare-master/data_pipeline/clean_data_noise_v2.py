@@ -1,76 +1,309 @@
+import argparse
+import glob
+import hashlib
 import json
-import re
 import os
+import re
+import time
+from collections import Counter
+from multiprocessing import Pool
+
+from asset_manifest import is_hashed_name
+from json_stream import COMPACT_SEPARATORS
+
+# PDF-extraction noise cleaner for the corpus files.
+#
+# The noise rules are compiled into one alternation per field (named groups,
+# so every removal is attributed to its rule), so each string is scanned
+# once; the page-number rule then runs on the noise-free text, and only on
+# strings that end in a digit. Files are cleaned in a process pool and
+# rewritten (atomically, in their original layout) only when something
+# changed.
+#
+# Only the source masters are cleaned by default: the public / native files
+# are regenerated from them by the later deploy steps (update_native_assets,
+# prepare_web_assets), so cleaning those copies would only make them differ
+# from their hashed twins and precompressed files.
+#
+# Runs are incremental through MANIFEST_FILE: per file its size / mtime and,
+# per record, (record ID, raw-content hash) -> cleaned hash, all under the
+# ruleset version. Files whose stat matches are not even opened; in changed
+# files only new or edited records are cleaned. A rule edit starts over.
+# Nothing in a deploy rewrites the source masters, so a deploy with no data
+# change stats a handful of files and reads none. A default run drops the
+# entries of files that are no longer in the corpus.
+#
+#   python clean_data_noise_v2.py                      # every corpus file
+#   python clean_data_noise_v2.py ../app/public/web_past_social.json --jobs 4
+#   python clean_data_noise_v2.py --dry-run
+#   python clean_data_noise_v2.py --full               # ignore the manifest
+#
+# Rules: "cid" = (cid:NNN) glyph placeholders, "junk" = reported junk
+# strings, "page_number" = a trailing whitespace-separated digit run once
+# noise is gone (e.g. "本文 4(cid:1)8"), unless the whitespace follows a digit
+# or comma: combination options like "1, 2" / "1,(cid:3) 2" are left alone.
+# bench_clean_data_noise.py checks these cases.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+MANIFEST_FILE = os.path.join(BASE_DIR, "clean_manifest.json")
+MANIFEST_VERSION = 1
 
+CORPUS_PATTERNS = [
+    "data_pipeline/master_database_v2_final.json",
+    "app/assets/master_data.json",
+    "app/assets/mental_special.json",
+    "app/assets/mental_past_questions.json",
+]
 
-def clean_text(text):
-    if not isinstance(text, str):
-        return text
-
-    # Remove (cid:xxxxx) patterns
-    text = re.sub(r"\(cid:\d+\)", "", text)
-
-    # Remove standalone numbers at the end of the text (likely page numbers)
-    # Matches: Space/Tab/FullWidthSpace + digits + optional whitespace at end of string
-    # Try to match "text 48" or "text　48"
-    text = re.sub(r"[\s　]+[0-9]+[\s　]*$", "", text)
-
-    # Remove specific noise reported
-    text = text.replace("(cid12719)", "")
-    text = text.replace("(cid:12719)", "")
-
-    return text.strip()
-
-
-def process_file(filepath):
-    if not os.path.exists(filepath):
-        print(f"File not found: {filepath}")
-        return
-
-    print(f"Cleaning {filepath}...")
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    cleaned_count = 0
-    for item in data:
-        original_q = item.get("question_text") or item.get("questionText") or ""
-        cleaned_q = clean_text(original_q)
-
-        if original_q != cleaned_q:
-            if "question_text" in item:
-                item["question_text"] = cleaned_q
-            if "questionText" in item:
-                item["questionText"] = cleaned_q
-            cleaned_count += 1
-
-        # Clean options
-        if "options" in item:
-            opts = item["options"]
-            if isinstance(opts, list):
-                new_opts = []
-                opt_changed = False
-                for opt in opts:
-                    c_opt = clean_text(opt)
-                    new_opts.append(c_opt)
-                    if c_opt != opt:
-                        opt_changed = True
-                if opt_changed:
-                    item["options"] = new_opts
-                    cleaned_count += 1
-
-    # Save back
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-    print(f"Cleaned {cleaned_count} questions in {filepath}")
-
-
-# Target files
-files_to_clean = [
-    "c:\\Users\\user\\.gemini\\social-worker-exam\\welfare-master\\data_pipeline\\master_database_v2_final.json",
-    "c:\\Users\\user\\.gemini\\social-worker-exam\\welfare-master\\app\\assets\\separated_db\\master_social.json",
-    "c:\\Users\\user\\.gemini\\social-worker-exam\\welfare-master\\app\\public\\web_past_social.json",
+JUNK_STRINGS = ["(cid12719)"]
+NOISE_RULES = [
+    ("cid", r"\(cid:\d+\)"),
+    ("junk", "|".join(re.escape(s) for s in JUNK_STRINGS)),
+]
+# Applied to the text with the noise rules already removed, so noise can't
+# hide the guard. The guard sits before the whole whitespace run: a match
+# can't start at a later space either.
+TAIL_RULES = [
+    ("page_number", r"(?<![\s　0-9,、，])[\s　]+[0-9]+(?=[\s　]*\Z)"),
 ]
+RULES = NOISE_RULES + TAIL_RULES
+TAIL_RULE_NAMES = {name for name, _ in TAIL_RULES}
+
+ALL_RULES = [name for name, _ in RULES]
+FIELD_RULES = {
+    "question_text": ALL_RULES,
+    "questionText": ALL_RULES,
+    "options": ALL_RULES,
+    # Explanations legitimately end in numbers ("正答は 3"), so only noise tokens go
+    "explanation": ["cid", "junk"],
+}
+
+# Changes whenever a rule or its field assignment changes
+RULESET_VERSION = hashlib.sha256(
+    json.dumps([RULES, FIELD_RULES], ensure_ascii=False).encode("utf-8")
+).hexdigest()[:16]
+
+
+def _alternation(patterns, names):
+    if not names:
+        return None
+    return re.compile("|".join(f"(?P<{name}>{patterns[name]})" for name in names))
+
+
+class CleaningEngine:
+    """Per field, one compiled noise pattern and one tail pattern; hit counts per rule in self.hits."""
+
+    def __init__(self, rules=RULES, field_rules=FIELD_RULES):
+        patterns = dict(rules)
+        self.hits = Counter()
+        self.patterns = {
+            field: (
+                _alternation(patterns, [n for n in names if n not in TAIL_RULE_NAMES]),
+                _alternation(patterns, [n for n in names if n in TAIL_RULE_NAMES]),
+            )
+            for field, names in field_rules.items()
+        }
+
+    def _remove(self, match):
+        self.hits[match.lastgroup] += 1
+        return ""
+
+    def clean_text(self, field, text):
+        if not isinstance(text, str):
+            return text
+        noise, tail = self.patterns[field]
+        if noise is not None:
+            text = noise.sub(self._remove, text)
+        # Tail rules need a trailing digit; checking that first skips the scan for most strings
+        if tail is not None and text.rstrip()[-1:].isdigit():
+            text = tail.sub(self._remove, text)
+        return text.strip()
+
+    def clean_record(self, record):
+        """Cleans the record in place. Returns True if anything changed."""
+        changed = False
+        for field in self.patterns:
+            value = record.get(field)
+            if isinstance(value, list):
+                cleaned = [self.clean_text(field, v) for v in value]
+            elif isinstance(value, str):
+                cleaned = self.clean_text(field, value)
+            else:
+                continue
+            if cleaned != value:
+                record[field] = cleaned
+                changed = True
+        return changed
+
+
+def corpus_files(root=ROOT_DIR, patterns=CORPUS_PATTERNS):
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern)):
+            if not is_hashed_name(os.path.basename(path)):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def record_hash(record):
+    payload = json.dumps(record, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+
+def load_manifest(path=MANIFEST_FILE):
+    """{relative path: {"size", "mtime_ns", "records"}} for the current ruleset."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("ruleset") != RULESET_VERSION:
+        print("Cleaning rules changed, re-cleaning every record.")
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(files, path=MANIFEST_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"version": MANIFEST_VERSION, "ruleset": RULESET_VERSION, "files": files},
+            f,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+    os.replace(tmp_path, path)
+
+
+def write_json(path, data, indent=None, separators=None):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent, separators=separators)
+    os.replace(tmp_path, path)
+
+
+def clean_file(task):
+    """Cleans one file; known maps "<id>:<raw hash>" -> cleaned hash from the last run."""
+    path, known, dry_run = task
+    engine = CleaningEngine()
+    stats = {
+        "path": path,
+        "records": 0,
+        "cleaned": 0,
+        "changed": 0,
+        "written": False,
+        "hits": engine.hits,
+        "manifest": None,
+        "error": None,
+    }
+    try:
+        with open(path, "r", encoding="utf-8-sig") as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError) as e:
+        stats["error"] = str(e)
+        return stats
+    if not isinstance(data, list):
+        stats["error"] = "not a JSON array"
+        return stats
+
+    entries = {}
+    for record in data:
+        if not isinstance(record, dict):
+            continue
+        stats["records"] += 1
+        digest = record_hash(record)
+        key = f"{record.get('id', '')}:{digest}"
+        # Cleaning is idempotent: a record whose cleaned hash is its own hash is done
+        if known.get(key) == digest:
+            entries[key] = digest
+            continue
+        stats["cleaned"] += 1
+        if engine.clean_record(record):
+            stats["changed"] += 1
+            cleaned = record_hash(record)
+            entries[key] = cleaned
+            # The rewritten file holds the cleaned record, which needs no further work
+            entries[f"{record.get('id', '')}:{cleaned}"] = cleaned
+        else:
+            entries[key] = digest
+
+    if stats["changed"] and not dry_run:
+        # Keep the file's layout: pretty-printed files stay pretty-printed, minified stay minified
+        if re.match(r"\[\s*\n", raw):
+            write_json(path, data, indent=2)
+        elif re.match(r'\[\s*\{\s*"[^"]*"\s*:\s', raw):
+            write_json(path, data, separators=(", ", ": "))
+        else:
+            write_json(path, data, separators=COMPACT_SEPARATORS)
+        stats["written"] = True
+    stat = os.stat(path)
+    stats["manifest"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "records": entries}
+    return stats
+
+
+def clean_files(paths, jobs=1, dry_run=False, full=False, manifest_path=MANIFEST_FILE, prune=False):
+    started = time.perf_counter()
+    manifest = {} if full else load_manifest(manifest_path)
+    updated = {}
+    tasks = []
+    for path in paths:
+        name = os.path.relpath(path, ROOT_DIR).replace(os.sep, "/")
+        try:
+            stat = os.stat(path)
+        except OSError:
+            print(f"  Skipped {name}: not found")
+            continue
+        entry = manifest.get(name)
+        if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            # Unchanged since it was last cleaned: not even opened
+            updated[name] = entry
+            continue
+        tasks.append((path, entry["records"] if entry else {}, dry_run))
+    skipped = len(updated)
+    # Largest files first so one big file doesn't finish last on its own
+    tasks.sort(key=lambda task: -os.path.getsize(task[0]))
+
+    totals = Counter()
+    records = 0
+    cleaned = 0
+    if tasks:
+        with Pool(max(1, min(jobs, len(tasks)))) as pool:
+            for stats in pool.imap_unordered(clean_file, tasks):
+                name = os.path.relpath(stats["path"], ROOT_DIR).replace(os.sep, "/")
+                if stats["error"]:
+                    print(f"  Skipped {name}: {stats['error']}")
+                    continue
+                records += stats["records"]
+                cleaned += stats["cleaned"]
+                totals.update(stats["hits"])
+                updated[name] = stats["manifest"]
+                if stats["changed"]:
+                    action = "rewritten" if stats["written"] else "would rewrite"
+                    print(f"  {name}: {stats['changed']}/{stats['records']} records cleaned ({action})")
+    elapsed = time.perf_counter() - started
+
+    if not dry_run:
+        # Files outside this run keep their entries, unless this run is the whole corpus
+        save_manifest(updated if prune else {**manifest, **updated}, manifest_path)
+    print(
+        f"Checked {records} records in {len(tasks)} files ({skipped} unchanged files skipped), "
+        f"cleaned {cleaned}: {elapsed:.2f} s, {records / max(elapsed, 1e-9):,.0f} records/s"
+    )
+    for name in ALL_RULES:
+        print(f"  {name}: {totals[name]} removals")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove PDF-extraction noise from corpus files.")
+    parser.add_argument("files", nargs="*", help="JSON files to clean (default: every corpus file)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dry-run", action="store_true", help="Report without rewriting files")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and check every record")
+    args = parser.parse_args()
 
-for f in files_to_clean:
-    process_file(f)
+    paths = [os.path.abspath(p) for p in args.files] or corpus_files()
+    print(f"Cleaning {len(paths)} files (ruleset {RULESET_VERSION})...")
+    clean_files(paths, args.jobs, args.dry_run, args.full, prune=not args.files)
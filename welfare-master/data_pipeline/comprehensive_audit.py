@@ -1,10 +1,7 @@
-import json
+from corpus_index import CorpusIndex
 
 
 def audit():
-    with open("master_database.json", "r", encoding="utf-8") as f:
-        db = json.load(f)
-
     targets = [
         ("past_social", "令和3年度"),
         ("past_social", "令和4年度"),
@@ -13,14 +10,14 @@ def audit():
         ("past_mental", "令和6年度"),
     ]
 
+    index = CorpusIndex.open("master_database.json", fields={"group": ("group",)})
+
     for g, y in targets:
-        items = [q for q in db if q.get("group") == g and q.get("year") == y]
+        matches = index.filter(group=g, year=y)
         print(f"\n[{g}] {y}")
-        print(f"  Count: {len(items)}")
-        if items:
-            print(
-                f"  Q1: {items[0].get('question_text', items[0].get('text', ''))[:100]}"
-            )
+        print(f"  Count: {len(matches)}")
+        for q in index.records(matches[:1]):
+            print(f"  Q1: {q.get('question_text', q.get('text', ''))[:100]}")
 
 
 if __name__ == "__main__":
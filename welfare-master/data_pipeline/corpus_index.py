@@ -0,0 +1,235 @@
+import argparse
+import hashlib
+import json
+import os
+from collections import Counter
+
+from dedup_index import file_hash
+from json_stream import iter_json_array
+
+# Indexed structured queries over a corpus JSON file (one top-level array).
+#
+# The corpus is streamed once to build inverted indexes (value -> sorted record
+# positions) on group, year and category_label. They are saved under
+# corpus_indexes/ (never next to the corpus: app/public is deployed as is)
+# and reused while the corpus is unchanged, so counts and group-bys never
+# touch the corpus again:
+#
+#   index = CorpusIndex.open("../app/assets/master_data.json")
+#   index.count(group="past_social", year="令和5年度")
+#   index.group_by("category_label", group=lambda g: str(g).startswith("common"))
+#   for q in index.records(index.filter(group="past_mental")):
+#       ...
+#
+# A filter value is a single value, a list/set of values, or a predicate
+# applied to each distinct value of the field.
+#
+# Each field reads the first truthy key of its key list (like
+# q.get("group") or q.get("group_id")). A script that needs another
+# precedence passes its own keys; each key set gets its own saved index:
+#
+#   CorpusIndex.open(path, fields={"group": ("group_id", "group")})
+#
+#   python corpus_index.py ../app/assets/master_data.json --group-by group
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(BASE_DIR, "corpus_indexes")
+INDEX_SUFFIX = ".idx"
+FORMAT_VERSION = 2
+
+# field -> record keys, first truthy one wins
+FIELDS = {
+    "group": ("group", "group_id"),
+    "year": ("year",),
+    "category_label": ("category_label", "categoryLabel"),
+}
+
+
+def _extract(record, keys):
+    for key in keys[:-1]:
+        value = record.get(key)
+        if value:
+            return value
+    return record.get(keys[-1])
+
+
+def index_path(path, fields):
+    """Saved index location for `path` read with `fields`."""
+    spec = json.dumps([os.path.abspath(path), fields], sort_keys=True)
+    digest = hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(INDEX_DIR, f"{os.path.basename(path)}.{digest}{INDEX_SUFFIX}")
+
+
+def _key(value):
+    # Lists/dicts are indexed by their JSON text
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return value
+
+
+class CorpusIndex:
+    """Inverted indexes on FIELDS (or the given key lists) for one corpus file."""
+
+    def __init__(self, path, total, postings, fields=FIELDS):
+        self.path = path
+        self.fields = fields
+        self.total = total
+        # {field: {value: [position, ...]}}
+        self._postings = postings
+        self._columns = {}
+
+    @classmethod
+    def open(cls, path, fields=None, rebuild=False):
+        """Loads the saved index for `path`, building it if stale or missing.
+
+        `fields` overrides the key lists of FIELDS ({field: (key, ...)}).
+        """
+        fields = {field: list(keys) for field, keys in dict(FIELDS, **(fields or {})).items()}
+        saved_path = index_path(path, fields)
+        stat = os.stat(path)
+        if not rebuild and os.path.exists(saved_path):
+            with open(saved_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            source = saved.get("source", {})
+            fresh = saved.get("version") == FORMAT_VERSION and source.get("size") == stat.st_size
+            if fresh and source.get("mtime_ns") != stat.st_mtime_ns:
+                fresh = source.get("hash") == file_hash(path)
+            if fresh:
+                postings = {
+                    field: {value: positions for value, positions in pairs}
+                    for field, pairs in saved["fields"].items()
+                }
+                return cls(path, saved["total"], postings, fields)
+
+        index = cls.build(path, fields)
+        index.save(stat)
+        return index
+
+    @classmethod
+    def build(cls, path, fields=FIELDS):
+        print(f"Indexing {path}...")
+        postings = {field: {} for field in fields}
+        total = 0
+        for position, record in enumerate(iter_json_array(path)):
+            total += 1
+            if not isinstance(record, dict):
+                continue
+            for field, keys in fields.items():
+                postings[field].setdefault(_key(_extract(record, keys)), []).append(position)
+        return cls(path, total, postings, fields)
+
+    def save(self, stat=None):
+        stat = stat or os.stat(self.path)
+        saved = {
+            "version": FORMAT_VERSION,
+            "corpus": os.path.abspath(self.path),
+            "keys": self.fields,
+            "source": {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": file_hash(self.path),
+            },
+            "total": self.total,
+            # [value, positions] pairs: values may be null or numbers
+            "fields": {field: [[v, p] for v, p in values.items()] for field, values in self._postings.items()},
+        }
+        saved_path = index_path(self.path, self.fields)
+        os.makedirs(os.path.dirname(saved_path), exist_ok=True)
+        tmp_path = saved_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(saved, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, saved_path)
+
+    def values(self, field):
+        return list(self._postings[field])
+
+    def _matching_values(self, field, wanted):
+        postings = self._postings[field]
+        if callable(wanted):
+            return [v for v in postings if wanted(v)]
+        if isinstance(wanted, (list, tuple, set, frozenset)):
+            return [_key(v) for v in wanted if _key(v) in postings]
+        return [_key(wanted)] if _key(wanted) in postings else []
+
+    def _positions(self, field, wanted):
+        values = self._matching_values(field, wanted)
+        if len(values) == 1:
+            return self._postings[field][values[0]]
+        merged = []
+        for v in values:
+            merged.extend(self._postings[field][v])
+        merged.sort()
+        return merged
+
+    def _column(self, field):
+        """Value of `field` at each position (built on first use)."""
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = [None] * self.total
+            for value, positions in self._postings[field].items():
+                for p in positions:
+                    column[p] = value
+        return column
+
+    def filter(self, **filters):
+        """Sorted positions of the records matching every filter."""
+        if not filters:
+            return list(range(self.total))
+        # Walk the smallest posting list, check the other fields per position
+        candidates = sorted(((self._positions(f, w), f, w) for f, w in filters.items()), key=lambda c: len(c[0]))
+        result = candidates[0][0]
+        for _, field, wanted in candidates[1:]:
+            if not result:
+                break
+            allowed = set(self._matching_values(field, wanted))
+            column = self._column(field)
+            result = [p for p in result if column[p] in allowed]
+        return list(result)
+
+    def count(self, **filters):
+        if len(filters) == 1:
+            ((field, wanted),) = filters.items()
+            return sum(len(self._postings[field][v]) for v in self._matching_values(field, wanted))
+        return len(self.filter(**filters))
+
+    def group_by(self, field, **filters):
+        """{value: count} of `field` over the records matching `filters`."""
+        if not filters:
+            return {v: len(p) for v, p in self._postings[field].items()}
+        column = self._column(field)
+        return dict(Counter(column[p] for p in self.filter(**filters)))
+
+    def records(self, positions):
+        """Yields the records at `positions` (streams only up to the last one)."""
+        wanted = sorted(set(positions))
+        if not wanted:
+            return
+        nxt = 0
+        for position, record in enumerate(iter_json_array(self.path)):
+            if position == wanted[nxt]:
+                yield record
+                nxt += 1
+                if nxt == len(wanted):
+                    return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count corpus records by indexed fields.")
+    parser.add_argument("corpus")
+    parser.add_argument("--group-by", choices=list(FIELDS), default="group")
+    parser.add_argument("--group", help="Filter: group / group_id")
+    parser.add_argument("--year")
+    parser.add_argument("--category", help="Filter: category_label")
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+
+    index = CorpusIndex.open(args.corpus, rebuild=args.rebuild)
+    filters = {
+        field: value
+        for field, value in (("group", args.group), ("year", args.year), ("category_label", args.category))
+        if value is not None
+    }
+    counts = index.group_by(args.group_by, **filters)
+    print(f"Total: {index.count(**filters) if filters else index.total}")
+    for value, n in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"{n:>8,}  {value}")
@@ -0,0 +1,357 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+
+from json_stream import iter_json_array
+from question_ids import normalize_text
+
+# Persistent cross-file dedup index for the master JSON files.
+#
+# Every question text is stored once per occurrence as (normalized text hash,
+# source, position, id). The canonical copy of a text is its occurrence in the
+# highest-priority source (earliest in the list passed to sync(), then earliest
+# position). Sources are re-streamed only when their content hash changes, so
+# a merge touches just the files that changed. Records a stage wants back
+# (`keep`) are stored with their occurrence and read from the index later.
+#
+# Texts are compared after question_ids.normalize_text (NFKC, trimmed,
+# lowercased), not as raw strings like the old in-memory merge did: copies
+# that differ only in case, full-/half-width characters or surrounding
+# whitespace count as one question.
+#
+# A Bloom filter over all text hashes is kept in the index (meta table, saved
+# in the same transaction as the occurrences). sync() adds the hashes of the
+# sources it re-reads and only rebuilds the filter when it outgrows its
+# capacity (hashes of dropped sources stay in it until then; they only cost a
+# query). Texts the filter has never seen are new without a query: sync()
+# counts the new texts of each re-read source that way, and lookup() answers
+# "definitely new" without touching the occurrences table.
+#
+#   index = DedupIndex()
+#   index.sync(["master_data.json", "master_database_v3.json"])
+#   index.new_texts              # {re-read source: texts not indexed before}
+#   index.lookup(question_text)  # None, or (canonical_id, source)
+#
+#   python dedup_index.py status
+#   python dedup_index.py lookup "<question text>"
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_FILE = os.path.join(BASE_DIR, "dedup_index.sqlite")
+
+# Texts this short are headings or OCR noise, not questions
+MIN_TEXT_LENGTH = 10
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+# Room left for texts added by later syncs before the filter is rebuilt
+BLOOM_HEADROOM = 2
+STALE_SUFFIX = "\x00previous"
+HASH_CHUNK = 1 << 20
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY NOT NULL,
+    value BLOB
+);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY NOT NULL,
+    file_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    rank INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    text_hash BLOB NOT NULL,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT,
+    category_label TEXT,
+    record TEXT,
+    PRIMARY KEY (source, position)
+);
+CREATE INDEX IF NOT EXISTS idx_occurrences_text ON occurrences(text_hash);
+"""
+
+
+def text_hash(text):
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+
+
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def question_text(record):
+    return record.get("question_text") or record.get("questionText") or ""
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 16-byte hashes (double hashing)."""
+
+    def __init__(self, capacity, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.count = 0  # hashes added (with repeats across rebuilds: an upper bound)
+        n_bits = max(8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.n_bits = (n_bits + 7) // 8 * 8
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = bytearray(self.n_bits // 8)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % self.n_bits for i in range(self.n_hashes))
+
+    def add(self, digest):
+        self.count += 1
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+    def __contains__(self, digest):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    def dumps(self):
+        return json.dumps(
+            {"n_bits": self.n_bits, "n_hashes": self.n_hashes, "capacity": self.capacity, "count": self.count}
+        ).encode() + b"\n" + bytes(self.bits)
+
+    @classmethod
+    def loads(cls, blob):
+        header, bits = blob.split(b"\n", 1)
+        params = json.loads(header)
+        bloom = cls.__new__(cls)
+        bloom.n_bits = params["n_bits"]
+        bloom.n_hashes = params["n_hashes"]
+        bloom.capacity = params.get("capacity", 0)
+        bloom.count = params.get("count", bloom.capacity)
+        bloom.bits = bytearray(bits)
+        return bloom
+
+
+class DedupIndex:
+    """On-disk index of question text hash -> occurrences across source files."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA_SQL)
+        self._bloom = None
+        self.new_texts = {}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def sync(self, sources, keep=None, keep_version=""):
+        """Brings the index up to date with `sources` (highest priority first).
+
+        `keep(record)` selects records to store for records(); changing
+        `keep_version` (e.g. a hash of the rules behind `keep`) re-reads all
+        sources. Missing sources are dropped. Returns the re-read sources;
+        `new_texts` maps each of them to its number of texts the index did not
+        hold before.
+        """
+        conn = self.conn
+        self.new_texts = {}
+        bloom_changed = False
+        if (self._meta("keep_version") or "") != keep_version:
+            conn.execute("DELETE FROM sources")
+            conn.execute("DELETE FROM occurrences")
+            self._set_meta("keep_version", keep_version)
+            # Same capacity as before: the sources are about to be re-read
+            self._bloom = BloomFilter(self.bloom.capacity)
+            bloom_changed = True
+
+        known = {row[0]: row[1:] for row in conn.execute("SELECT path, file_hash, size, mtime_ns FROM sources")}
+        wanted = [os.path.abspath(p) for p in sources]
+        for path in set(known) - set(wanted):
+            self._drop_source(path)
+
+        changed = []
+        for rank, path in enumerate(wanted):
+            if not os.path.exists(path):
+                if path in known:
+                    self._drop_source(path)
+                continue
+            stat = os.stat(path)
+            previous = known.get(path)
+            if previous and previous[1:] == (stat.st_size, stat.st_mtime_ns):
+                conn.execute("UPDATE sources SET rank = ? WHERE path = ?", (rank, path))
+                continue
+            digest = file_hash(path)
+            if previous and previous[0] == digest:
+                conn.execute(
+                    "UPDATE sources SET size = ?, mtime_ns = ?, rank = ? WHERE path = ?",
+                    (stat.st_size, stat.st_mtime_ns, rank, path),
+                )
+                continue
+
+            print(f"  Indexing {path}...")
+            # The previous rows stay (under another name) until the new ones
+            # are in, so texts the file already had don't count as new
+            stale = path + STALE_SUFFIX
+            conn.execute("UPDATE occurrences SET source = ? WHERE source = ?", (stale, path))
+            conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+            self.new_texts[path] = 0
+            bloom_changed = True
+            try:
+                conn.executemany(
+                    "INSERT INTO occurrences (text_hash, source, position, id, category_label, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self._new_text_counter(path, self._rows(path, keep)),
+                )
+            except (OSError, ValueError) as e:
+                print(f"    Error loading {path}: {e}")
+                conn.execute("DELETE FROM occurrences WHERE source IN (?, ?)", (path, stale))
+                del self.new_texts[path]
+                continue
+            conn.execute("DELETE FROM occurrences WHERE source = ?", (stale,))
+            conn.execute(
+                "INSERT INTO sources (path, file_hash, size, mtime_ns, rank) VALUES (?, ?, ?, ?, ?)",
+                (path, digest, stat.st_size, stat.st_mtime_ns, rank),
+            )
+            changed.append(path)
+
+        if self.bloom.full or self._meta("bloom") is None:
+            self._rebuild_bloom()
+        elif bloom_changed:
+            self._set_meta("bloom", self.bloom.dumps())
+        conn.commit()
+        return changed
+
+    def _known(self, digest):
+        if digest not in self.bloom:
+            return False  # definitely new
+        row = self.conn.execute("SELECT 1 FROM occurrences WHERE text_hash = ? LIMIT 1", (digest,)).fetchone()
+        return row is not None
+
+    def _new_text_counter(self, path, rows):
+        """Passes rows through, adding unseen text hashes to the filter and new_texts[path]."""
+        for row in rows:
+            # Earlier rows of this source are already inserted, so repeats are known
+            if not self._known(row[0]):
+                self.new_texts[path] += 1
+                self.bloom.add(row[0])
+            yield row
+
+    def _rebuild_bloom(self):
+        count = self.conn.execute("SELECT COUNT(DISTINCT text_hash) FROM occurrences").fetchone()[0]
+        bloom = BloomFilter(count * BLOOM_HEADROOM)
+        for (digest,) in self.conn.execute("SELECT DISTINCT text_hash FROM occurrences"):
+            bloom.add(digest)
+        self._set_meta("bloom", bloom.dumps())
+        self._bloom = bloom
+
+    @property
+    def bloom(self):
+        if self._bloom is None:
+            blob = self._meta("bloom")
+            self._bloom = BloomFilter.loads(blob) if blob else BloomFilter(0)
+        return self._bloom
+
+    def _drop_source(self, path):
+        self.conn.execute("DELETE FROM occurrences WHERE source = ?", (path,))
+        self.conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+
+    def _rows(self, path, keep):
+        for position, record in enumerate(iter_json_array(path)):
+            if not isinstance(record, dict):
+                continue
+            text = question_text(record)
+            if len(text) <= MIN_TEXT_LENGTH:
+                continue
+            stored = None
+            if keep is not None and keep(record):
+                stored = json.dumps(record, ensure_ascii=False)
+            rid = record.get("id")
+            yield (
+                text_hash(text),
+                path,
+                position,
+                None if rid is None else str(rid),
+                record.get("category_label", "") or "",
+                stored,
+            )
+
+    def lookup(self, text):
+        """(canonical_id, source) of an indexed text, or None if it is new."""
+        digest = text_hash(text)
+        if digest not in self.bloom:
+            return None  # definitely new
+        row = self.conn.execute(
+            "SELECT o.id, o.source FROM occurrences o JOIN sources s ON s.path = o.source "
+            "WHERE o.text_hash = ? ORDER BY s.rank, o.position LIMIT 1",
+            (digest,),
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def _canonical(self, columns, where=""):
+        return self.conn.execute(
+            f"""
+            SELECT {columns} FROM (
+                SELECT o.*, s.rank, ROW_NUMBER() OVER (
+                    PARTITION BY o.text_hash ORDER BY s.rank, o.position
+                ) AS nth
+                FROM occurrences o JOIN sources s ON s.path = o.source
+            )
+            WHERE nth = 1 {where}
+            ORDER BY rank, position
+            """
+        )
+
+    def records(self):
+        """Yields (source, record) for canonical occurrences stored by `keep`."""
+        for source, record in self._canonical("source, record", "AND record IS NOT NULL"):
+            yield source, json.loads(record)
+
+    def unique_counts(self):
+        """{source: number of canonical texts} in priority order."""
+        counts = {path: 0 for (path,) in self.conn.execute("SELECT path FROM sources ORDER BY rank")}
+        for (source,) in self._canonical("source"):
+            counts[source] += 1
+        return counts
+
+    def category_counts(self):
+        """{category_label: count} over canonical texts."""
+        counts = {}
+        for (label,) in self._canonical("category_label"):
+            label = label or "NO_LABEL"
+            counts[label] = counts.get(label, 0) + 1
+        return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or update the cross-file dedup index.")
+    parser.add_argument("command", choices=["status", "lookup"])
+    parser.add_argument("text", nargs="*", help="lookup: question text")
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    with DedupIndex(args.index) as index:
+        if args.command == "status":
+            for source, n in index.unique_counts().items():
+                print(f"{n:>8,}  {source}")
+        else:
+            print(index.lookup(" ".join(args.text)) or "new")
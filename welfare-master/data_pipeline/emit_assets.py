@@ -0,0 +1,157 @@
+import argparse
+import gzip
+import json
+import os
+
+from asset_manifest import PUBLIC_DIR, is_hashed_name, write_bytes
+from json_stream import COMPACT_SEPARATORS
+
+# Try to import brotli (optional: .br siblings are skipped without it)
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+# Final emission stage for the publish set (app/public) and the native bundle:
+#
+#   1. removes stray backups (*.bak, *.tmp) so they are never deployed
+#   2. minifies every un-hashed JSON file (hashed shards are already written
+#      minified and must not change under their hash)
+#   3. writes precompressed .gz / .br siblings next to each web asset for hosts
+#      that serve them directly (gzip_static / brotli_static)
+#   4. prints raw / gzip / brotli sizes per asset so regressions are visible
+#
+#   python emit_assets.py
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NATIVE_DIR = os.path.join(BASE_DIR, "../app/assets/separated_db")
+
+PUBLISH_EXTENSIONS = (".json", ".sqlite", ".wasm")
+COMPRESSED_SUFFIXES = (".gz", ".br")
+STRAY_SUFFIXES = (".bak", ".tmp")
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def remove_strays(directory):
+    removed = 0
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(STRAY_SUFFIXES):
+            os.remove(os.path.join(directory, name))
+            print(f"Removed stray file {name}")
+            removed += 1
+    return removed
+
+
+def minify_json(path):
+    """Rewrites `path` without whitespace. Returns True if the file changed."""
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw.decode("utf-8-sig"))
+    minified = json.dumps(data, ensure_ascii=False, separators=COMPACT_SEPARATORS).encode("utf-8")
+    if minified == raw:
+        return False
+    write_bytes(path, minified)
+    return True
+
+
+def is_fresh(path, sibling):
+    if not os.path.exists(sibling):
+        return False
+    # Hashed files never change, so an existing sibling is always current
+    return is_hashed_name(os.path.basename(path)) or os.path.getmtime(sibling) >= os.path.getmtime(path)
+
+
+def compress_file(path):
+    """Writes <path>.gz (and <path>.br) if missing or stale. Returns their sizes."""
+    with open(path, "rb") as f:
+        raw = None
+        sizes = {}
+        gz_path = path + ".gz"
+        if not is_fresh(path, gz_path):
+            raw = f.read()
+            # mtime=0 keeps the .gz byte-identical across runs
+            write_bytes(gz_path, gzip.compress(raw, GZIP_LEVEL, mtime=0))
+        sizes["gzip"] = os.path.getsize(gz_path)
+
+        br_path = path + ".br"
+        if HAS_BROTLI:
+            if not is_fresh(path, br_path):
+                raw = raw if raw is not None else f.read()
+                write_bytes(br_path, brotli.compress(raw, quality=BROTLI_QUALITY))
+            sizes["brotli"] = os.path.getsize(br_path)
+    return sizes
+
+
+def remove_orphan_siblings(directory):
+    removed = 0
+    for name in os.listdir(directory):
+        if name.endswith(COMPRESSED_SUFFIXES) and not os.path.exists(os.path.join(directory, name[:-3])):
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    if removed:
+        print(f"Removed {removed} compressed siblings of deleted assets.")
+    return removed
+
+
+def publish_set(directory):
+    return sorted(
+        name
+        for name in os.listdir(directory)
+        if name.endswith(PUBLISH_EXTENSIONS) and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def print_size_table(rows):
+    def kb(value):
+        return f"{value / 1024:.1f}" if value is not None else "-"
+
+    width = max([len(name) for name, _, _, _ in rows] + [5])
+    print(f"{'asset':<{width}}{'raw KB':>12}{'gzip KB':>12}{'br KB':>12}")
+    for name, raw, gz, br in rows:
+        print(f"{name:<{width}}{kb(raw):>12}{kb(gz):>12}{kb(br):>12}")
+
+    def total(column):
+        values = [row[column] for row in rows if row[column] is not None]
+        return sum(values) if values else None
+
+    total_raw, total_gz, total_br = total(1), total(2), total(3)
+    print(f"{'total':<{width}}{kb(total_raw):>12}{kb(total_gz):>12}{kb(total_br):>12}")
+
+
+def emit(public_dir=PUBLIC_DIR, native_dir=NATIVE_DIR, compress=True):
+    if not HAS_BROTLI:
+        print("brotli not installed, skipping .br files. Run: pip install brotli")
+
+    for directory, precompress in [(public_dir, compress), (native_dir, False)]:
+        if not os.path.isdir(directory):
+            continue
+        print(f"--- {os.path.normpath(directory)} ---")
+        remove_strays(directory)
+
+        rows = []
+        minified = 0
+        for name in publish_set(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".json") and not is_hashed_name(name) and minify_json(path):
+                minified += 1
+            sizes = compress_file(path) if precompress else {}
+            rows.append((name, os.path.getsize(path), sizes.get("gzip"), sizes.get("brotli")))
+        if minified:
+            print(f"Minified {minified} JSON files.")
+        if precompress:
+            remove_orphan_siblings(directory)
+        print_size_table(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Minify and precompress the published assets and report their sizes."
+    )
+    parser.add_argument("--public-dir", default=PUBLIC_DIR)
+    parser.add_argument("--native-dir", default=NATIVE_DIR)
+    parser.add_argument("--no-compress", action="store_true", help="Only minify and report")
+    args = parser.parse_args()
+    emit(args.public_dir, args.native_dir, not args.no_compress)
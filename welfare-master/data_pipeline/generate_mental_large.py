@@ -12,6 +12,9 @@ from pypdf import PdfReader, PdfWriter
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
+from question_ids import IdAllocator
+from question_journal import QuestionJournal
+
 # Load env
 load_dotenv()
 load_dotenv("data_pipeline/.env")
@@ -172,7 +175,7 @@ def generate_questions_for_chunk(file_obj, chunk_name):
     return []  # Return empty list to allow the loop to continue to the next chunk
 
 
-def split_and_process(pdf_path, existing_data, progress_data):
+def split_and_process(pdf_path, existing_data, progress_data, journal, id_allocator):
     # Determine Relative Path (Unique Key) and Category Label
     try:
         rel_path = os.path.relpath(pdf_path, TARGET_DIR)
@@ -218,18 +221,6 @@ def split_and_process(pdf_path, existing_data, progress_data):
     chunk_progress = progress_data[file_key]
     last_chunk_idx = chunk_progress.get("last_chunk_idx", -1)
 
-    current_max_id = 40000
-    # Determine max ID from existing
-    for item in existing_data:
-        try:
-            # Basic int check, ignore ID like "mental_corrected_..."
-            if str(item.get("id", "")).isdigit():
-                val = int(item["id"])
-                if val > current_max_id and val < 90000:  # Safe range
-                    current_max_id = val
-        except:
-            pass
-
     for i in range(num_chunks):
         if i <= last_chunk_idx:
             continue
@@ -303,10 +294,7 @@ def split_and_process(pdf_path, existing_data, progress_data):
 
                     ans = fixed_ans
 
-                    current_max_id += 1
-
                     new_item = {
-                        "id": str(current_max_id),
                         "question_text": q.get("questionVal"),
                         "explanation": q.get("explanationVal", "解説なし"),
                         "options": ops,
@@ -322,11 +310,13 @@ def split_and_process(pdf_path, existing_data, progress_data):
                     }
                     new_for_chunk.append(new_item)
 
+                # Leased numeric IDs (40001-89999) + stable content IDs
+                id_allocator.assign(new_for_chunk)
                 existing_data.extend(new_for_chunk)
                 print(f" -> +{len(new_for_chunk)} Qs")
 
-                with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(existing_data, f, ensure_ascii=False, indent=2)
+                # Append this chunk to the journal (compacted into OUTPUT_FILE at the end)
+                journal.append(new_for_chunk)
 
             # Update Progress
             chunk_progress["last_chunk_idx"] = i
@@ -347,11 +337,12 @@ def main():
     if not os.path.exists(TARGET_DIR):
         return
     progress = load_progress()
+    journal = QuestionJournal(OUTPUT_FILE)
     full_data = []
-    if os.path.exists(OUTPUT_FILE):
+    if os.path.exists(OUTPUT_FILE) or os.path.exists(journal.journal_path):
         try:
-            with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-                full_data = json.load(f)
+            # Master file + any journal records left by an interrupted run
+            full_data = journal.load_all()
         except:
             pass
     elif os.path.exists("app/public/master_data.json"):
@@ -360,6 +351,9 @@ def main():
                 full_data = json.load(f)
         except:
             pass
+        # Only new questions go to the journal; the seed has to be in the
+        # master file already or compact() would drop it
+        journal.seed(full_data)
     pdfs = glob.glob(os.path.join(TARGET_DIR, "**/*.pdf"), recursive=True)
     print(f"Found {len(pdfs)} PDFs in {TARGET_DIR}")
 
@@ -369,6 +363,8 @@ def main():
         "精神保健福祉制度論",
     ]
 
+    id_allocator = IdAllocator(GROUP_ID, seed_records=full_data)
+
     for pdf in pdfs:
         # Check if any filter matches path components
         is_target = False
@@ -382,11 +378,13 @@ def main():
 
         print(f"Target Match: {pdf}")
         try:
-            split_and_process(pdf, full_data, progress)
+            split_and_process(pdf, full_data, progress, journal, id_allocator)
         except Exception as e:
             print(f"CRITICAL ERROR {pdf}: {e}")
             traceback.print_exc()
 
+    journal.compact()
+
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,9 @@ from pypdf import PdfReader, PdfWriter
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from question_ids import IdAllocator
+from question_journal import QuestionJournal
+
 # --- CONFIGURATION ---
 PDF_FOLDER = r"C:\Users\user\OneDrive\Desktop\共通"
 OUTPUT_FILE = "app/assets/master_database_v3.json"
@@ -83,8 +86,10 @@ def main():
         with open(PROGRESS_FILE, "r") as f:
             progress = json.load(f)
 
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-        master_database = json.load(f)
+    # Master file + any journal records left by an interrupted run
+    journal = QuestionJournal(OUTPUT_FILE)
+    master_database = journal.load_all()
+    id_allocator = IdAllocator("common", seed_records=master_database)
 
     pdf_files = [f for f in os.listdir(PDF_FOLDER) if f.lower().endswith(".pdf")]
     print(f"Found {len(pdf_files)} PDF files in {PDF_FOLDER}")
@@ -116,18 +121,9 @@ def main():
                 new_questions = generate_quiz_for_chunk(chunk_path, category_label)
 
                 # Format for database
-                current_max_id = max(
-                    [
-                        int(q.get("id", 0))
-                        for q in master_database
-                        if str(q.get("id", "0")).isdigit()
-                    ]
-                    + [0]
-                )
+                new_items = []
                 for q_data in new_questions:
-                    current_max_id += 1
                     new_item = {
-                        "id": str(current_max_id),
                         "question_text": q_data.get("questionVal"),
                         "options": q_data.get("optionsVal"),
                         "correct_answer": q_data.get("correctVal"),
@@ -137,11 +133,14 @@ def main():
                         "category_label": category_label,
                         "is_free": False,
                     }
-                    master_database.append(new_item)
+                    new_items.append(new_item)
+
+                # Leased numeric IDs + stable content IDs
+                id_allocator.assign(new_items)
+                master_database.extend(new_items)
 
-                # Save progress and DB
-                with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                    json.dump(master_database, f, ensure_ascii=False, indent=2)
+                # Save progress and DB (journal append, compacted at the end)
+                journal.append(new_items)
 
                 progress[filename]["chunks_done"] = idx + 1
                 if progress[filename]["chunks_done"] == len(chunks):
@@ -157,6 +156,7 @@ def main():
                 print(f"    Error in chunk {idx}: {e}")
                 time.sleep(10)
 
+    journal.compact()
     print("All categorized common subjects generated!")
 
 
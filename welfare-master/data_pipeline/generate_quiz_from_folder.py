@@ -6,6 +6,8 @@ import random
 import re
 from dotenv import load_dotenv
 import pdfplumber
+
+from question_ids import IdAllocator
 import google.generativeai as genai
 from openai import OpenAI
 
@@ -195,18 +197,15 @@ def main():
         print(f"Error: Directory not found: {TARGET_DIR}")
         return
 
-    # Load existing to find ID
-    start_id = 20000
     if os.path.exists(OUTPUT_FILE):
         with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
-            # Simple max ID find
-            ids = [int(x["id"]) for x in data if str(x["id"]).isdigit()]
-            if ids:
-                start_id = max(ids)
     else:
         data = []
 
+    # Leased numeric IDs (20001-29999); existing data is only scanned on first lease
+    id_allocator = IdAllocator("spec_social_folder", seed_records=data)
+
     # Recursive search for PDFs in subdirectories
     pdfs = glob.glob(os.path.join(TARGET_DIR, "**/*.pdf"), recursive=True)
     print(
@@ -214,7 +213,6 @@ def main():
     )
 
     new_questions = []
-    id_counter = start_id
 
     for pdf_path in pdfs:
         filename = os.path.basename(pdf_path)
@@ -255,9 +253,7 @@ def main():
 
         # Process results
         for q in quizzes:
-            id_counter += 1
             new_item = {
-                "id": str(id_counter),
                 "questionText": q["questionVal"],
                 "options": q["optionsVal"],
                 "correctAnswer": q["correctVal"],
@@ -268,6 +264,7 @@ def main():
                 "isFree": False,
                 "isMastered": False,
             }
+            id_allocator.assign([new_item])
             new_questions.append(new_item)
             data.append(new_item)
             print(f"  + Generated: {q['questionVal'][:20]}...")
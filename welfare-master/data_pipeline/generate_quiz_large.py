@@ -9,6 +9,9 @@ from dotenv import load_dotenv
 from pypdf import PdfReader, PdfWriter
 import google.generativeai as genai
 
+from question_ids import IdAllocator
+from question_journal import QuestionJournal
+
 # Load env from subdirectory explicitly
 load_dotenv()
 load_dotenv("data_pipeline/.env")
@@ -147,7 +150,7 @@ def generate_questions_for_chunk(file_obj, chunk_name):
     return []
 
 
-def split_and_process(pdf_path, existing_data, progress):
+def split_and_process(pdf_path, existing_data, progress, journal, id_allocator):
     filename = os.path.basename(pdf_path)
     clean_name = filename.replace(".pdf", "")
 
@@ -248,27 +251,16 @@ def split_and_process(pdf_path, existing_data, progress):
                 }
                 new_for_chunk.append(new_item)
 
-            # Assign IDs
-            if existing_data:
-                try:
-                    last_id = int(existing_data[-1]["id"])
-                except:
-                    last_id = 30000
-            else:
-                last_id = 30000
-
-            for item in new_for_chunk:
-                last_id += 1
-                item["id"] = str(last_id)
-                existing_data.append(item)
+            # Assign IDs (leased numeric block + stable content ID)
+            id_allocator.assign(new_for_chunk)
+            existing_data.extend(new_for_chunk)
 
             chunk_questions.extend(new_for_chunk)
 
             print(f" -> +{len(new_for_chunk)} Qs (Total in list: {len(existing_data)})")
 
-            # Save DB File
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(existing_data, f, ensure_ascii=False, indent=2)
+            # Append this chunk to the journal (compacted into OUTPUT_FILE at the end)
+            journal.append(new_for_chunk)
 
             # Update Progress
             progress[filename] = {"last_chunk_idx": i, "status": "IN_PROGRESS"}
@@ -290,22 +282,23 @@ def main():
 
     progress = load_progress()
 
-    full_data = []
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-            full_data = json.load(f)
+    # Master file + any journal records left by an interrupted run
+    journal = QuestionJournal(OUTPUT_FILE)
+    full_data = journal.load_all()
+    id_allocator = IdAllocator("spec_social", seed_records=full_data)
 
     pdfs = glob.glob(os.path.join(TARGET_DIR, "**/*.pdf"), recursive=True)
     print(f"Found {len(pdfs)} PDFs. Resuming safe generation mode...")
 
     for pdf in pdfs:
         try:
-            split_and_process(pdf, full_data, progress)
+            split_and_process(pdf, full_data, progress, journal, id_allocator)
         except Exception as e:
             print(f"CRITICAL ERROR processing {pdf}: {e}")
             traceback.print_exc()
             time.sleep(10)  # Wait and continue to next PDF
 
+    journal.compact()
     print("All done!")
 
 
@@ -0,0 +1,158 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# On-disk HTTP response cache for the scrapers (used through http_fetch).
+#
+# One entry per URL: <key>.body holds the response body, <key>.json the URL,
+# status, ETag, Last-Modified, Content-Type and fetch / check times. With a
+# cache, http_fetch revalidates with If-None-Match / If-Modified-Since (a
+# 304 serves the stored body), skips the network for entries checked within
+# max_age seconds, and in offline mode replays the cache without any request:
+#
+#   fetch_all(urls, cache=ResponseCache(), cache_mode="offline")
+#
+#   python http_cache.py stats
+#   python http_cache.py purge --host www.sssc.or.jp
+#   python http_cache.py purge --older-than 30     # days since last check
+#   python http_cache.py purge --all
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, "http_cache")
+STORED_HEADERS = ["ETag", "Last-Modified", "Content-Type"]
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+
+    def _base(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, key[:2], key)
+
+    def body_path(self, url):
+        return self._base(url) + ".body"
+
+    def get(self, url):
+        """Metadata of the cached response, or None."""
+        base = self._base(url)
+        try:
+            with open(base + ".json", "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("url") != url or not os.path.exists(base + ".body"):
+            return None
+        return entry
+
+    def read_body(self, url):
+        with open(self.body_path(url), "rb") as f:
+            return f.read()
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("ETag"):
+            headers["If-None-Match"] = entry["ETag"]
+        if entry.get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["Last-Modified"]
+        return headers
+
+    def _write_meta(self, url, entry):
+        path = self._base(url) + ".json"
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def store(self, url, status, headers, body=None, source_path=None):
+        """Stores a response from bytes or from an already downloaded file."""
+        base = self._base(url)
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        tmp_path = base + ".body.tmp"
+        if source_path is not None:
+            shutil.copyfile(source_path, tmp_path)
+        else:
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+        os.replace(tmp_path, base + ".body")
+        now = time.time()
+        entry = {"url": url, "status": status, "fetched_at": now, "checked_at": now, "size": os.path.getsize(base + ".body")}
+        # Header names are case-insensitive ("ETag" arrives as "Etag" from some servers)
+        received = {name.lower(): value for name, value in headers.items()}
+        entry.update({name: received[name.lower()] for name in STORED_HEADERS if received.get(name.lower())})
+        self._write_meta(url, entry)
+        return entry
+
+    def touch(self, url, entry):
+        """Marks a cached entry as revalidated (304) now."""
+        entry["checked_at"] = time.time()
+        self._write_meta(url, entry)
+
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    try:
+                        with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+                            yield json.load(f)
+                    except (OSError, ValueError):
+                        continue
+
+    def stats(self):
+        hosts = Counter()
+        host_bytes = Counter()
+        for entry in self.entries():
+            host = urlsplit(entry["url"]).netloc
+            hosts[host] += 1
+            host_bytes[host] += entry.get("size", 0)
+        return {"entries": sum(hosts.values()), "bytes": sum(host_bytes.values()), "hosts": hosts, "host_bytes": host_bytes}
+
+    def purge(self, host=None, url=None, older_than=None):
+        """Deletes matching entries (all of them without filters). Returns the count."""
+        cutoff = time.time() - older_than if older_than is not None else None
+        removed = 0
+        for entry in list(self.entries()):
+            if host is not None and urlsplit(entry["url"]).netloc != host:
+                continue
+            if url is not None and entry["url"] != url:
+                continue
+            if cutoff is not None and entry.get("checked_at", 0) >= cutoff:
+                continue
+            base = self._base(entry["url"])
+            for path in (base + ".body", base + ".json"):
+                if os.path.exists(path):
+                    os.remove(path)
+            removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or purge the scraper HTTP cache.")
+    parser.add_argument("--dir", default=CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="Entries and bytes per host")
+    purge_parser = sub.add_parser("purge", help="Delete cached responses")
+    purge_parser.add_argument("--host")
+    purge_parser.add_argument("--url")
+    purge_parser.add_argument("--older-than", type=float, help="Days since the entry was last checked")
+    purge_parser.add_argument("--all", action="store_true", help="Required to purge without filters")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.dir)
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"{stats['entries']} responses, {stats['bytes'] / 1024 / 1024:.1f} MB in {args.dir}")
+        for host, count in stats["hosts"].most_common():
+            print(f"  {host}: {count} ({stats['host_bytes'][host] / 1024 / 1024:.1f} MB)")
+    else:
+        if not (args.host or args.url or args.older_than is not None or args.all):
+            parser.error("purge needs --host, --url, --older-than or --all")
+        older_than = args.older_than * 86400 if args.older_than is not None else None
+        print(f"Purged {cache.purge(args.host, args.url, older_than)} responses.")
@@ -0,0 +1,253 @@
+import asyncio
+import os
+import random
+import shutil
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_cache import STORED_HEADERS
+
+# Shared HTTP fetch layer for the scrapers.
+#
+# One aiohttp session per batch: keep-alive connections pooled per host,
+# at most `concurrency` requests in flight (`per_host` per host), request
+# starts to the same host spaced by `host_interval` seconds (politeness),
+# retries with jittered exponential backoff on connection errors, timeouts
+# and 429/5xx, and downloads streamed to disk. Scripts submit whole batches:
+#
+#   pages = fetch_all(urls)                       # [FetchResult], same order
+#   html = pages[0].text() if pages[0].ok else None
+#   download_all([(pdf_url, local_path), ...])
+#
+# Inside async code use the Fetcher directly:
+#
+#   async with Fetcher(concurrency=8) as fetcher:
+#       results = await fetcher.fetch_all(urls)
+#
+# With cache=ResponseCache() (http_cache.py) 200 responses are kept on disk
+# and cached URLs are revalidated with If-None-Match / If-Modified-Since; a
+# 304 is answered from the cache. max_age skips revalidation for entries
+# checked that recently. cache_mode="offline" (or HTTP_CACHE_MODE=offline in
+# the environment) replays the cache without any request, so parser work
+# runs at disk speed; uncached URLs then fail with an error result.
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+# Japanese government / exam sites still serve Shift_JIS without a charset
+FALLBACK_ENCODINGS = ["utf-8", "cp932", "euc_jp"]
+CACHE_MODES = ["revalidate", "offline"]
+
+
+class FetchResult:
+    def __init__(self, url, status=None, body=None, headers=None, path=None, error=None, attempts=0, cached=None):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.path = path
+        self.error = error
+        self.attempts = attempts
+        # None: from the network, "hit": served from the cache, "revalidated": 304
+        self.cached = cached
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and 200 <= self.status < 300
+
+    def text(self, encoding=None):
+        """Body decoded with the given / declared charset, else the first encoding that fits."""
+        if self.body is None:
+            return None
+        content_type = self.headers.get("Content-Type", "")
+        declared = content_type.split("charset=")[-1].strip() if "charset=" in content_type else None
+        for candidate in [encoding, declared] + FALLBACK_ENCODINGS:
+            if not candidate:
+                continue
+            try:
+                return self.body.decode(candidate)
+            except (UnicodeDecodeError, LookupError):
+                continue
+        return self.body.decode("utf-8", errors="replace")
+
+    def __repr__(self):
+        return f"FetchResult({self.url!r}, status={self.status}, error={self.error!r})"
+
+
+class Fetcher:
+    def __init__(
+        self,
+        concurrency=8,
+        per_host=4,
+        host_interval=0.25,
+        retries=3,
+        backoff=1.0,
+        timeout=30,
+        headers=None,
+        cache=None,
+        cache_mode=None,
+        max_age=0,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_interval = host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.cache = cache
+        self.cache_mode = cache_mode or os.environ.get("HTTP_CACHE_MODE", "revalidate")
+        if self.cache_mode not in CACHE_MODES:
+            raise ValueError(f"cache_mode must be one of {CACHE_MODES}, not {self.cache_mode!r}")
+        self.max_age = max_age
+        self.stats = {"requests": 0, "retries": 0, "failed": 0, "bytes": 0, "cache_hits": 0, "revalidated": 0}
+        self._session = None
+        self._slots = None
+        self._host_locks = {}
+        self._host_next = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def _wait_turn(self, host):
+        if self.host_interval <= 0:
+            return
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._host_next.get(host, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._host_next[host] = time.monotonic() + self.host_interval
+
+    def _retry_delay(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2**attempt) * random.uniform(0.5, 1.5)
+
+    async def _request(self, url, read, replay):
+        """GETs url with retries; read(response) turns a successful response into a
+        FetchResult, replay(entry) does the same for the cached response."""
+        entry = self.cache.get(url) if self.cache is not None else None
+        if self.cache is not None and self.cache_mode == "offline":
+            if entry is None:
+                self.stats["failed"] += 1
+                return FetchResult(url, error="not in the HTTP cache (offline)")
+            self.stats["cache_hits"] += 1
+            return replay(entry, "hit")
+        if entry is not None and time.time() - entry["checked_at"] < self.max_age:
+            self.stats["cache_hits"] += 1
+            return replay(entry, "hit")
+        conditional = self.cache.conditional_headers(entry) if entry is not None else {}
+
+        host = urlsplit(url).netloc
+        result = None
+        async with self._slots:
+            for attempt in range(self.retries + 1):
+                await self._wait_turn(host)
+                self.stats["requests"] += 1
+                retry_after = None
+                try:
+                    async with self._session.get(url, headers=conditional) as response:
+                        if response.status == 304 and entry is not None:
+                            self.cache.touch(url, entry)
+                            self.stats["revalidated"] += 1
+                            result = replay(entry, "revalidated")
+                            result.attempts = attempt + 1
+                            return result
+                        if response.status in RETRY_STATUSES and attempt < self.retries:
+                            retry_after = response.headers.get("Retry-After")
+                            result = FetchResult(url, response.status, attempts=attempt + 1)
+                        else:
+                            result = await read(response)
+                            result.attempts = attempt + 1
+                            return result
+                except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                    result = FetchResult(url, error=f"{type(e).__name__}: {e}", attempts=attempt + 1)
+                    if attempt == self.retries:
+                        break
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._retry_delay(attempt, retry_after))
+        self.stats["failed"] += 1
+        return result
+
+    def _cached_headers(self, entry):
+        return {name: entry[name] for name in STORED_HEADERS if name in entry}
+
+    async def fetch(self, url):
+        async def read(response):
+            body = await response.read()
+            self.stats["bytes"] += len(body)
+            headers = dict(response.headers)
+            if self.cache is not None and response.status == 200:
+                self.cache.store(url, response.status, headers, body=body)
+            return FetchResult(url, response.status, body, headers)
+
+        def replay(entry, how):
+            return FetchResult(url, entry["status"], self.cache.read_body(url), self._cached_headers(entry), cached=how)
+
+        return await self._request(url, read, replay)
+
+    async def download(self, url, path):
+        """Streams url to path (atomically); non-2xx responses leave path untouched."""
+
+        async def read(response):
+            if not 200 <= response.status < 300:
+                return FetchResult(url, response.status, headers=dict(response.headers))
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = path + ".part"
+            with open(tmp_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    f.write(chunk)
+                    self.stats["bytes"] += len(chunk)
+            os.replace(tmp_path, path)
+            headers = dict(response.headers)
+            if self.cache is not None and response.status == 200:
+                self.cache.store(url, response.status, headers, source_path=path)
+            return FetchResult(url, response.status, headers=headers, path=path)
+
+        def replay(entry, how):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = path + ".part"
+            shutil.copyfile(self.cache.body_path(url), tmp_path)
+            os.replace(tmp_path, path)
+            return FetchResult(url, entry["status"], headers=self._cached_headers(entry), path=path, cached=how)
+
+        return await self._request(url, read, replay)
+
+    async def fetch_all(self, urls):
+        return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    async def download_all(self, items):
+        return await asyncio.gather(*(self.download(url, path) for url, path in items))
+
+
+def fetch_all(urls, **options):
+    """Fetches every URL; results are in input order."""
+
+    async def run():
+        async with Fetcher(**options) as fetcher:
+            return await fetcher.fetch_all(list(urls))
+
+    return asyncio.run(run())
+
+
+def download_all(items, **options):
+    """Streams (url, path) pairs to disk; results are in input order."""
+
+    async def run():
+        async with Fetcher(**options) as fetcher:
+            return await fetcher.download_all(list(items))
+
+    return asyncio.run(run())
@@ -0,0 +1,146 @@
+import json
+import os
+
+# Streaming reader/writer for the master JSON files (one top-level array).
+#
+# iter_json_array() yields array elements one at a time from a fixed-size
+# read buffer, and JsonArrayWriter writes records as they come, so stages
+# that only filter or map records keep peak memory flat no matter how large
+# the corpus grows. Output is byte-identical to json.dump(list, ...).
+
+READ_CHUNK = 1 << 16
+# Minified output (no spaces after ',' and ':')
+COMPACT_SEPARATORS = (",", ":")
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = ",]" + _WHITESPACE
+
+
+def iter_json_array(path, chunk_size=READ_CHUNK):
+    """Yields the elements of the top-level JSON array in `path`."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != "[":
+            raise ValueError(f"{path}: expected a JSON array")
+        pos += 1
+
+        expect_value = True
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError(f"{path}: unexpected end of file")
+            ch = buf[pos]
+            if ch == "]":
+                return
+            if not expect_value:
+                if ch != ",":
+                    raise ValueError(f"{path}: expected ',' at offset {pos}")
+                pos += 1
+                expect_value = True
+                continue
+
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    fill()
+                    continue
+                # A number cut off by the buffer edge ("3." of "3.5e10") still
+                # decodes, so only accept a value followed by a delimiter.
+                if not eof and (end >= len(buf) or buf[end] not in _DELIMITERS):
+                    fill()
+                    continue
+                break
+
+            yield value
+            pos = end
+            expect_value = False
+            # Drop consumed text so the buffer stays about one record long
+            if pos > chunk_size:
+                buf = buf[pos:]
+                pos = 0
+
+
+def iter_json_arrays(paths, chunk_size=READ_CHUNK):
+    """Yields (path, record) over several array files, skipping missing ones."""
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        for record in iter_json_array(path, chunk_size):
+            yield path, record
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one record at a time (atomically replaced on close).
+
+    with JsonArrayWriter(path, indent=2) as out:
+        for q in records:
+            out.write(q)
+    """
+
+    def __init__(self, path, indent=None, separators=None):
+        self.path = path
+        self.indent = indent
+        self.separators = separators
+        self.count = 0
+        self._tmp_path = path + ".tmp"
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self._tmp_path, "w", encoding="utf-8")
+        self._f.write("[")
+        return self
+
+    def write(self, record):
+        text = json.dumps(
+            record, ensure_ascii=False, indent=self.indent, separators=self.separators
+        )
+        if self.indent is None:
+            if self.count:
+                self._f.write(self.separators[0] if self.separators else ", ")
+            self._f.write(text)
+        else:
+            pad = " " * self.indent
+            item_separator = self.separators[0] if self.separators else ","
+            self._f.write(item_separator + "\n" if self.count else "\n")
+            self._f.write(pad + text.replace("\n", "\n" + pad))
+        self.count += 1
+
+    def write_all(self, records):
+        for record in records:
+            self.write(record)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._f.close()
+            os.remove(self._tmp_path)
+            return False
+        if self.indent is not None and self.count:
+            self._f.write("\n")
+        self._f.write("]")
+        self._f.close()
+        os.replace(self._tmp_path, self.path)
+        return False
@@ -1,43 +1,41 @@
 import os
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from http_cache import ResponseCache
+from http_fetch import download_all, fetch_all
+
 URL = "https://www.sssc.or.jp/kaigo/past_exam/index.html"
 TARGET_DIR = "source/kaigo_pdfs"
 TARGET_SESSIONS = ["no37", "no36", "no35", "no34", "no33"]
+FETCH_OPTIONS = {"concurrency": 4, "per_host": 2, "host_interval": 0.3, "cache": ResponseCache()}
 
 
-def download_file(url, folder):
-    if not os.path.exists(folder):
-        os.makedirs(folder, exist_ok=True)
-    local_filename = os.path.join(folder, os.path.basename(urlparse(url).path))
-    print(f"Downloading {url} to {local_filename}...")
-    try:
-        with requests.get(url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_filename, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        print("Done.")
-    except Exception as e:
-        print(f"Failed to download {url}: {e}")
+def download_files(items):
+    """Streams (url, folder) pairs to disk as one batch. Returns the number downloaded."""
+    targets = [(url, os.path.join(folder, os.path.basename(urlparse(url).path))) for url, folder in items]
+    for url, local_filename in targets:
+        print(f"Downloading {url} to {local_filename}...")
+    results = download_all(targets, **FETCH_OPTIONS)
+    for result in results:
+        if result.ok:
+            print(f"Done: {result.path}")
+        else:
+            print(f"Failed to download {result.url}: {result.error or result.status}")
+    return sum(1 for result in results if result.ok)
 
 
 def main():
     print(f"Fetching {URL}...")
-    try:
-        r = requests.get(URL)
-        r.raise_for_status()
-        r.encoding = r.apparent_encoding
-    except Exception as e:
-        print(f"Failed: {e}")
+    index = fetch_all([URL], **FETCH_OPTIONS)[0]
+    if not index.ok:
+        print(f"Failed: {index.error or index.status}")
         return
 
-    soup = BeautifulSoup(r.text, "html.parser")
+    soup = BeautifulSoup(index.text(), "html.parser")
     links = soup.find_all("a", href=True)
 
-    count = 0
+    downloads = []
     for link in links:
         href = link["href"]
         full_url = urljoin(URL, href)
@@ -61,9 +59,9 @@ def main():
             # Answer keys: k_kijun_seitou, etc. (we might need these too)
             if "kijun_seitou" in filename or filename.startswith("k_"):
                 save_dir = os.path.join(TARGET_DIR, session_id)
-                download_file(full_url, save_dir)
-                count += 1
+                downloads.append((full_url, save_dir))
 
+    count = download_files(downloads)
     print(f"Total Kaigo files downloaded: {count}")
 
 
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import random
+import zlib
+
+from json_stream import iter_json_arrays
+from question_ids import normalize_text
+
+# Near-duplicate detection across question sources (MinHash + LSH banding).
+#
+# Exact-text dedup misses generated questions that differ only in punctuation
+# or a word. Each record is reduced to the character n-gram shingles of its
+# normalized question text and options; a MinHash signature estimates the
+# Jaccard similarity of two shingle sets, and LSH banding buckets signatures
+# so only records agreeing on a whole band become candidates. Candidates are
+# verified against the exact shingle Jaccard and joined into clusters, so the
+# cost grows with the corpus plus the candidate pairs, never with all pairs.
+#
+#   index = NearDuplicateIndex(threshold=0.8)
+#   for key, record in records:
+#       index.add(key, record)
+#   for cluster in index.clusters():   # [key, ...], representative first
+#       ...
+#
+#   python near_duplicates.py report --threshold 0.8 --output near_duplicates.json
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(BASE_DIR, "..", "app", "assets")
+PUBLIC_DIR = os.path.join(BASE_DIR, "..", "app", "public")
+
+# Master files and generator outputs (missing files are skipped)
+DEFAULT_SOURCES = [
+    os.path.join(ASSETS_DIR, "master_data.json"),
+    os.path.join(ASSETS_DIR, "master_database_v3.json"),
+    os.path.join(ASSETS_DIR, "master_database_v10_normalized.json"),
+    os.path.join(ASSETS_DIR, "mental_special.json"),
+    os.path.join(PUBLIC_DIR, "mental_special_generated.json"),
+    os.path.join(BASE_DIR, "sssc_official_questions.json"),
+    os.path.join(BASE_DIR, "social_r6.json"),
+]
+
+DEFAULT_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# Texts shorter than this have too few shingles for a meaningful estimate
+MIN_TEXT_LENGTH = 10
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def record_text(record):
+    question = record.get("question_text") or record.get("questionText") or ""
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [options]
+    return normalize_text(question) + "".join(normalize_text(o) for o in options)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Set of 32-bit hashes of the character n-grams of `text`."""
+    if len(text) <= size:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {zlib.crc32(text[i : i + size].encode("utf-8")) for i in range(len(text) - size + 1)}
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_params(threshold, num_perm):
+    """(bands, rows) whose S-curve midpoint (1/b)^(1/r) sits just below threshold.
+
+    Erring low favours recall; false candidates are dropped by verification.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint <= threshold and (best is None or midpoint > best[0]):
+            best = (midpoint, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+
+class MinHasher:
+    """One-permutation MinHash: one hash per shingle, split into num_perm bins.
+
+    Each shingle hash is mixed once and lands in one bin, which keeps the
+    smallest value; empty bins borrow from the next non-empty bin (rotation
+    densification). Cost is O(shingles) rather than O(shingles * num_perm).
+    """
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self._a = rng.randrange(1, _MERSENNE_PRIME)
+        self._b = rng.randrange(0, _MERSENNE_PRIME)
+
+    def signature(self, hashes):
+        p, a, b, num_perm = _MERSENNE_PRIME, self._a, self._b, self.num_perm
+        bins = [None] * num_perm
+        for x in hashes:
+            h = (a * x + b) % p
+            slot, value = h % num_perm, h // num_perm
+            current = bins[slot]
+            if current is None or value < current:
+                bins[slot] = value
+        if None in bins:
+            for slot in range(num_perm):
+                if bins[slot] is None:
+                    for distance in range(1, num_perm):
+                        borrowed = bins[(slot + distance) % num_perm]
+                        if borrowed is not None:
+                            # Offset keeps borrowed values distinct from real ones
+                            bins[slot] = ("r", distance, borrowed)
+                            break
+        return tuple(bins)
+
+
+class NearDuplicateIndex:
+    """Groups records whose shingle Jaccard similarity reaches `threshold`."""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Threshold must be in (0, 1]: {threshold}")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        self._hasher = MinHasher(num_perm)
+        self._keys = []
+        self._shingles = []
+        self._buckets = [{} for _ in range(self.bands)]
+        self._parent = []
+        self.candidate_pairs = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _find(self, i):
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def add(self, key, record):
+        """Indexes one record; returns False when it has too little text."""
+        text = record_text(record)
+        if len(text) < MIN_TEXT_LENGTH:
+            return False
+        hashes = shingles(text, self.shingle_size)
+        signature = self._hasher.signature(hashes)
+
+        index = len(self._keys)
+        self._keys.append(key)
+        self._shingles.append(hashes)
+        self._parent.append(index)
+
+        compared = set()
+        rows = self.rows
+        for band, buckets in enumerate(self._buckets):
+            bucket = buckets.setdefault(signature[band * rows : (band + 1) * rows], [])
+            for other in bucket:
+                if other in compared:
+                    continue
+                compared.add(other)
+                self.candidate_pairs += 1
+                root, other_root = self._find(index), self._find(other)
+                if root == other_root:
+                    continue
+                if jaccard(hashes, self._shingles[other]) >= self.threshold:
+                    # Lower index stays root: clusters are rooted at first-added
+                    self._parent[max(root, other_root)] = min(root, other_root)
+            bucket.append(index)
+        return True
+
+    def clusters(self, rank=None):
+        """Lists of keys with more than one member, representative first.
+
+        `rank(key)` orders members (lowest is the representative); by default
+        the first-added record wins, so list sources in priority order.
+        """
+        groups = {}
+        for index in range(len(self._keys)):
+            groups.setdefault(self._find(index), []).append(self._keys[index])
+        result = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            if rank is not None:
+                members.sort(key=rank)
+            result.append(members)
+        return result
+
+
+def completeness_rank(record):
+    """Prefers records with an answer and the longest explanation."""
+    explanation = record.get("explanation") or ""
+    has_answer = bool(record.get("correct_answer") or record.get("correctAnswer"))
+    return (not has_answer, -len(explanation))
+
+
+def find_near_duplicates(paths, threshold=DEFAULT_THRESHOLD):
+    """Streams `paths` into an index; returns (index, clusters, records by key)."""
+    index = NearDuplicateIndex(threshold)
+    records = {}
+    positions = {}
+    for path, record in iter_json_arrays(paths):
+        position = positions[path] = positions.get(path, -1) + 1
+        if not isinstance(record, dict):
+            continue
+        key = (path, position)
+        if index.add(key, record):
+            records[key] = record
+    order = {path: i for i, path in enumerate(paths)}
+    clusters = index.clusters(
+        rank=lambda key: completeness_rank(records[key]) + (order[key[0]], key[1])
+    )
+    return index, clusters, records
+
+
+def report(paths, threshold, output):
+    index, clusters, records = find_near_duplicates(paths, threshold)
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(
+        f"Indexed {len(index):,} records (bands={index.bands}, rows={index.rows}, "
+        f"{index.candidate_pairs:,} candidate pairs)"
+    )
+    print(f"Found {len(clusters):,} clusters, {duplicates:,} redundant records at >= {threshold}")
+
+    def member(key):
+        path, position = key
+        record = records[key]
+        return {
+            "file": os.path.relpath(path, BASE_DIR),
+            "index": position,
+            "id": record.get("id"),
+            "question_text": record.get("question_text") or record.get("questionText"),
+        }
+
+    result = {
+        "threshold": threshold,
+        "records": len(index),
+        "clusters": [
+            {
+                "representative": member(keys[0]),
+                "duplicates": [member(k) for k in keys[1:]],
+            }
+            for keys in sorted(clusters, key=len, reverse=True)
+        ],
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find near-duplicate questions across sources.")
+    parser.add_argument("command", nargs="?", default="report", choices=["report"])
+    parser.add_argument("paths", nargs="*", help="JSON array files (default: masters + generator outputs)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--output", default=os.path.join(BASE_DIR, "near_duplicates.json"))
+    args = parser.parse_args()
+
+    report(args.paths or DEFAULT_SOURCES, args.threshold, args.output)
@@ -0,0 +1,188 @@
+import hashlib
+import json
+from collections import deque
+
+# Multi-pattern classification of question records.
+#
+# All rule patterns (folder codes, category keyword aliases, ...) are compiled
+# into one Aho-Corasick automaton, so each relevant field is scanned once in
+# O(len(field) + matches) no matter how many rules there are. Every rule has a
+# priority (lower wins) and the fields it applies to; classify() returns the
+# matching rule with the best priority:
+#
+#   classifier = PatternClassifier()
+#   classifier.add_rule("SW専1", "福祉サービスの組織と経営", priority=0, fields=METADATA)
+#   classifier.add_rule("医学", "保健医療と福祉", priority=100, fields=["category_label"])
+#   label, priority = classifier.classify(record) or (None, None)
+
+# Question content, never needed for routing (and the bulk of each record)
+CONTENT_FIELDS = frozenset(
+    [
+        "question_text",
+        "questionText",
+        "options",
+        "correct_answer",
+        "correctAnswer",
+        "explanation",
+    ]
+)
+# fields=METADATA: every field except the question content
+METADATA = None
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton compiled to a DFA (one dict lookup per character)."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        goto = [{}]
+        outputs = [[]]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Empty pattern")
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(index)
+
+        # Breadth-first: resolve failure links into full transitions, so
+        # scanning never follows a failure chain.
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, target in delta[fail[state]].items():
+                delta[state].setdefault(ch, target)
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._outputs = [tuple(out) for out in outputs]
+        self._first_chars = frozenset(goto[0])
+
+    def matched(self, text):
+        """Set of pattern indexes occurring in text."""
+        # Most fields (IDs, group names) share no character with any
+        # pattern start; skip them without walking the automaton.
+        if self._first_chars.isdisjoint(text):
+            return ()
+        delta = self._delta
+        outputs = self._outputs
+        found = set()
+        state = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class PatternClassifier:
+    """Routes records to labels by the best-priority pattern found in their fields."""
+
+    # Labels and source paths repeat across thousands of records, so per-text
+    # matches are memoized (the cache is reset when it reaches this size).
+    CACHE_SIZE = 1 << 16
+
+    def __init__(self):
+        self._rules = []  # (pattern, label, priority, fields)
+        self._automaton = None
+        self._cache = {}
+
+    def add_rule(self, pattern, label, priority, fields=METADATA):
+        self._rules.append((pattern, label, priority, None if fields is None else frozenset(fields)))
+        self._automaton = None
+
+    def add_rules(self, pairs, priority_start, fields=METADATA):
+        """Adds (pattern, label) pairs with increasing priority, in order."""
+        for offset, (pattern, label) in enumerate(pairs):
+            self.add_rule(pattern, label, priority_start + offset, fields)
+
+    def compile(self):
+        patterns = []
+        self._pattern_rules = []
+        index_of = {}
+        for rule_index, (pattern, _, _, _) in enumerate(self._rules):
+            if pattern not in index_of:
+                index_of[pattern] = len(patterns)
+                patterns.append(pattern)
+                self._pattern_rules.append([])
+            self._pattern_rules[index_of[pattern]].append(rule_index)
+
+        named = set()
+        self._scan_metadata = False
+        for _, _, _, fields in self._rules:
+            if fields is None:
+                self._scan_metadata = True
+            else:
+                named.update(fields)
+        self._named_fields = frozenset(named)
+        self._automaton = AhoCorasick(patterns)
+        self._cache = {}
+        return self
+
+    def _matched(self, text):
+        found = self._cache.get(text)
+        if found is None:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            found = self._cache[text] = self._automaton.matched(text)
+        return found
+
+    def _fields(self, record):
+        """Yields (field, text) for each field some rule looks at."""
+        if self._scan_metadata:
+            fields = [f for f in record if f not in CONTENT_FIELDS or f in self._named_fields]
+        else:
+            fields = self._named_fields
+        for field in fields:
+            value = record.get(field)
+            if value is None or value == "":
+                continue
+            yield field, value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    def classify(self, record):
+        """Returns (label, priority) of the best matching rule, or None."""
+        match = self.classify_rule(record)
+        return match[:2] if match else None
+
+    def classify_rule(self, record):
+        """Returns (label, priority, pattern) of the best matching rule, or None."""
+        if self._automaton is None:
+            self.compile()
+        best = None
+        for field, text in self._fields(record):
+            for pattern_index in self._matched(text):
+                for rule_index in self._pattern_rules[pattern_index]:
+                    pattern, label, priority, fields = self._rules[rule_index]
+                    if fields is not None and field not in fields:
+                        continue
+                    if best is None or priority < best[1]:
+                        best = (label, priority, pattern)
+        return best
+
+    def fingerprint(self, record):
+        """Hash of exactly the fields classify() reads (question content is ignored)."""
+        if self._automaton is None:
+            self.compile()
+        pairs = sorted(self._fields(record))
+        payload = json.dumps(pairs, ensure_ascii=False).encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+    def rules_version(self):
+        """Hash of the rule table; changes whenever a rule is added or edited."""
+        rules = [
+            [pattern, label, priority, None if fields is None else sorted(fields)]
+            for pattern, label, priority, fields in self._rules
+        ]
+        payload = json.dumps(rules, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
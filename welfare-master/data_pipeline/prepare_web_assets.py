@@ -1,7 +1,14 @@
+import collections
 import json
 import os
 import shutil
 
+from asset_manifest import AssetManifest
+from classification_cache import ClassificationCache
+from dedup_index import DedupIndex
+from json_stream import iter_json_array
+from pattern_classifier import METADATA, PatternClassifier
+
 # Paths
 # Assuming running from data_pipeline directory
 ASSETS_DIR = "../app/assets"
@@ -13,6 +20,51 @@ FLASHCARDS = os.path.join(ASSETS_DIR, "flashcards.json")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SSSC_PAST = os.path.join(BASE_DIR, "sssc_official_questions.json")
 SOCIAL_R6 = os.path.join(BASE_DIR, "social_r6.json")
+SOCIAL_SPEC_CACHE = os.path.join(BASE_DIR, "classification_cache_social_spec.json")
+# Routing label stored on kept records by the dedup pass (removed before publishing)
+SOCIAL_SPEC_LABEL = "_social_spec_label"
+
+# Define mapping from Directory Name/Code to Unified Category (Based on user's folder structure)
+SW_FOLDER_MAPPING = {
+    "SW専1": "福祉サービスの組織と経営",
+    "SW専2": "高齢者福祉",
+    "SW専3": "児童・家庭福祉",
+    "SW専4": "貧困に対する支援",
+    "SW専5": "保健医療と福祉",
+    "SW専6": "ソーシャルワークの理論と方法(社会専門)",
+    "SW専7": "ソーシャルワーク演習(社会専門)",
+}
+
+# Define mapping for aggregation/normalization of category names (Fallback)
+SOCIAL_SPEC_KEYWORDS = [
+    ("福祉サービスの組織と経営", "福祉サービスの組織と経営"),
+    ("高齢者福祉", "高齢者福祉"),
+    ("高齢者に対する支援", "高齢者福祉"),
+    ("介護保険制度", "高齢者福祉"),
+    ("児童・家庭福祉", "児童・家庭福祉"),
+    ("児童や家庭に対する支援", "児童・家庭福祉"),
+    ("貧困に対する支援", "貧困に対する支援"),
+    ("低所得者に対する支援", "貧困に対する支援"),
+    ("保健医療と福祉", "保健医療と福祉"),
+    ("保健医療サービス", "保健医療と福祉"),
+    ("保健医療", "保健医療と福祉"),
+    ("医学", "保健医療と福祉"),
+    ("リハビリ", "保健医療と福祉"),
+    ("ソーシャルワークの理論と方法", "ソーシャルワークの理論と方法(社会専門)"),
+    ("ソーシャルワーク演習", "ソーシャルワーク演習(社会専門)"),
+    ("児童", "児童・家庭福祉"),
+    ("家庭福祉", "児童・家庭福祉"),
+]
+
+
+def social_spec_classifier():
+    # Folder codes win over category keywords (earlier entries win within
+    # each list). Folder codes are looked up in every non-content field
+    # (path, source, labels), keywords in category_label only.
+    classifier = PatternClassifier()
+    classifier.add_rules(SW_FOLDER_MAPPING.items(), priority_start=0, fields=METADATA)
+    classifier.add_rules(SOCIAL_SPEC_KEYWORDS, priority_start=100, fields=["category_label"])
+    return classifier.compile()
 
 
 def load_json(path):
@@ -21,11 +73,11 @@ def load_json(path):
         return json.load(f)
 
 
-def save_json(data, path):
-    print(f"Saving {len(data)} items to {path}...")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
-    print(f"Saved {path} ({os.path.getsize(path) / 1024 / 1024:.2f} MB)")
+def save_group(manifest, group, data, legacy_name=None, legacy_shard_pattern=None):
+    # Byte-budgeted, content-hashed shards + manifest entry
+    # (legacy names kept for old clients and local scripts)
+    print(f"Saving {len(data)} items to group '{group}'...")
+    manifest.publish_records(group, data, legacy_name, legacy_shard_pattern)
 
 
 def main():
@@ -35,17 +87,19 @@ def main():
     if not os.path.exists(PUBLIC_DIR):
         os.makedirs(PUBLIC_DIR)
 
+    manifest = AssetManifest(PUBLIC_DIR)
+
     # 1. Process Master Data -> Extract Common
     if os.path.exists(MASTER_DATA):
-        master = load_json(MASTER_DATA)
-        # Filter for common subjects
+        # Filter for common subjects (streamed, the full master is never held in memory)
+        print(f"Streaming {MASTER_DATA}...")
         common_questions = [
             q
-            for q in master
+            for q in iter_json_array(MASTER_DATA)
             if q.get("group", "").startswith("common")
             or q.get("group_id", "").startswith("common")
         ]
-        save_json(common_questions, os.path.join(PUBLIC_DIR, "web_common.json"))
+        save_group(manifest, "common", common_questions, "web_common.json")
     else:
         print("Master data not found!")
 
@@ -56,7 +110,7 @@ def main():
         for q in past:
             if not q.get("group"):
                 q["group"] = "past_mental"
-        save_json(past, os.path.join(PUBLIC_DIR, "web_past_mental.json"))
+        save_group(manifest, "past_mental", past, "web_past_mental.json")
     else:
         print("Mental Past Questions not found!")
 
@@ -64,7 +118,7 @@ def main():
     # 3. Flashcards
     if os.path.exists(FLASHCARDS):
         cards = load_json(FLASHCARDS)
-        save_json(cards, os.path.join(PUBLIC_DIR, "web_cards.json"))
+        save_group(manifest, "cards", cards, "web_cards.json")
     else:
         print("Flashcards not found!")
 
@@ -73,21 +127,18 @@ def main():
     if os.path.exists(MENTAL_SPECIAL):
         print("Processing Mental Special...")
         special = load_json(MENTAL_SPECIAL)
-        # Split into chunks of 1000 questions to match web memory limits
-        chunk_size = 1000
-        total_chunks = (len(special) + chunk_size - 1) // chunk_size
-        print(f"Splitting {len(special)} items into {total_chunks} chunks...")
-
-        for i in range(total_chunks):
-            start = i * chunk_size
-            end = start + chunk_size
-            chunk = special[start:end]
-            # Ensure group is set
-            for q in chunk:
-                if not q.get("group") and not q.get("group_id"):
-                    q["group"] = "spec_mental"
-
-            save_json(chunk, os.path.join(PUBLIC_DIR, f"web_spec_mental_{i}.json"))
+        # Ensure group is set
+        for q in special:
+            if not q.get("group") and not q.get("group_id"):
+                q["group"] = "spec_mental"
+
+        # Split into shards under the compressed-byte budget (web memory limits)
+        save_group(
+            manifest,
+            "spec_mental",
+            special,
+            legacy_shard_pattern="web_spec_mental_{}.json",
+        )
     else:
         print("Mental Special not found!")
 
@@ -104,7 +155,7 @@ def main():
             if "id" not in q_copy:
                 q_copy["id"] = f"social_past_{i}"
             past_social.append(q_copy)
-        save_json(past_social, os.path.join(PUBLIC_DIR, "web_past_social.json"))
+        save_group(manifest, "past_social", past_social, "web_past_social.json")
 
         # 2. Specialized Subject Mode (Group by Category)
         # Use simple past questions fallback if extraction fails, but try extracting from Master first.
@@ -122,113 +173,71 @@ def main():
             "../app/assets/master_database_v10_normalized.json",  # Another large backup
         ]
 
-        master = []
-        seen_texts = set()
-
-        print("Loading and merging master data sources...")
-        for mf in master_files:
-            if os.path.exists(mf):
-                print(f"  Loading {mf}...")
-                try:
-                    data = load_json(mf)
-                    count_added = 0
-                    for item in data:
-                        # Deduplicate by question text content
-                        q_text = item.get("question_text", "")
-                        if q_text and len(q_text) > 10:
-                            if q_text not in seen_texts:
-                                master.append(item)
-                                seen_texts.add(q_text)
-                                count_added += 1
-                    print(f"    Added {count_added} unique items.")
-                except Exception as e:
-                    print(f"    Error loading {mf}: {e}")
-
-        print(f"Total unique questions loaded: {len(master)}")
-
-        # Define mapping from Directory Name/Code to Unified Category (Based on user's folder structure)
-        sw_folder_mapping = {
-            "SW専1": "福祉サービスの組織と経営",
-            "SW専2": "高齢者福祉",
-            "SW専3": "児童・家庭福祉",
-            "SW専4": "貧困に対する支援",
-            "SW専5": "保健医療と福祉",
-            "SW専6": "ソーシャルワークの理論と方法(社会専門)",
-            "SW専7": "ソーシャルワーク演習(社会専門)",
-        }
-
-        # Define mapping for aggregation/normalization of category names (Fallback)
-        social_spec_keywords = [
-            ("福祉サービスの組織と経営", "福祉サービスの組織と経営"),
-            ("高齢者福祉", "高齢者福祉"),
-            ("高齢者に対する支援", "高齢者福祉"),
-            ("介護保険制度", "高齢者福祉"),
-            ("児童・家庭福祉", "児童・家庭福祉"),
-            ("児童や家庭に対する支援", "児童・家庭福祉"),
-            ("貧困に対する支援", "貧困に対する支援"),
-            ("低所得者に対する支援", "貧困に対する支援"),
-            ("保健医療と福祉", "保健医療と福祉"),
-            ("保健医療サービス", "保健医療と福祉"),
-            ("保健医療", "保健医療と福祉"),
-            ("医学", "保健医療と福祉"),
-            ("リハビリ", "保健医療と福祉"),
-            ("ソーシャルワークの理論と方法", "ソーシャルワークの理論と方法(社会専門)"),
-            ("ソーシャルワーク演習", "ソーシャルワーク演習(社会専門)"),
-            ("児童", "児童・家庭福祉"),
-            ("家庭福祉", "児童・家庭福祉"),
-        ]
+        classifier = social_spec_classifier()
+        # Routing results per record fingerprint; only records whose routing
+        # fields changed (or all of them, after a rule edit) are reclassified
+        class_cache = ClassificationCache(SOCIAL_SPEC_CACHE, classifier.rules_version())
+
+        # Dedup across sources through the persistent index: only sources
+        # whose content changed since the last run are streamed again, and
+        # only their social-spec matches are stored, so peak memory is the
+        # spec_social subset rather than all sources. Each kept record
+        # carries its label, so nothing is classified twice.
+        def keep(q):
+            match = class_cache.classify(classifier, q)
+            if match is None:
+                return False
+            q[SOCIAL_SPEC_LABEL] = match[0]
+            return True
+
+        print("Syncing dedup index over master data sources...")
+        with DedupIndex() as index:
+            index.sync(
+                master_files,
+                keep=keep,
+                keep_version=f"{classifier.rules_version()}:{SOCIAL_SPEC_LABEL}",
+            )
+            for mf, count_new in index.new_texts.items():
+                print(f"  {mf}: {count_new} new questions since the last run.")
+            unique_counts = index.unique_counts()
+            debug_cats = collections.Counter(index.category_counts())
+            candidates = list(index.records())
+
+        total_unique = 0
+        for mf, count_added in unique_counts.items():
+            print(f"  {mf}: {count_added} unique items.")
+            total_unique += count_added
 
         spec_social = []
-        for q in master:
-            # Convert to string to search in ALL fields (path, source, etc.)
-            q_str = json.dumps(q, ensure_ascii=False)
-            matched_label = None
-
-            # 1. Tracing by Folder Name (Strongest evidence)
-            for sw_key, label in sw_folder_mapping.items():
-                if sw_key in q_str:
-                    matched_label = label
-                    break
-
-            # 2. Fallback: Tracing by Category Name
-            if not matched_label:
-                raw_cat = q.get("category_label", "") or ""
-                for key, unified_label in social_spec_keywords:
-                    if key in raw_cat:
-                        matched_label = unified_label
-                        break
-
-            if matched_label:
-                q_copy = q.copy()
-                q_copy["group"] = "spec_social"
-                q_copy["category_label"] = matched_label  # Normalize label
-                # Ensure ID
-                if "id" not in q_copy:
-                    q_copy["id"] = f"soc_spec_{len(spec_social)}"
-                spec_social.append(q_copy)
+        for _, q in candidates:
+            # 1. Folder name (strongest evidence), 2. category name
+            q_copy = q.copy()
+            matched_label = q_copy.pop(SOCIAL_SPEC_LABEL)
+            q_copy["group"] = "spec_social"
+            q_copy["category_label"] = matched_label  # Normalize label
+            # Ensure ID
+            if "id" not in q_copy:
+                q_copy["id"] = f"soc_spec_{len(spec_social)}"
+            spec_social.append(q_copy)
+        class_cache.save()
+
+        print(f"Total unique questions loaded: {total_unique}")
 
         if len(spec_social) > 0:
             print(
                 f"Found {len(spec_social)} social specialized questions (aggregated)."
             )
-            import collections
-
             cats = [x["category_label"] for x in spec_social]
             print("Category Counts:", collections.Counter(cats))
 
             # --- DEBUG: Dump ALL categories ---
-            debug_cats = collections.Counter()
-            for q in master:
-                cat = q.get("category_label", "") or "NO_LABEL"
-                debug_cats[cat] += 1
-
             with open("debug_all_cats.txt", "w", encoding="utf-8") as f:
                 f.write("All Categories in Master Data:\n")
                 for c, count in debug_cats.most_common():
                     f.write(f"{c}: {count}\n")
             # ------------------------------------------------
 
-            save_json(spec_social, os.path.join(PUBLIC_DIR, "web_spec_social.json"))
+            save_group(manifest, "spec_social", spec_social, "web_spec_social.json")
         else:
             print(
                 "No Social Special questions found in Master Data! Fallback to SSSC Past Data..."
@@ -242,13 +251,14 @@ def main():
                     if "id" not in q_c:
                         q_c["id"] = f"soc_spec_fb_{i}"
                     spec_social_fallback.append(q_c)
-                save_json(
-                    spec_social_fallback,
-                    os.path.join(PUBLIC_DIR, "web_spec_social.json"),
+                save_group(
+                    manifest, "spec_social", spec_social_fallback, "web_spec_social.json"
                 )
 
     # Removed old SSSC Special logic to prefer Master Data extraction
 
+    manifest.save()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,150 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+# Central question ID service for the generators.
+#
+# 1. content_id(): a stable ID derived from the normalized question text and
+#    options, so the same question gets the same ID on every run.
+# 2. IdAllocator: O(1) numeric IDs for the legacy numeric ranges. Each
+#    generator leases a block of IDs from id_leases.json under a file lock and
+#    hands them out from memory, so concurrent generators never collide.
+#    IDs left in a block when a run ends are simply skipped.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEASE_FILE = os.path.join(BASE_DIR, "id_leases.json")
+DEFAULT_BLOCK_SIZE = 64
+
+# Legacy numeric ranges (inclusive) per generator
+ID_RANGES = {
+    "spec_social_folder": (20001, 29999),  # generate_quiz_from_folder.py
+    "spec_social": (30001, 39999),  # generate_quiz_large.py
+    "spec_mental": (40001, 89999),  # generate_mental_large.py
+    "common": (100001, 199999),  # generate_quiz_common.py
+}
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    if not isinstance(text, str):
+        text = "" if text is None else str(text)
+    # NFKC folds full-width/half-width variants (（ → (, １ → 1, etc.)
+    text = unicodedata.normalize("NFKC", text)
+    return _WS_RE.sub("", text).lower()
+
+
+def content_key(record):
+    question = record.get("question_text") or record.get("questionText") or ""
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [options]
+    parts = [normalize_text(question)] + [normalize_text(o) for o in options]
+    return "\x1f".join(parts)
+
+
+def content_id(record, prefix="q"):
+    """Stable ID from normalized question text + options, e.g. 'q_1f3a9c0d4b7e2a65'."""
+    digest = hashlib.blake2b(content_key(record).encode("utf-8"), digest_size=8).hexdigest()
+    return f"{prefix}_{digest}"
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Exclusive inter-process lock on `path` (fcntl on POSIX, msvcrt on Windows)."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK gives up after ~10s; keep waiting
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def max_numeric_id(records, start, end):
+    highest = start - 1
+    for record in records:
+        rid = str(record.get("id", ""))
+        if rid.isdigit():
+            value = int(rid)
+            if start <= value <= end and value > highest:
+                highest = value
+    return highest
+
+
+class IdAllocator:
+    """Hands out numeric IDs from a leased block of a named legacy range."""
+
+    def __init__(self, range_name, seed_records=None, block_size=DEFAULT_BLOCK_SIZE, lease_file=LEASE_FILE):
+        if range_name not in ID_RANGES:
+            raise ValueError(f"Unknown ID range: {range_name}")
+        self.range_name = range_name
+        self.start, self.end = ID_RANGES[range_name]
+        self.block_size = block_size
+        self.lease_file = lease_file
+        # Only scanned the first time a range is leased (no lease state yet)
+        self.seed_records = seed_records
+        self._next = 0
+        self._limit = -1
+
+    def _lease_block(self):
+        with locked(self.lease_file + ".lock"):
+            state = {}
+            if os.path.exists(self.lease_file):
+                with open(self.lease_file, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+
+            next_free = state.get(self.range_name)
+            if next_free is None:
+                next_free = max_numeric_id(self.seed_records or [], self.start, self.end) + 1
+                self.seed_records = None
+
+            if next_free > self.end:
+                raise RuntimeError(f"ID range '{self.range_name}' exhausted ({self.start}-{self.end})")
+
+            block_end = min(next_free + self.block_size - 1, self.end)
+            state[self.range_name] = block_end + 1
+
+            tmp_path = self.lease_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.lease_file)
+
+        self._next = next_free
+        self._limit = block_end
+
+    def next_id(self):
+        if self._next > self._limit:
+            self._lease_block()
+        value = self._next
+        self._next += 1
+        return str(value)
+
+    def assign(self, records):
+        """Gives each record a leased numeric 'id' and its stable 'content_id'."""
+        for record in records:
+            record["id"] = self.next_id()
+            record["content_id"] = content_id(record)
+        return records
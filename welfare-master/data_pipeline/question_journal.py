@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+
+from question_ids import locked
+
+# Append-only JSONL write-ahead log for the LLM question generators.
+#
+# Generators append each chunk's new questions to <master>.journal.jsonl
+# (one JSON object per line, fsync'ed per batch) instead of rewriting the whole
+# master file, so the write cost per chunk is proportional to the questions
+# produced. `compact` folds the journal into the master file atomically.
+# Appends and compaction hold an exclusive lock on <journal>.lock, so a batch
+# appended by another generator can't land between compact's read and its
+# truncate (and be lost). A generator that starts from another file's
+# records writes them with `seed` first, since compact only merges into the
+# master file:
+#
+#   python question_journal.py compact ../app/assets/master_database_v3.json
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def journal_path_for(master_path):
+    return master_path + JOURNAL_SUFFIX
+
+
+def fsync_dir(path):
+    # Make the rename itself durable (no-op where directories can't be opened)
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(data, path, indent=2):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+class QuestionJournal:
+    """Master JSON file + append-only journal of questions not yet compacted into it."""
+
+    def __init__(self, master_path, journal_path=None):
+        self.master_path = master_path
+        self.journal_path = journal_path or journal_path_for(master_path)
+        self.lock_path = self.journal_path + ".lock"
+
+    def append(self, records):
+        """Appends one batch of records and fsyncs it. Returns the number written."""
+        if not records:
+            return 0
+        lines = "".join(
+            json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records
+        ).encode("utf-8")
+        with locked(self.lock_path), open(self.journal_path, "ab+") as f:
+            # A kill during a previous append can leave a torn last line;
+            # start on a fresh line so the new batch is still readable.
+            end = f.seek(0, os.SEEK_END)
+            if end > 0:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    lines = b"\n" + lines
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(records)
+
+    def iter_journal(self):
+        """Yields journal records in append order, skipping torn/corrupt lines."""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    print(f"  Warning: skipping unreadable journal line {line_no} in {self.journal_path}")
+
+    def load_master(self):
+        if not os.path.exists(self.master_path):
+            return []
+        with open(self.master_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_all(self):
+        """Master records with the journal applied on top (same result as after compaction)."""
+        return merge_records(self.load_master(), self.iter_journal())
+
+    def seed(self, records, indent=2):
+        """Writes `records` as the master file if there is none yet.
+
+        A generator that starts from another file's records must seed the
+        master first: compact() merges the journal into the master file only,
+        so records that were never written there would be dropped.
+        """
+        with locked(self.lock_path):
+            if os.path.exists(self.master_path):
+                return False
+            write_json_atomic(records, self.master_path, indent=indent)
+        print(f"Seeded {self.master_path} with {len(records)} records")
+        return True
+
+    def pending_count(self):
+        return sum(1 for _ in self.iter_journal())
+
+    def compact(self, indent=2):
+        """Folds the journal into the master file, then truncates the journal.
+
+        Replaying is idempotent (records are upserted by ID), so a crash between
+        the master rename and the truncate is safe. Appends wait for the lock.
+        """
+        with locked(self.lock_path):
+            pending = list(self.iter_journal())
+            if not pending:
+                print(f"Journal empty, {self.master_path} is up to date.")
+                return 0
+
+            merged = merge_records(self.load_master(), pending)
+            write_json_atomic(merged, self.master_path, indent=indent)
+
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+        print(f"Compacted {len(pending)} journal records into {self.master_path} ({len(merged)} total)")
+        return len(pending)
+
+
+def merge_records(base, updates):
+    """Upserts `updates` into `base` by ID, keeping base order and appending new IDs."""
+    merged = list(base)
+    position = {}
+    for i, record in enumerate(merged):
+        if record.get("id") is not None:
+            position[str(record["id"])] = i
+
+    for record in updates:
+        rid = record.get("id")
+        if rid is not None and str(rid) in position:
+            merged[position[str(rid)]] = record
+        else:
+            if rid is not None:
+                position[str(rid)] = len(merged)
+            merged.append(record)
+    return merged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or compact a generator journal.")
+    parser.add_argument("command", choices=["compact", "status"])
+    parser.add_argument("master", help="Master JSON file (e.g. ../app/assets/master_database_v3.json)")
+    args = parser.parse_args()
+
+    journal = QuestionJournal(args.master)
+    if args.command == "compact":
+        journal.compact()
+    else:
+        print(f"{journal.journal_path}: {journal.pending_count()} pending records")
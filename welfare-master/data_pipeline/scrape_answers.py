@@ -3,25 +3,32 @@ Scrape correct answers from kakomonn.com question pages.
 The answers are displayed when you view a question's detail page.
 """
 
-import requests
 from bs4 import BeautifulSoup
 import json
-import time
 import re
 
-# Headers for polite scraping
+from http_cache import ResponseCache
+from http_fetch import fetch_all
+
+# Headers and pacing for polite scraping
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+FETCH_OPTIONS = {
+    "headers": HEADERS,
+    "concurrency": 4,
+    "per_host": 2,
+    "host_interval": 0.3,
+    "timeout": 10,
+    "cache": ResponseCache(),
+}
 
 
-def get_answer_from_question_page(url):
+def get_answer_from_question_page(html):
     """
-    Scrape the correct answer from a single question page on kakomonn.com
+    Extract the correct answer from a question page on kakomonn.com
     Returns the answer as a string (e.g., "2" or "1,3")
     """
     try:
-        r = requests.get(url, headers=HEADERS, timeout=10)
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
 
         # Look for answer indicators
         # Pattern 1: Look for elements with "正解" or "正答"
@@ -52,7 +59,7 @@ def get_answer_from_question_page(url):
 
         return answer_text
     except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        print(f"Error parsing question page: {e}")
         return None
 
 
@@ -66,44 +73,44 @@ def scrape_answers_for_exam(exam_name, base_list_url, num_pages=3, expected_coun
 
     # Step 1: Get all question links from list pages
     question_links = []
-    for page in range(1, num_pages + 1):
-        url = f"{base_list_url}?page={page}"
-        print(f"Fetching list page {page}: {url}")
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # Find question links
-            links = soup.find_all("a", href=re.compile(r"/questions/\d+"))
-            for link in links:
-                href = link.get("href")
-                if href:
-                    full_url = (
-                        f"https://shakaifukushi.kakomonn.com{href}"
-                        if href.startswith("/")
-                        else href
-                    )
-                    if full_url not in question_links:
-                        question_links.append(full_url)
-
-            time.sleep(0.5)
-        except Exception as e:
-            print(f"Error on page {page}: {e}")
+    list_urls = [f"{base_list_url}?page={page}" for page in range(1, num_pages + 1)]
+    for page, result in enumerate(fetch_all(list_urls, **FETCH_OPTIONS), 1):
+        print(f"Fetched list page {page}: {result.url}")
+        if not result.ok:
+            print(f"Error on page {page}: {result.error or result.status}")
+            continue
+        soup = BeautifulSoup(result.text(), "html.parser")
+
+        # Find question links
+        links = soup.find_all("a", href=re.compile(r"/questions/\d+"))
+        for link in links:
+            href = link.get("href")
+            if href:
+                full_url = (
+                    f"https://shakaifukushi.kakomonn.com{href}"
+                    if href.startswith("/")
+                    else href
+                )
+                if full_url not in question_links:
+                    question_links.append(full_url)
 
     print(f"Found {len(question_links)} question links")
 
-    # Step 2: Fetch answers for each question
+    # Step 2: Fetch answers for each question (one batch)
     answers = {}
-    for i, url in enumerate(question_links[:expected_count], 1):
-        print(f"Fetching question {i}/{len(question_links)}: {url}")
-        answer = get_answer_from_question_page(url)
+    targets = question_links[:expected_count]
+    for i, result in enumerate(fetch_all(targets, **FETCH_OPTIONS), 1):
+        print(f"Fetched question {i}/{len(question_links)}: {result.url}")
+        if not result.ok:
+            print(f"Error fetching {result.url}: {result.error or result.status}")
+            answer = None
+        else:
+            answer = get_answer_from_question_page(result.text())
         if answer:
             answers[str(i)] = answer
             print(f"  -> Answer: {answer}")
         else:
             print(f"  -> No answer found")
-        time.sleep(0.3)  # Be polite
 
     return answers
 
@@ -114,8 +121,8 @@ def main():
     print("Testing single question scrape...")
     print(f"URL: {test_url}")
 
-    r = requests.get(test_url, headers=HEADERS, timeout=10)
-    soup = BeautifulSoup(r.text, "html.parser")
+    page = fetch_all([test_url], **FETCH_OPTIONS)[0]
+    soup = BeautifulSoup(page.text() or "", "html.parser")
 
     # Print all text content to examine structure
     print("\n--- Page Structure Analysis ---")
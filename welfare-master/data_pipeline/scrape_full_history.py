@@ -1,4 +1,3 @@
-import requests
 from bs4 import BeautifulSoup
 from pypdf import PdfReader
 import io
@@ -7,6 +6,10 @@ import re
 import time
 import sys
 
+from answer_keys import AnswerKeyStore, print_report
+from http_cache import ResponseCache
+from http_fetch import fetch_all
+
 # Constants
 YEAR_CONFIGS = [
     {
@@ -32,19 +35,13 @@ YEAR_CONFIGS = [
     },
 ]
 
-HEADERS = {"User-Agent": "Mozilla/5.0"}
-
-
 def normalize_text(text):
     return re.sub(r"\s+", " ", text).strip()
 
 
-def fetch_html_questions(url):
-    print(f"  Fetching HTML: {url}...")
+def parse_html_questions(html):
     try:
-        res = requests.get(url, headers=HEADERS, timeout=10)
-        res.encoding = res.apparent_encoding
-        soup = BeautifulSoup(res.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
 
         questions = []
         dts = soup.find_all("dt")
@@ -66,16 +63,14 @@ def fetch_html_questions(url):
                 questions.append({"number": q_num, "text": dt_text, "options": options})
         return questions
     except Exception as e:
-        print(f"  Error fetching HTML: {e}")
+        print(f"  Error parsing HTML: {e}")
         return []
 
 
-def fetch_pdf_answers(url):
-    print(f"  Fetching Answer PDF: {url}...")
+def parse_pdf_answers(content):
     answers = {}
     try:
-        res = requests.get(url, headers=HEADERS, timeout=10)
-        f = io.BytesIO(res.content)
+        f = io.BytesIO(content)
         reader = PdfReader(f)
         text = ""
         for page in reader.pages:
@@ -131,19 +126,45 @@ def fetch_pdf_answers(url):
         return answers
 
     except Exception as e:
-        print(f"  Error fetching PDF: {e}")
+        print(f"  Error parsing PDF: {e}")
         return {}
 
 
+def fetch_pages(urls):
+    """url -> FetchResult, fetched as one batch."""
+    for url in urls:
+        print(f"  Fetching {url}...")
+    pages = fetch_all(urls, concurrency=4, per_host=2, host_interval=0.5, timeout=10, cache=ResponseCache())
+    results = {r.url: r for r in pages}
+    for result in results.values():
+        if not result.ok:
+            print(f"  Error fetching {result.url}: {result.error or result.status}")
+    return results
+
+
 def main():
     final_data = []
+    answer_keys = AnswerKeyStore.default()
+
+    # Every question page and every answer PDF without an official key, in one batch
+    urls = [config[key] for config in YEAR_CONFIGS for key in ("am_url", "pm_url")]
+    urls += [
+        config["ans_url"]
+        for config in YEAR_CONFIGS
+        if not answer_keys.has_exam("social", int(config["exam_num"]), "official")
+    ]
+    pages = fetch_pages(urls)
+
+    def page_questions(url):
+        page = pages[url]
+        return parse_html_questions(page.text()) if page.ok else []
 
     for config in YEAR_CONFIGS:
         print(f"Processing {config['year']} (Exam {config['exam_num']})...")
 
-        # 1. Fetch Questions
-        am_qs = fetch_html_questions(config["am_url"])
-        pm_qs = fetch_html_questions(config["pm_url"])
+        # 1. Questions
+        am_qs = page_questions(config["am_url"])
+        pm_qs = page_questions(config["pm_url"])
         all_qs = am_qs + pm_qs
         print(f"  Found {len(am_qs)} AM + {len(pm_qs)} PM = {len(all_qs)} questions.")
 
@@ -151,22 +172,32 @@ def main():
             print("  Skipping due to no questions.")
             continue
 
-        # 2. Fetch Answers
-        ans_map = fetch_pdf_answers(config["ans_url"])
-        print(f"  Found {len(ans_map)} answers.")
+        # 2. Answers: the official key files when present, else the answer PDF
+        exam_num = int(config["exam_num"])
+        if answer_keys.has_exam("social", exam_num, "official"):
+            print("  Using official answer key.")
+        else:
+            answer_pdf = pages[config["ans_url"]]
+            ans_map = parse_pdf_answers(answer_pdf.body) if answer_pdf.ok else {}
+            print(f"  Found {len(ans_map)} answers.")
+            answer_keys.add("social", exam_num, ans_map, "scraped", config["ans_url"])
+        answers, report = answer_keys.join(
+            [{"question_number": q["number"]} for q in all_qs], "social", exam_num
+        )
+        print_report(report, "  Answer keys: ")
 
         # 3. Merge and Format
         exam_id_base = f"ss{config['exam_num']}"
 
         count = 0
-        for q in all_qs:
+        for q, answer in zip(all_qs, answers):
             q_num = q["number"]
 
             # Format ID: ss37_001
             q_id = f"{exam_id_base}_{q_num:03d}"
 
             # Find Answer
-            correct = ans_map.get(q_num, "0")  # Default 0 if missing
+            correct = ",".join(answer) if answer else "0"  # Default 0 if missing
 
             # Clean text
             # Remove "問題1" prefix from text? Keep it for context?
@@ -5,10 +5,12 @@
 
 import json
 import re
-import requests
 from bs4 import BeautifulSoup
 import sys
 
+from http_cache import ResponseCache
+from http_fetch import fetch_all
+
 sys.stdout.reconfigure(encoding="utf-8")
 
 # 対象年度とURL
@@ -37,15 +39,16 @@ EXAM_DATA = [
 ]
 
 
-def fetch_html(url):
-    """URLからHTMLを取得"""
-    try:
-        resp = requests.get(url, timeout=30)
-        resp.encoding = "utf-8"
-        return resp.text
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-        return None
+def fetch_html(urls):
+    """URL -> HTML（取得失敗は None）。全URLをまとめて並行取得"""
+    pages = {}
+    for result in fetch_all(urls, concurrency=4, per_host=2, host_interval=0.5, cache=ResponseCache()):
+        if result.ok:
+            pages[result.url] = result.text("utf-8")
+        else:
+            print(f"Error fetching {result.url}: {result.error or result.status}")
+            pages[result.url] = None
+    return pages
 
 
 def parse_questions(html_content, session_type="am"):
@@ -115,19 +118,20 @@ def parse_questions(html_content, session_type="am"):
 def scrape_all_exams():
     """全年度の問題をスクレイピング"""
     all_data = []
+    pages = fetch_html([exam[key] for exam in EXAM_DATA for key in ("am_url", "pm_url")])
 
     for exam in EXAM_DATA:
         print(f"\n=== {exam['year']} (第{exam['exam_number']}回) ===")
 
         # 午前問題
         print(f"  Fetching AM: {exam['am_url']}")
-        am_html = fetch_html(exam["am_url"])
+        am_html = pages[exam["am_url"]]
         am_questions = parse_questions(am_html, "am")
         print(f"  AM Questions: {len(am_questions)}")
 
         # 午後問題
         print(f"  Fetching PM: {exam['pm_url']}")
-        pm_html = fetch_html(exam["pm_url"])
+        pm_html = pages[exam["pm_url"]]
         pm_questions = parse_questions(pm_html, "pm")
         print(f"  PM Questions: {len(pm_questions)}")
 
@@ -0,0 +1,175 @@
+import argparse
+import base64
+import gzip
+import json
+
+from asset_manifest import NATIVE_DIR, write_native_tables
+from question_ids import normalize_text
+
+# Character n-gram full-text search index, one per qualification.
+#
+# Japanese has no word boundaries, so every question (text + options) is
+# normalized like question_ids.normalize_text (NFKC, lowercase, no
+# whitespace) and split into overlapping character bigrams. Each bigram maps
+# to the ordinals of the questions containing it; postings are delta-encoded
+# as unsigned LEB128 varints and stored base64 in a compact JSON file:
+#
+#   {"version": 1, "gram": 2, "ids": ["q1", ...], "grams": {"社会": "<b64>", ...}}
+#
+# A phrase query intersects the postings of its bigrams (a one-character
+# query unions the grams containing it) and verifies the candidates by
+# substring match; see app/utils/searchIndex.ts for the client side.
+#
+# The web index is published by build_sqlite_assets.py (search_<q> in
+# manifest.json); the native one is written next to separated_db:
+#
+#   python search_index.py native
+#   python search_index.py query ../app/public/search_social.json 成年後見
+
+FORMAT_VERSION = 1
+GRAM_SIZE = 2
+GZIP_LEVEL = 9
+
+
+def searchable_text(record):
+    question = record.get("question_text") or record.get("questionText") or ""
+    options = record.get("options") or []
+    if isinstance(options, str):
+        options = [options]
+    return normalize_text(question) + "\n" + "\n".join(normalize_text(o) for o in options)
+
+
+def grams(text, size=GRAM_SIZE):
+    return {text[i : i + size] for i in range(len(text) - size + 1) if "\n" not in text[i : i + size]}
+
+
+def encode_postings(ordinals):
+    """Sorted ordinals -> base64 of LEB128 varint deltas (first value as-is)."""
+    out = bytearray()
+    previous = 0
+    for ordinal in ordinals:
+        delta = ordinal - previous
+        previous = ordinal
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_postings(encoded):
+    ordinals = []
+    value = shift = previous = 0
+    for byte in base64.b64decode(encoded):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        previous += value
+        ordinals.append(previous)
+        value = shift = 0
+    return ordinals
+
+
+def unique_questions(records):
+    """Records by ID in first-seen order; a later record with the same ID wins."""
+    by_id = {}
+    for record in records:
+        if isinstance(record, dict) and record.get("id") is not None:
+            by_id[str(record["id"])] = record
+    return by_id
+
+
+def build_index(records):
+    by_id = unique_questions(records)
+    postings = {}
+    for ordinal, record in enumerate(by_id.values()):
+        for gram in grams(searchable_text(record)):
+            postings.setdefault(gram, []).append(ordinal)
+    return {
+        "version": FORMAT_VERSION,
+        "gram": GRAM_SIZE,
+        "ids": list(by_id),
+        "grams": {gram: encode_postings(ordinals) for gram, ordinals in sorted(postings.items())},
+    }
+
+
+def search(index, query, texts=None):
+    """IDs of the questions containing `query` (verified against `texts` if given)."""
+    query = normalize_text(query)
+    if not query:
+        return []
+    size = index["gram"]
+    if len(query) < size:
+        candidates = set()
+        for gram, encoded in index["grams"].items():
+            if query in gram:
+                candidates.update(decode_postings(encoded))
+        candidates = sorted(candidates)
+    else:
+        candidates = None
+        for gram in sorted(grams(query, size), key=lambda g: len(index["grams"].get(g, ""))):
+            encoded = index["grams"].get(gram)
+            if encoded is None:
+                return []
+            ordinals = decode_postings(encoded)
+            candidates = ordinals if candidates is None else sorted(set(candidates).intersection(ordinals))
+            if not candidates:
+                return []
+    ids = [index["ids"][ordinal] for ordinal in candidates]
+    if texts is not None:
+        ids = [i for i in ids if query in searchable_text(texts[i])]
+    return ids
+
+
+def dump_index(index):
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def print_size_report(label, payload, records):
+    corpus = json.dumps(list(records), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    index_gz = len(gzip.compress(payload, GZIP_LEVEL, mtime=0))
+    corpus_gz = len(gzip.compress(corpus, GZIP_LEVEL, mtime=0))
+    print(
+        f"  {label}: index {len(payload) / 1024:.0f} KB ({index_gz / 1024:.0f} KB gzip) "
+        f"vs corpus {len(corpus) / 1024:.0f} KB ({corpus_gz / 1024:.0f} KB gzip), "
+        f"{len(payload) / len(corpus):.0%} / {index_gz / corpus_gz:.0%}"
+    )
+
+
+def publish_search_index(manifest, qualification, records):
+    """Publishes search_<qualification> (content-hashed) for the web client."""
+    by_id = unique_questions(records)
+    payload = dump_index(build_index(by_id.values()))
+    entry = manifest.publish_table(f"search_{qualification}", payload, len(by_id))
+    print_size_report(f"search_{qualification}", payload, by_id.values())
+    return entry
+
+
+def write_native_indexes(native_dir=NATIVE_DIR):
+    """Writes separated_db/search_<q>.json for every qualification whose spec bundle exists."""
+
+    def build_payload(qualification, records):
+        by_id = unique_questions(records)
+        payload = dump_index(build_index(by_id.values()))
+        print_size_report(f"search_{qualification}", payload, by_id.values())
+        return payload
+
+    write_native_tables("search", build_payload, native_dir=native_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the native search indexes or query an index.")
+    parser.add_argument("command", choices=["native", "query"])
+    parser.add_argument("args", nargs="*", help="query: <search_*.json> <phrase>")
+    parser.add_argument("--native-dir", default=NATIVE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "native":
+        write_native_indexes(args.native_dir)
+    else:
+        index_path, phrase = args.args[0], " ".join(args.args[1:])
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        ids = search(index, phrase)
+        print(f"{len(ids)} candidates: {ids[:20]}")
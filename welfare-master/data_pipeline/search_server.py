@@ -0,0 +1,305 @@
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from asset_manifest import MANIFEST_NAME, is_hashed_name
+from json_stream import iter_json_array
+
+# Local search service over every master / asset JSON file, for data fixes.
+#
+# Each record is indexed as its full JSON text in an SQLite FTS5 table with
+# the trigram tokenizer, so any substring (codes like "SW専", IDs, phrases)
+# is found without re-parsing the files. group / year / category_label /
+# source file are stored as columns for filtering. Files are re-checked at
+# most every RELOAD_INTERVAL seconds and only the changed ones are reindexed.
+#
+#   python search_server.py                  # http://127.0.0.1:8765
+#   curl 'http://127.0.0.1:8765/search?q=SW専&group=spec_social&limit=5'
+#   curl 'http://127.0.0.1:8765/record?file=app/assets/master_data.json&position=12'
+#   curl 'http://127.0.0.1:8765/files'
+#
+# Query parameters for /search: q (substring; 1-2 characters fall back to a
+# scan), group, year (exact), category, file (substring), limit, offset.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+INDEX_FILE = os.path.join(BASE_DIR, "corpus_search.sqlite")
+
+SOURCE_PATTERNS = [
+    "app/assets/*.json",
+    "app/assets/separated_db/*.json",
+    "app/public/*.json",
+    "data_pipeline/*.json",
+]
+RELOAD_INTERVAL = 2.0
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+SNIPPET_LENGTH = 120
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS docs (
+    rowid INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id TEXT,
+    group_id TEXT,
+    year TEXT,
+    category_label TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_docs_file ON docs(file, position);
+CREATE INDEX IF NOT EXISTS idx_docs_group ON docs(group_id);
+CREATE INDEX IF NOT EXISTS idx_docs_year ON docs(year);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(body, tokenize = 'trigram');
+"""
+
+# The trigram tokenizer needs at least 3 characters to use the index
+MIN_FTS_QUERY = 3
+
+
+def source_files(root=ROOT_DIR, patterns=SOURCE_PATTERNS):
+    """Relative paths of the searchable JSON files (hashed copies and manifests excluded)."""
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(root, pattern)):
+            name = os.path.basename(path)
+            if is_hashed_name(name) or name == MANIFEST_NAME or not os.path.isfile(path):
+                continue
+            paths.add(os.path.relpath(path, root).replace(os.sep, "/"))
+    return sorted(paths)
+
+
+def as_text(value):
+    if value is None:
+        return None
+    return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+class CorpusSearch:
+    """FTS5 trigram index over the source files, refreshed when files change."""
+
+    def __init__(self, index_path=INDEX_FILE, root=ROOT_DIR):
+        self.root = root
+        self.conn = sqlite3.connect(index_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA_SQL)
+        self.lock = threading.Lock()
+        self._checked_at = 0.0
+
+    def refresh(self, force=False):
+        """Reindexes new or changed files and drops deleted ones. Returns the reindexed paths."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < RELOAD_INTERVAL:
+            return []
+        self._checked_at = now
+
+        conn = self.conn
+        known = {row[0]: row[1:] for row in conn.execute("SELECT path, size, mtime_ns FROM files")}
+        current = source_files(self.root)
+        for path in set(known) - set(current):
+            self._drop(path)
+
+        changed = []
+        for path in current:
+            stat = os.stat(os.path.join(self.root, path))
+            if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            self._index_file(path, stat)
+            changed.append(path)
+        conn.commit()
+        return changed
+
+    def _drop(self, path):
+        self.conn.execute(
+            "DELETE FROM docs_fts WHERE rowid IN (SELECT rowid FROM docs WHERE file = ?)", (path,)
+        )
+        self.conn.execute("DELETE FROM docs WHERE file = ?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _index_file(self, path, stat):
+        started = time.perf_counter()
+        self._drop(path)
+        conn = self.conn
+        count = 0
+        error = None
+        next_rowid = (conn.execute("SELECT MAX(rowid) FROM docs").fetchone()[0] or 0) + 1
+        try:
+            for position, record in enumerate(iter_json_array(os.path.join(self.root, path))):
+                rowid = next_rowid + position
+                meta = record if isinstance(record, dict) else {}
+                conn.execute(
+                    "INSERT INTO docs (rowid, file, position, id, group_id, year, category_label) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        rowid,
+                        path,
+                        position,
+                        as_text(meta.get("id")),
+                        as_text(meta.get("group") or meta.get("group_id")),
+                        as_text(meta.get("year")),
+                        as_text(meta.get("category_label") or meta.get("categoryLabel")),
+                    ),
+                )
+                conn.execute(
+                    "INSERT INTO docs_fts (rowid, body) VALUES (?, ?)",
+                    (rowid, json.dumps(record, ensure_ascii=False)),
+                )
+                count += 1
+        except (OSError, ValueError) as e:
+            # Not an array of records (progress files, answer keys, ...): listed, not searchable
+            self._drop(path)
+            count = 0
+            error = str(e)
+        conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, records, error) VALUES (?, ?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, count, error),
+        )
+        print(f"Indexed {path}: {count} records ({time.perf_counter() - started:.2f} s)")
+
+    def search(self, q="", group=None, year=None, category=None, file=None, limit=DEFAULT_LIMIT, offset=0):
+        where = []
+        params = []
+        if q and len(q) >= MIN_FTS_QUERY:
+            where.append("d.rowid IN (SELECT rowid FROM docs_fts WHERE docs_fts MATCH ?)")
+            params.append('"' + q.replace('"', '""') + '"')
+        elif q:
+            where.append("instr(f.body, ?) > 0")
+            params.append(q)
+        if group:
+            where.append("d.group_id = ?")
+            params.append(group)
+        if year:
+            where.append("d.year = ?")
+            params.append(year)
+        if category:
+            where.append("instr(d.category_label, ?) > 0")
+            params.append(category)
+        if file:
+            where.append("instr(d.file, ?) > 0")
+            params.append(file)
+        clause = ("WHERE " + " AND ".join(where)) if where else ""
+        from_sql = "FROM docs d JOIN docs_fts f ON f.rowid = d.rowid"
+
+        total = self.conn.execute(f"SELECT COUNT(*) {from_sql} {clause}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT d.file, d.position, d.id, d.group_id, d.year, d.category_label, f.body "
+            f"{from_sql} {clause} ORDER BY d.file, d.position LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        results = []
+        for path, position, rid, group_id, year_value, label, body in rows:
+            record = json.loads(body)
+            text = (record.get("question_text") or record.get("term") or "") if isinstance(record, dict) else ""
+            results.append(
+                {
+                    "file": path,
+                    "position": position,
+                    "id": rid,
+                    "group": group_id,
+                    "year": year_value,
+                    "category_label": label,
+                    "text": as_text(text)[:SNIPPET_LENGTH],
+                }
+            )
+        return {"total": total, "results": results}
+
+    def record(self, file, position):
+        row = self.conn.execute(
+            "SELECT f.body FROM docs d JOIN docs_fts f ON f.rowid = d.rowid WHERE d.file = ? AND d.position = ?",
+            (file, position),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def files(self):
+        return [
+            {"file": path, "records": records, "bytes": size, "error": error}
+            for path, size, records, error in self.conn.execute(
+                "SELECT path, size, records, error FROM files ORDER BY path"
+            )
+        ]
+
+
+def make_handler(corpus):
+    class SearchHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            # http.server decodes the request line as latin-1; undo that for raw UTF-8 queries
+            try:
+                raw_path = self.path.encode("latin-1").decode("utf-8")
+            except UnicodeError:
+                raw_path = self.path
+            url = urlparse(raw_path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            started = time.perf_counter()
+            try:
+                with corpus.lock:
+                    corpus.refresh()
+                    if url.path == "/search":
+                        payload = corpus.search(
+                            q=params.get("q", ""),
+                            group=params.get("group"),
+                            year=params.get("year"),
+                            category=params.get("category"),
+                            file=params.get("file"),
+                            limit=min(int(params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT),
+                            offset=int(params.get("offset", 0)),
+                        )
+                    elif url.path == "/record":
+                        payload = corpus.record(params.get("file", ""), int(params.get("position", -1)))
+                        if payload is None:
+                            self._send(404, {"error": "record not found"})
+                            return
+                    elif url.path == "/files":
+                        payload = {"files": corpus.files()}
+                    else:
+                        self._send(404, {"error": "use /search, /record or /files"})
+                        return
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                return
+            if isinstance(payload, dict) and url.path != "/record":
+                payload["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self._send(200, payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SearchHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local full-text search over the corpus files.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--root", default=ROOT_DIR, help="Project root (default: welfare-master)")
+    args = parser.parse_args()
+
+    corpus = CorpusSearch(args.index, args.root)
+    corpus.refresh(force=True)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(corpus))
+    print(f"Serving corpus search on http://{args.host}:{args.port}/search?q=...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
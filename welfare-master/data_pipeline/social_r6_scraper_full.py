@@ -1,37 +1,43 @@
-import requests
 from bs4 import BeautifulSoup
-import time
 import json
 import re
 import os
 
+from http_cache import ResponseCache
+from http_fetch import fetch_all
+
 BASE_URL = "https://shakaifukushi.kakomonn.com"
 LIST_URL = "https://shakaifukushi.kakomonn.com/list1/56011"
 OUTPUT_FILE = "social_r6.json"
+FETCH_OPTIONS = {
+    "headers": {"User-Agent": "Mozilla/5.0"},
+    "concurrency": 4,
+    "per_host": 2,
+    "host_interval": 0.5,
+    "cache": ResponseCache(),
+}
+# Detail pages are fetched in batches of this size; progress is saved after each
+BATCH_SIZE = 10
 
 
 def get_question_links():
     links = []
     seen = set()
-    for page in range(1, 4):
-        print(f"Fetching list page {page}...")
-        try:
-            r = requests.get(
-                f"{LIST_URL}?page={page}", headers={"User-Agent": "Mozilla/5.0"}
-            )
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            anchors = soup.find_all("a", href=True)
-            for a in anchors:
-                href = a["href"]
-                if "/questions/" in href:
-                    full_url = href if href.startswith("http") else BASE_URL + href
-                    if full_url not in seen:
-                        seen.add(full_url)
-                        links.append(full_url)
-            time.sleep(1)
-        except Exception as e:
-            print(f"Error fetching list page {page}: {e}")
+    list_urls = [f"{LIST_URL}?page={page}" for page in range(1, 4)]
+    for page, result in enumerate(fetch_all(list_urls, **FETCH_OPTIONS), 1):
+        print(f"Fetched list page {page}...")
+        if not result.ok:
+            print(f"Error fetching list page {page}: {result.error or result.status}")
+            continue
+        soup = BeautifulSoup(result.text(), "html.parser")
+        anchors = soup.find_all("a", href=True)
+        for a in anchors:
+            href = a["href"]
+            if "/questions/" in href:
+                full_url = href if href.startswith("http") else BASE_URL + href
+                if full_url not in seen:
+                    seen.add(full_url)
+                    links.append(full_url)
     return links
 
 
@@ -41,11 +47,9 @@ def clean_text(text):
     return re.sub(r"\s+", " ", text).strip()
 
 
-def scrape_detail(url, index):
+def scrape_detail(url, html, index):
     try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
 
         # 1. Question Text
         # Found in div.detail_list
@@ -74,7 +78,7 @@ def scrape_detail(url, index):
                 options.append(clean_text(li.get_text()))
 
         # 3. Answer
-        # Not easily scrapable via requests.
+        # Not easily scrapable from the static page.
         correct_answ = []
 
         # 4. Explanation
@@ -105,16 +109,19 @@ if __name__ == "__main__":
     print(f"Found {len(links)} links.")
 
     results = []
-    for i, link in enumerate(links):
-        print(f"[{i + 1}/{len(links)}] Scraping {link}...")
-        data = scrape_detail(link, i)
-        if data:
-            results.append(data)
-        time.sleep(0.5)
-
-        if (i + 1) % 10 == 0:
-            with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+    for start in range(0, len(links), BATCH_SIZE):
+        batch = links[start : start + BATCH_SIZE]
+        for i, page in enumerate(fetch_all(batch, **FETCH_OPTIONS), start):
+            print(f"[{i + 1}/{len(links)}] Scraping {page.url}...")
+            if not page.ok:
+                print(f"Error scraping {page.url}: {page.error or page.status}")
+                continue
+            data = scrape_detail(page.url, page.text(), i)
+            if data:
+                results.append(data)
+
+        with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
 
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
         json.dump(results, f, ensure_ascii=False, indent=2)
@@ -3,13 +3,15 @@ Download all exam PDFs from SSSC and extract questions, options, and answers.
 Creates a complete database of official exam data.
 """
 
-import requests
 import json
 import re
 import os
-import time
 import pdfplumber
 
+from answer_keys import AnswerKeyStore, print_report
+from http_cache import ResponseCache
+from http_fetch import download_all
+
 BASE_URL = "https://www.sssc.or.jp/shakai/past_exam/pdf"
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
 OUTPUT_DIR = (
@@ -73,7 +75,6 @@ EXAMS = {
                 "q_start": 124,
             },
         ],
-        "answer_file": "answer_key_r6_official.json",
         "total_questions": 129,
     },
     "第36回": {
@@ -137,7 +138,6 @@ EXAMS = {
             {"file": "ss_pm_07_36.pdf", "name": "就労支援サービス", "q_start": 143},
             {"file": "ss_pm_08_36.pdf", "name": "更生保護制度", "q_start": 147},
         ],
-        "answer_file": "answer_key_social_r5_official.json",
         "total_questions": 150,
     },
     "第35回": {
@@ -200,31 +200,28 @@ EXAMS = {
             {"file": "ss_pm_07_35.pdf", "name": "就労支援サービス", "q_start": 143},
             {"file": "ss_pm_08_35.pdf", "name": "更生保護制度", "q_start": 147},
         ],
-        "answer_file": "answer_key_social_r4_official.json",
         "total_questions": 150,
     },
 }
 
 
-def download_pdf(url, local_path):
-    """Download a PDF file."""
-    if os.path.exists(local_path):
-        return True
-
-    try:
-        print(f"    Downloading: {os.path.basename(url)}")
-        r = requests.get(url, headers=HEADERS, timeout=30)
-        r.raise_for_status()
+def download_pdfs(items):
+    """Downloads the (url, local_path) pairs as one batch.
 
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        with open(local_path, "wb") as f:
-            f.write(r.content)
-
-        time.sleep(0.3)
-        return True
-    except Exception as e:
-        print(f"    Error: {e}")
-        return False
+    PDFs in the HTTP cache are revalidated (a 304 costs no transfer), so a
+    re-published PDF replaces the local copy; HTTP_CACHE_MODE=offline replays
+    the cache without touching the network.
+    """
+    results = download_all(
+        items, headers=HEADERS, concurrency=4, per_host=2, host_interval=0.3, cache=ResponseCache()
+    )
+    for result in results:
+        if not result.ok:
+            print(f"    Error: {result.url}: {result.error or result.status}")
+        elif result.cached is None:
+            print(f"    Downloaded: {os.path.basename(result.url)}")
+    unchanged = sum(1 for r in results if r.cached)
+    print(f"    {unchanged}/{len(results)} PDFs unchanged (served from the HTTP cache)")
 
 
 def extract_text_from_pdf(pdf_path):
@@ -307,30 +304,30 @@ def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
     all_questions = []
+    # All answer_key_*.json files, official keys preferred
+    answer_keys = AnswerKeyStore.default(DATA_DIR)
+    print(f"Loaded {len(answer_keys)} answer keys")
+
+    download_pdfs(
+        [
+            (f"{BASE_URL}/{exam_info['folder']}/{subject['file']}", f"{OUTPUT_DIR}/{exam_info['folder']}/{subject['file']}")
+            for exam_info in EXAMS.values()
+            for subject in exam_info["subjects"]
+        ]
+    )
 
     for exam_name, exam_info in EXAMS.items():
         print(f"\n{'=' * 60}")
         print(f"Processing {exam_name} ({exam_info['year']})")
         print(f"{'=' * 60}")
 
-        # Load answer key
-        answer_file = f"{DATA_DIR}/{exam_info['answer_file']}"
-        if os.path.exists(answer_file):
-            with open(answer_file, "r", encoding="utf-8") as f:
-                answers = json.load(f)
-            print(f"  Loaded {len(answers)} answers from {exam_info['answer_file']}")
-        else:
-            print(f"  Warning: Answer file not found: {answer_file}")
-            answers = {}
-
         exam_questions = []
 
         for subject in exam_info["subjects"]:
-            pdf_url = f"{BASE_URL}/{exam_info['folder']}/{subject['file']}"
             pdf_path = f"{OUTPUT_DIR}/{exam_info['folder']}/{subject['file']}"
 
             print(f"\n  {subject['name']}:")
-            if not download_pdf(pdf_url, pdf_path):
+            if not os.path.exists(pdf_path):
                 continue
 
             text = extract_text_from_pdf(pdf_path)
@@ -342,21 +339,19 @@ def main():
             )
             print(f"    Extracted {len(questions)} questions")
 
-            # Add answer key to each question
             for q in questions:
-                q_num = str(q["question_number"])
-                if q_num in answers:
-                    answer_str = answers[q_num]
-                    q["correct_answer"] = [a.strip() for a in answer_str.split(",")]
-                else:
-                    q["correct_answer"] = []
-
                 q["year"] = exam_info["year"]
                 q["group"] = "past_social"
                 q["exam_number"] = exam_name
 
             exam_questions.extend(questions)
 
+        # Add answer key to each question
+        answers, report = answer_keys.join(exam_questions, "social")
+        for q, answer in zip(exam_questions, answers):
+            q["correct_answer"] = answer or []
+        print_report(report, "  Answer keys: ")
+
         print(f"\n  Total for {exam_name}: {len(exam_questions)} questions")
         all_questions.extend(exam_questions)
 
@@ -1,10 +1,19 @@
-import requests
 from bs4 import BeautifulSoup
-import time
 import json
 import re
 import os
 
+from http_cache import ResponseCache
+from http_fetch import fetch_all
+
+FETCH_OPTIONS = {
+    "headers": {"User-Agent": "Mozilla/5.0"},
+    "concurrency": 4,
+    "per_host": 2,
+    "host_interval": 0.5,
+    "cache": ResponseCache(),
+}
+
 
 def clean_text(text):
     if not text:
@@ -15,40 +24,34 @@ def clean_text(text):
 def get_question_links(list_base_url, pages=3):
     links = []
     seen = set()
-    for page in range(1, pages + 1):
-        print(f"  Fetching list page {page}...")
-        try:
-            r = requests.get(
-                f"{list_base_url}?page={page}", headers={"User-Agent": "Mozilla/5.0"}
-            )
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            anchors = soup.find_all("a", href=True)
-            for a in anchors:
-                href = a["href"]
-                if "/questions/" in href:
-                    # Handle relative vs absolute
-                    if href.startswith("/"):
-                        # Get domain from list_base_url
-                        domain = "/".join(list_base_url.split("/")[:3])
-                        full_url = domain + href
-                    else:
-                        full_url = href
-
-                    if full_url not in seen:
-                        seen.add(full_url)
-                        links.append(full_url)
-            time.sleep(1)
-        except Exception as e:
-            print(f"  Error fetching list page {page}: {e}")
+    list_urls = [f"{list_base_url}?page={page}" for page in range(1, pages + 1)]
+    for page, result in enumerate(fetch_all(list_urls, **FETCH_OPTIONS), 1):
+        print(f"  Fetched list page {page}...")
+        if not result.ok:
+            print(f"  Error fetching list page {page}: {result.error or result.status}")
+            continue
+        soup = BeautifulSoup(result.text(), "html.parser")
+        anchors = soup.find_all("a", href=True)
+        for a in anchors:
+            href = a["href"]
+            if "/questions/" in href:
+                # Handle relative vs absolute
+                if href.startswith("/"):
+                    # Get domain from list_base_url
+                    domain = "/".join(list_base_url.split("/")[:3])
+                    full_url = domain + href
+                else:
+                    full_url = href
+
+                if full_url not in seen:
+                    seen.add(full_url)
+                    links.append(full_url)
     return links
 
 
-def scrape_detail(url, index, group_name, year_label):
+def scrape_detail(url, html, index, group_name, year_label):
     try:
-        r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        r.raise_for_status()
-        soup = BeautifulSoup(r.text, "html.parser")
+        soup = BeautifulSoup(html, "html.parser")
 
         # 1. Question Text
         q_div = soup.find("div", class_="detail_list")
@@ -131,12 +134,14 @@ def main():
         links = get_question_links(job["url"], job["pages"])
         print(f" Found {len(links)} links.")
 
-        for i, link in enumerate(links):
-            print(f" [{i + 1}/{len(links)}] Scraping {link}...")
-            data = scrape_detail(link, i, job["group"], job["year"])
+        for i, page in enumerate(fetch_all(links, **FETCH_OPTIONS)):
+            print(f" [{i + 1}/{len(links)}] Scraping {page.url}...")
+            if not page.ok:
+                print(f"  Error scraping {page.url}: {page.error or page.status}")
+                continue
+            data = scrape_detail(page.url, page.text(), i, job["group"], job["year"])
             if data:
                 all_scraped.append(data)
-            time.sleep(0.5)
 
         # Save intermediate results
         with open("batch_scraped.json", "w", encoding="utf-8") as f:
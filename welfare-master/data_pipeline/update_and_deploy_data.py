@@ -33,6 +33,30 @@ def main():
         print("Aborting due to deployment error.")
         return
 
+    # 3. Build prebuilt SQLite databases for the web app (one per qualification)
+    if not run_script("build_sqlite_assets.py"):
+        print("Aborting due to SQLite build error.")
+        return
+
+    # 4. Related-question tables and flashcard links (web + native, per qualification)
+    if not run_script("build_related_questions.py"):
+        print("Aborting due to related questions build error.")
+        return
+
+    if not run_script("build_card_links.py"):
+        print("Aborting due to card links build error.")
+        return
+
+    # 5. Store shared question bodies once (pool + per-group ID views)
+    if not run_script("build_asset_pool.py"):
+        print("Aborting due to asset pool error.")
+        return
+
+    # 6. Minify, precompress (.gz/.br) and report asset sizes
+    if not run_script("emit_assets.py"):
+        print("Aborting due to asset emission error.")
+        return
+
     print("\n=== Data Update Complete ===")
     print("Next Steps:")
     print("1. Web: Reload the browser page.")
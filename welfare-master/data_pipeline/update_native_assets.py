@@ -1,6 +1,9 @@
-import json
 import os
 
+from asset_manifest import AssetManifest
+from json_stream import COMPACT_SEPARATORS, JsonArrayWriter, iter_json_array
+from search_index import write_native_indexes
+
 
 def update_native_assets():
     source_path = "master_database_v2_final.json"
@@ -15,9 +18,7 @@ def update_native_assets():
         print(f"Source file not found: {source_path}")
         return
 
-    print(f"Loading {source_path}...")
-    with open(source_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    print(f"Streaming {source_path}...")
 
     # ---------------------------------------------------------
     # 0. Normalize Categories
@@ -37,30 +38,38 @@ def update_native_assets():
         }
         return mapping.get(cat, cat)
 
-    for q in data:
+    # ---------------------------------------------------------
+    # 1. Prepare Data Subsets (with Backup Logic)
+    # ---------------------------------------------------------
+    # Single streaming pass: normalize each record and route it to its
+    # subsets. The subsets themselves stay in memory (publish_records sorts
+    # and shards each group whole), and together they cover most of the
+    # source: only records outside every subset are dropped early.
+    common_data = []
+    pass_social_data = []
+    daily_data = []
+    spec_social_data = []
+
+    for q in iter_json_array(source_path):
         if "categoryLabel" in q:
             q["categoryLabel"] = normalize_category(q["categoryLabel"])
         if "category_label" in q:
             q["category_label"] = normalize_category(q["category_label"])
 
-    # ---------------------------------------------------------
-    # 1. Prepare Data Subsets (with Backup Logic)
-    # ---------------------------------------------------------
-
-    # Common
-    common_data = [q for q in data if q.get("group") in ["common", "common_social"]]
-
-    # Past Social
-    # Matches 'past_social' and 'past_social_XX'
-    pass_social_data = [
-        q for q in data if str(q.get("group")).startswith("past_social")
-    ]
-
-    # Daily
-    daily_data = [q for q in data if not str(q.get("group")).startswith("past_")]
-
-    # Spec Social - Primary Source
-    spec_social_data = [q for q in data if q.get("group") == "spec_social"]
+        group = str(q.get("group"))
+        # Common
+        if q.get("group") in ["common", "common_social"]:
+            common_data.append(q)
+        # Past Social
+        # Matches 'past_social' and 'past_social_XX'
+        if group.startswith("past_social"):
+            pass_social_data.append(q)
+        # Daily
+        if not group.startswith("past_"):
+            daily_data.append(q)
+        # Spec Social - Primary Source
+        if q.get("group") == "spec_social":
+            spec_social_data.append(q)
 
     print(f"Initial Spec Social Count: {len(spec_social_data)}")
 
@@ -69,14 +78,11 @@ def update_native_assets():
         backup_path = "../app/public/web_spec_social_v2.json"
         if os.path.exists(backup_path):
             print(f"Retrieving missing spec_social data from {backup_path}...")
-            with open(backup_path, "r", encoding="utf-8") as f:
-                backup_data = json.load(f)
-
             # Filter ONLY spec_social from backup (Exclude past questions)
             # Exclude if group starts with past_
             # Exclude if ID starts with ps_ (past social)
             restored = []
-            for q in backup_data:
+            for q in iter_json_array(backup_path):
                 grp = q.get("group") or q.get("group_id")
                 qid = q.get("id")
 
@@ -115,16 +121,18 @@ def update_native_assets():
     # 2. Update Web Assets (app/public)
     # ---------------------------------------------------------
 
-    def save_web(filename, d):
-        path = os.path.join(web_dir, filename)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(d, f, ensure_ascii=False)
-        print(f"Saved {filename} ({len(d)})")
+    manifest = AssetManifest(web_dir)
+
+    def save_web(group, filename, d):
+        # Byte-budgeted, content-hashed shards + manifest entry;
+        # legacy filename kept for old clients
+        manifest.publish_records(group, d, filename)
 
-    save_web("web_common.json", common_data)
-    save_web("web_spec_social_v3.json", spec_social_data)  # Clean spec only
-    save_web("web_past_social.json", pass_social_data)  # Past only
-    save_web("web_daily.json", daily_data)
+    save_web("common", "web_common.json", common_data)
+    save_web("spec_social_v3", "web_spec_social_v3.json", spec_social_data)  # Clean spec only
+    save_web("past_social", "web_past_social.json", pass_social_data)  # Past only
+    save_web("daily", "web_daily.json", daily_data)
+    manifest.save()
 
     # ---------------------------------------------------------
     # 3. Update Native Assets (app/assets/separated_db)
@@ -133,19 +141,16 @@ def update_native_assets():
     # Native needs master_social.json to have BOTH Spec and Past.
     # Common is separate.
 
-    native_social_data = spec_social_data + pass_social_data
+    with JsonArrayWriter(os.path.join(native_dir, "master_social.json"), separators=COMPACT_SEPARATORS) as out:
+        out.write_all(spec_social_data)
+        out.write_all(pass_social_data)
+    print(f"Saved master_social.json ({out.count})")
 
-    with open(
-        os.path.join(native_dir, "master_social.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(native_social_data, f, ensure_ascii=False, indent=2)
-    print(f"Saved master_social.json ({len(native_social_data)})")
+    with JsonArrayWriter(os.path.join(native_dir, "master_common.json"), separators=COMPACT_SEPARATORS) as out:
+        out.write_all(common_data)
+    print(f"Saved master_common.json ({out.count})")
 
-    with open(
-        os.path.join(native_dir, "master_common.json"), "w", encoding="utf-8"
-    ) as f:
-        json.dump(common_data, f, ensure_ascii=False, indent=2)
-    print(f"Saved master_common.json ({len(common_data)})")
+    write_native_indexes(native_dir)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+const crypto = require('crypto');
 const fs = require('fs');
 const path = require('path');
 
@@ -35,6 +36,103 @@ const CARE_SPEC_KEYWORDS = [
 ];
 const CARE_FOLDER_CODES = ["介護専", "介護専門"];
 
+// Routing cache: hash of the fields classifyQuestion() reads -> its result.
+// The version stamp covers the rule tables and the routing code itself, so
+// editing either reclassifies everything on the next run.
+const CLASSIFICATION_CACHE = path.join(__dirname, "data_pipeline", "classification_cache_reorganize.json");
+
+function normalizeCategory(label) {
+    let cat = label || "";
+
+    cat = cat.replace(/_part_\d+/gi, "")
+        .replace(/_vol_\d+/gi, "")
+        .replace(/（\d+）/g, "")
+        .trim();
+
+    // NORMALIZATION
+    // 1. Remove leading numbers (e.g., '1医学概論', '12 ソーシャルワーク')
+    cat = cat.replace(/^\d+\s?/, "");
+
+    // 2. Remove suffixes like '(2)', '（共通）'
+    cat = cat.replace(/\s?\(2\)/, "").replace(/（共通）/, "");
+
+    // 3. Unify variations based on official subject names
+    if (cat.includes('地域福祉') && cat.includes('包括')) cat = '地域福祉と包括的支援体制';
+    if (cat === '障害福祉') cat = '障害者福祉';
+    if (cat === '心理学と心理的支援') cat = '心理学理論と心理的支援';
+    if (cat === '社会学と社会システム') cat = '社会理論と社会システム';
+    if (cat === '社会福祉調査の基礎') cat = '社会調査の基礎'; // Official name
+
+    return cat;
+}
+
+// Returns { category, dbs, rule }: normalized label, target DBs and the rule that fired
+function classifyQuestion(label, sourceTag) {
+    const cat = normalizeCategory(label);
+
+    if (sourceTag === 'official_scrape') {
+        return { category: cat, dbs: ['social'], rule: 'source:official_scrape' };
+    }
+
+    // DAILY MISSION CHECK
+    if (cat === '共通科目（総合）' || cat === '総合問題') {
+        return { category: 'HIDDEN_DAILY', dbs: ['daily'], rule: `daily:${cat}` };
+    }
+
+    const dbs = [];
+    const rules = [];
+    const socialCode = SOCIAL_FOLDER_CODES.find(c => cat.includes(c));
+    const mentalCode = MENTAL_FOLDER_CODES.find(c => cat.includes(c));
+    const careCode = CARE_FOLDER_CODES.find(c => cat.includes(c));
+    if (socialCode && !cat.includes("精神") && !cat.includes("PSW")) { dbs.push('social'); rules.push(`folder:${socialCode}`); }
+    if (mentalCode) { dbs.push('mental'); rules.push(`folder:${mentalCode}`); }
+    if (careCode) { dbs.push('care'); rules.push(`folder:${careCode}`); }
+
+    if (dbs.length === 0) {
+        if (sourceTag === 'social_spec_file') { dbs.push('social'); rules.push(`source:${sourceTag}`); }
+        if (sourceTag === 'mental_spec_file') { dbs.push('mental'); rules.push(`source:${sourceTag}`); }
+    }
+
+    if (dbs.length === 0) {
+        const socialKeyword = SOCIAL_SPEC_KEYWORDS.find(k => cat.includes(k));
+        const mentalKeyword = MENTAL_SPEC_KEYWORDS.find(k => cat.includes(k));
+        const careKeyword = CARE_SPEC_KEYWORDS.find(k => cat.includes(k));
+        if (socialKeyword) { dbs.push('social'); rules.push(`keyword:${socialKeyword}`); }
+        else if (mentalKeyword) { dbs.push('mental'); rules.push(`keyword:${mentalKeyword}`); }
+        else if (careKeyword) { dbs.push('care'); rules.push(`keyword:${careKeyword}`); }
+    }
+
+    if (dbs.length === 0) return { category: cat, dbs: ['common'], rule: 'default:common' };
+    return { category: cat, dbs, rule: rules.join('+') };
+}
+
+function rulesVersion() {
+    const tables = [
+        SOCIAL_SPEC_KEYWORDS, SOCIAL_FOLDER_CODES,
+        MENTAL_SPEC_KEYWORDS, MENTAL_FOLDER_CODES,
+        CARE_SPEC_KEYWORDS, CARE_FOLDER_CODES,
+        normalizeCategory.toString(), classifyQuestion.toString()
+    ];
+    return crypto.createHash('sha256').update(JSON.stringify(tables)).digest('hex').slice(0, 16);
+}
+
+function loadClassificationCache(version) {
+    try {
+        const data = JSON.parse(fs.readFileSync(CLASSIFICATION_CACHE, 'utf-8'));
+        if (data.rules_version === version) return new Map(Object.entries(data.entries));
+        console.log("Routing rules changed, reclassifying everything.");
+    } catch (e) {
+        // Missing or unreadable cache: start empty
+    }
+    return new Map();
+}
+
+function saveClassificationCache(version, entries) {
+    const tmpPath = CLASSIFICATION_CACHE + ".tmp";
+    fs.writeFileSync(tmpPath, JSON.stringify({ rules_version: version, entries: Object.fromEntries(entries) }));
+    fs.renameSync(tmpPath, CLASSIFICATION_CACHE);
+}
+
 function main() {
     console.log("Starting Database Reorganization (Node.js) - STRICT MODE + NORMALIZATION...");
 
@@ -114,72 +212,31 @@ function main() {
     const dbCommon = [];
     const dbDaily = [];
 
-    for (const q of uniqueQuestions.values()) {
-        const qStr = JSON.stringify(q);
-        let cat = q.category_label || "";
-
-        cat = cat.replace(/_part_\d+/gi, "")
-            .replace(/_vol_\d+/gi, "")
-            .replace(/（\d+）/g, "")
-            .trim();
-
-        // NORMALIZATION
-        // 1. Remove leading numbers (e.g., '1医学概論', '12 ソーシャルワーク')
-        cat = cat.replace(/^\d+\s?/, "");
-
-        // 2. Remove suffixes like '(2)', '（共通）'
-        cat = cat.replace(/\s?\(2\)/, "").replace(/（共通）/, "");
-
-        // 3. Unify variations based on official subject names
-        if (cat.includes('地域福祉') && cat.includes('包括')) cat = '地域福祉と包括的支援体制';
-        if (cat === '障害福祉') cat = '障害者福祉';
-        if (cat === '心理学と心理的支援') cat = '心理学理論と心理的支援';
-        if (cat === '社会学と社会システム') cat = '社会理論と社会システム';
-        if (cat === '社会福祉調査の基礎') cat = '社会調査の基礎'; // Official name
-
-        q.category_label = cat;
-
-        if (q.source_tag === 'official_scrape') {
-            dbSocial.push(q);
-            continue;
-        }
-
-        // DAILY MISSION CHECK
-        if (cat === '共通科目（総合）' || cat === '総合問題') {
-            q.group_id = 'daily_pool';
-            q.category_label = 'HIDDEN_DAILY';
-            dbDaily.push(q);
-            continue;
-        }
-
-        let isSocial = false;
-        let isMental = false;
-        let isCare = false;
-
-        if (SOCIAL_FOLDER_CODES.some(c => cat.includes(c)) && !cat.includes("精神") && !cat.includes("PSW")) isSocial = true;
-        if (MENTAL_FOLDER_CODES.some(c => cat.includes(c))) isMental = true;
-        if (CARE_FOLDER_CODES.some(c => cat.includes(c))) isCare = true;
-
-        if (!isSocial && !isMental && !isCare) {
-            if (q.source_tag === 'social_spec_file') isSocial = true;
-            if (q.source_tag === 'mental_spec_file') isMental = true;
-        }
+    const dbs = { social: dbSocial, mental: dbMental, care: dbCare, common: dbCommon, daily: dbDaily };
+    const version = rulesVersion();
+    const cache = loadClassificationCache(version);
+    let hits = 0;
 
-        if (!isSocial && !isMental && !isCare) {
-            if (SOCIAL_SPEC_KEYWORDS.some(k => cat.includes(k))) isSocial = true;
-            else if (MENTAL_SPEC_KEYWORDS.some(k => cat.includes(k))) isMental = true;
-            else if (CARE_SPEC_KEYWORDS.some(k => cat.includes(k))) isCare = true;
-        }
-
-        if (!isSocial && !isMental && !isCare) {
-            dbCommon.push(q);
+    for (const q of uniqueQuestions.values()) {
+        const key = crypto.createHash('sha1')
+            .update(JSON.stringify([q.category_label || "", q.source_tag || ""]))
+            .digest('hex');
+        let result = cache.get(key);
+        if (result) {
+            hits++;
         } else {
-            if (isSocial) dbSocial.push(q);
-            if (isMental) dbMental.push(q);
-            if (isCare) dbCare.push(q);
+            result = classifyQuestion(q.category_label, q.source_tag);
+            cache.set(key, result);
         }
+
+        q.category_label = result.category;
+        if (result.dbs[0] === 'daily') q.group_id = 'daily_pool';
+        for (const db of result.dbs) dbs[db].push(q);
     }
 
+    saveClassificationCache(version, cache);
+    console.log(`Classification cache: ${hits} hits, ${uniqueQuestions.size - hits} classified.`);
+
     console.log(`Social Spec DB: ${dbSocial.length}`);
     console.log(`Mental Spec DB: ${dbMental.length}`);
     console.log(`Care Spec DB: ${dbCare.length}`);
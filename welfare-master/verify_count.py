@@ -1,7 +1,9 @@
-import json
-from collections import Counter
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "data_pipeline"))
+from corpus_index import CorpusIndex
+
 # Force UTF-8 output
 sys.stdout.reconfigure(encoding="utf-8")
 
@@ -9,14 +11,13 @@ target = "app/public/web_spec_social.json"
 print(f"Checking {target}...")
 
 try:
-    with open(target, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    print(f"Total Questions: {len(data)}")
+    index = CorpusIndex.open(target, fields={"category_label": ("category_label",)})
+    print(f"Total Questions: {index.total}")
 
-    cats = Counter([d.get("category_label", "Unknown") for d in data])
+    cats = index.group_by("category_label")
     print("\n--- Category Breakdown ---")
-    for k, v in cats.most_common():
-        print(f"{k}: {v}")
+    for k, v in sorted(cats.items(), key=lambda item: -item[1]):
+        print(f"{k if k is not None else 'Unknown'}: {v}")
 
 except Exception as e:
     print(f"Error: {e}")